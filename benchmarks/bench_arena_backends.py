@@ -0,0 +1,50 @@
+"""Memory per game and time per turn of the list and numpy arena backends.
+
+    python -m benchmarks.bench_arena_backends [size ...]
+
+Each measure runs in its own process, so the memory figure is the resident
+memory taken by the arena alone.
+"""
+import multiprocessing
+import random
+import sys
+from timeit import default_timer
+
+from benchmarks.common import current_rss, deploy, make_map, random_turn
+from onagame2015.arena import get_arena_class
+
+MAP_SIZES = (30, 100, 300, 1000)
+UNITS_PER_PLAYER = 50
+TURNS = 10
+
+
+def measure(backend, size, queue):
+    random.seed(2015)
+    game_map = make_map(size)
+    arena_class = get_arena_class(backend)
+    rss_before = current_rss()
+    arena, bots = deploy(arena_class, game_map, UNITS_PER_PLAYER)
+    memory = current_rss() - rss_before
+    start = default_timer()
+    for _ in range(TURNS):
+        for bot, opponent in (bots, bots[::-1]):
+            random_turn(arena, bot, opponent)
+            arena.get_map_for_player(bot)
+    queue.put((memory, (default_timer() - start) / TURNS))
+
+
+def main(sizes):
+    print '%10s %8s %14s %16s' % ('map', 'backend', 'memory (MB)', 'turn (ms)')
+    for size in sizes:
+        for backend in ('list', 'numpy'):
+            queue = multiprocessing.Queue()
+            process = multiprocessing.Process(target=measure, args=(backend, size, queue))
+            process.start()
+            memory, turn_time = queue.get()
+            process.join()
+            print '%10s %8s %14.1f %16.2f' % (
+                '%dx%d' % (size, size), backend, memory / 2.0 ** 20, turn_time * 1000)
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or MAP_SIZES)
@@ -0,0 +1,54 @@
+"""Time AttackAction.execute between two tiles stacked with a growing amount
+of units. With the per tile counters the cost of resolving an attack should
+not depend on the size of the stacks.
+
+    python -m benchmarks.bench_attack
+"""
+import random
+from timeit import default_timer
+
+from onagame2015.actions import AttackAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import Coordinate
+from onagame2015.maploader import GameMap
+from onagame2015.status import GameStatus
+from onagame2015.units import AttackUnit
+
+STACK_SIZES = (10, 100, 500, 1000)
+ATTACKS = 1000
+
+
+def stack_units(arena, bot, coordinate, amount):
+    for _ in range(amount):
+        unit = AttackUnit(coordinate, bot.p_num, arena)
+        arena.set_content_on_tile(coordinate, unit)
+        bot.add_unit(unit)
+
+
+def time_attacks(stack_size):
+    arena = ArenaGrid(GameMap.create_empty_map(width=30, height=30), GameStatus())
+    attacker = BotPlayer('attacker', None, 1)
+    defender = BotPlayer('defender', None, 2)
+    attacker_coord, defender_coord = Coordinate(10, 10), Coordinate(11, 10)
+    action = {'action_type': 'ATTACK', 'from': attacker_coord, 'to': defender_coord}
+    elapsed = 0.0
+    for _ in range(ATTACKS):
+        # keep both stacks at their size, out of the timed section
+        for bot, coordinate in ((attacker, attacker_coord), (defender, defender_coord)):
+            stack_units(arena, bot, coordinate, stack_size - arena.number_of_units_in_tile(coordinate))
+        start = default_timer()
+        AttackAction(attacker).execute(arena, action, defender)
+        elapsed += default_timer() - start
+    return elapsed / ATTACKS
+
+
+def main():
+    random.seed(2015)
+    print '%8s %16s' % ('stack', 'attack (usec)')
+    for stack_size in STACK_SIZES:
+        print '%8d %16.2f' % (stack_size, time_attacks(stack_size) * 1e6)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Environment steps per second of the BatchEngine, for growing batches of
+games, against stepping ArenaGrid games one at a time. Each step is a random
+MOVE or ATTACK from a random tile of the player, followed by its observation
+(choosing the actions is not timed).
+
+    python -m benchmarks.bench_batch_engine
+"""
+import random
+from timeit import default_timer
+
+import numpy
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.batch_engine import ATTACK, MOVE, BatchEngine
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import AVAILABLE_MOVEMENTS
+from onagame2015.status import GameStatus
+
+from benchmarks.common import make_map
+
+MAP_SIZE = 30
+BATCH_SIZES = (1, 16, 256, 4096)
+STEPS = 100
+SCALAR_GAMES = 16
+
+
+def random_actions(engine, player, rng):
+    """One random action for each game, from a random tile of <player>."""
+    noise = rng.random_sample(engine.owner.shape) * (engine.owner == player)
+    flat = noise.reshape(engine.batch_size, -1).argmax(axis=1)
+    y, x = numpy.unravel_index(flat, (engine.height, engine.width))
+    movements = numpy.array(AVAILABLE_MOVEMENTS)[rng.randint(len(AVAILABLE_MOVEMENTS), size=engine.batch_size)]
+    kind = numpy.where(rng.random_sample(engine.batch_size) < 0.5, MOVE, ATTACK)
+    return kind, x, y, x + movements[:, 0], y + movements[:, 1], rng.randint(1, 5, engine.batch_size)
+
+
+def batch_steps_per_second(game_map, batch_size):
+    rng = numpy.random.RandomState(2015)
+    engine = BatchEngine.new_games(game_map, range(batch_size), rng=rng)
+    elapsed = 0
+    for step in range(STEPS):
+        player = step % 2 + 1
+        actions = random_actions(engine, player, rng)
+        start = default_timer()
+        engine.step(player, *actions)
+        engine.observe(player)
+        elapsed += default_timer() - start
+    return batch_size * STEPS / elapsed
+
+
+def scalar_steps_per_second(game_map):
+    rng = random.Random(2015)
+    games = []
+    for seed in range(SCALAR_GAMES):
+        arena = ArenaGrid(game_map, GameStatus(), rng=random.Random(seed))
+        bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+        arena.deploy_players(bots)
+        games.append((arena, bots))
+    start = default_timer()
+    for step in range(STEPS):
+        for arena, bots in games:
+            bot, opponent = bots[step % 2], bots[1 - step % 2]
+            if not bot.units:
+                continue
+            unit = rng.choice(bot.units)
+            direction = rng.choice(AVAILABLE_MOVEMENTS)
+            if rng.random() < 0.5:
+                MoveAction(bot, rng=rng).execute(arena, {'unit_id': str(unit.id), 'direction': direction}, opponent)
+            else:
+                try:
+                    AttackAction(bot, rng=rng).execute(
+                        arena, {'from': unit.coordinate, 'to': unit.coordinate + direction}, opponent)
+                except IndexError:
+                    pass
+            arena.get_map_for_player(bot, 'compact')
+    return SCALAR_GAMES * STEPS / (default_timer() - start)
+
+
+def main():
+    game_map = make_map(MAP_SIZE)
+    print '%-16s %8s %14s' % ('engine', 'games', 'steps/s')
+    print '%-16s %8d %14.0f' % ('ArenaGrid', SCALAR_GAMES, scalar_steps_per_second(game_map))
+    for batch_size in BATCH_SIZES:
+        print '%-16s %8d %14.0f' % ('BatchEngine', batch_size, batch_steps_per_second(game_map, batch_size))
+
+
+if __name__ == '__main__':
+    main()
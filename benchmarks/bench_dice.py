@@ -0,0 +1,44 @@
+"""Cost of resolving the dice of an attack: throwing and sorting each die,
+as AttackAction used to, against a single draw from the outcome tables.
+
+    python -m benchmarks.bench_dice
+"""
+import random
+from timeit import default_timer
+
+from onagame2015.dice import count_losses, outcome_table
+
+DICE = ((1, 1), (3, 2), (3, 3))
+ATTACKS = 100000
+
+
+def toss_dice(number_of_dice, rng):
+    for _ in range(number_of_dice):
+        yield rng.randint(1, 6)
+
+
+def thrown(attacker_n_dice, defender_n_dice, rng):
+    play = lambda n_dice: sorted(toss_dice(n_dice, rng), reverse=True)
+    attacker_dice, defender_dice = play(attacker_n_dice), play(defender_n_dice)
+    return (attacker_dice, defender_dice) + count_losses(attacker_dice, defender_dice)
+
+
+def from_table(attacker_n_dice, defender_n_dice, rng):
+    return outcome_table(attacker_n_dice, defender_n_dice).sample(rng)
+
+
+def main():
+    rng = random.Random(2015)
+    print '%8s %16s %16s' % ('dice', 'thrown (usec)', 'table (usec)')
+    for attacker_n_dice, defender_n_dice in DICE:
+        timings = []
+        for resolve in (thrown, from_table):
+            start = default_timer()
+            for _ in xrange(ATTACKS):
+                resolve(attacker_n_dice, defender_n_dice, rng)
+            timings.append((default_timer() - start) / ATTACKS * 1e6)
+        print '%8s %16.2f %16.2f' % (('%dv%d' % (attacker_n_dice, defender_n_dice),) + tuple(timings))
+
+
+if __name__ == '__main__':
+    main()
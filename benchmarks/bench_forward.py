@@ -0,0 +1,74 @@
+"""Cost of trying actions with the ForwardModel of a bot: applying and
+undoing one, with each way to resolve attacks, against copying the model or
+building it again.
+
+    python -m benchmarks.bench_forward
+"""
+import random
+from timeit import default_timer
+
+from benchmarks.common import deploy, make_map, random_turn
+from onagame2015.arena import ArenaGrid
+from onagame2015.forward import ENEMY, EXPECTED, OWN, SAMPLE, ForwardModel
+from onagame2015.pathfinding import MOVEMENTS
+
+MAP_SIZE = 50
+UNITS_PER_PLAYER = (10, 100, 400)
+ACTIONS = 2000
+
+
+def build_model(arena, bot, opponent):
+    """The model of <bot>, with every unit on the board in sight."""
+    model = ForwardModel(arena.width, arena.height, own_hq=tuple(bot.hq.coordinate),
+                         enemy_hq=tuple(opponent.hq.coordinate))
+    for unit in bot.units:
+        model.add_units(tuple(unit.coordinate), OWN, unit_ids=[str(unit.id)])
+    for unit in opponent.units:
+        model.add_units(tuple(unit.coordinate), ENEMY, 1)
+    return model
+
+
+def random_actions(model, rng):
+    unit_ids = list(model.unit_tiles)
+    tiles = list(model.units)
+    actions = []
+    for _ in range(ACTIONS):
+        if rng.random() < 0.5:
+            actions.append({'action_type': 'MOVE', 'unit_id': rng.choice(unit_ids), 'direction': rng.choice(MOVEMENTS)})
+        else:
+            x, y = rng.choice(tiles)
+            delta_x, delta_y = rng.choice(MOVEMENTS)
+            actions.append({'action_type': 'ATTACK', 'from': (x, y), 'to': (x + delta_x, y + delta_y)})
+    return actions
+
+
+def main():
+    random.seed(2015)
+    print '%8s %16s %16s %16s %16s' % ('units', 'build (us)', 'copy (us)', 'sample (us)', 'expected (us)')
+    for units in UNITS_PER_PLAYER:
+        arena, bots = deploy(ArenaGrid, make_map(MAP_SIZE), units)
+        random_turn(arena, *bots)
+        start = default_timer()
+        for _ in range(10):
+            model = build_model(arena, *bots)
+        build = (default_timer() - start) / 10 * 1e6
+
+        start = default_timer()
+        for _ in range(100):
+            model.copy()
+        copy = (default_timer() - start) / 100 * 1e6
+
+        actions = random_actions(model, random.Random(1))
+        timings = []
+        for attacks in (SAMPLE, EXPECTED):
+            model.attacks = attacks
+            start = default_timer()
+            for action in actions:
+                model.apply(action)
+                model.undo()
+            timings.append((default_timer() - start) / ACTIONS * 1e6)
+        print '%8d %16.1f %16.1f %16.2f %16.2f' % ((units, build, copy) + tuple(timings))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""Full games of 200 rounds played by the controller, between the synthetic
+bots of benchmarks.bots, for maps of several sizes and amounts of units to
+start with: games and turns per second, the time the controller takes per
+turn (p50 and p99, without the bots) and the peak memory of the process
+playing them. The results are written as JSON, and compared with a baseline
+as in benchmarks.suite:
+
+    python -m benchmarks.bench_games --output games.json
+    python -m benchmarks.bench_games --output new.json --baseline games.json
+
+Each case is played in a new process, so its peak memory is the one of its
+games. Needs turnboxed (and its basebot), as the controller does.
+"""
+import argparse
+import multiprocessing
+import random
+import resource
+import sys
+from timeit import default_timer
+
+from benchmarks.bots import BOTS
+from benchmarks.common import compare_results, temporary_map, write_results
+from onagame2015.headless import HeadlessGame
+
+MAP_SIZES = (30, 60, 100)
+UNITS_PER_PLAYER = (5, 20, 50)
+SEEDS = (1, 2)
+QUICK_MAP_SIZES = (30,)
+QUICK_UNITS_PER_PLAYER = (5, 20)
+QUICK_SEEDS = (1,)
+# every bot plays every other one, and itself
+MATCHES = (
+    ('walker', 'walker'),
+    ('greedy', 'walker'),
+    ('rusher', 'walker'),
+    ('greedy', 'rusher'),
+    ('rusher', 'greedy'),
+    ('greedy', 'greedy'),
+    ('rusher', 'rusher'),
+)
+# higher is better (1), or lower (-1)
+MEASURES = {
+    'games_per_sec': 1,
+    'turns_per_sec': 1,
+    'p50_turn_ms': -1,
+    'p99_turn_ms': -1,
+    'peak_rss_mb': -1,
+}
+
+
+def battle_map(size, blocked=0.05):
+    """Tiled JSON for a map of <size> x <size>, with a <blocked> fraction of
+    the tiles blocked, and the headquarters in two opposite corners."""
+    hqs = (2, 2), (size - 3, size - 3)
+    corners = set((x + delta_x, y + delta_y) for x, y in hqs for delta_x in range(-2, 3) for delta_y in range(-2, 3))
+    rng = random.Random(size)
+    tiles = [divmod(index, size)[::-1] for index in xrange(size * size)]
+    return {
+        'width': size,
+        'height': size,
+        'layers': [
+            {'name': 'Blocking Layer', 'width': size, 'height': size,
+             'data': [int(tile not in corners and rng.random() < blocked) for tile in tiles]},
+            {'name': 'HQ Layer', 'width': size, 'height': size,
+             'data': [int(tile in hqs) for tile in tiles]},
+        ],
+    }
+
+
+class TimedGame(HeadlessGame):
+    """HeadlessGame that times the calls to the controller on each turn."""
+
+    def run(self):
+        controller = self.controller
+        # seconds taken by the controller on each turn
+        self.turn_times = []
+        while True:
+            for bot_cookie, bot in self._bots:
+                start = default_timer()
+                turn_data = controller.get_turn_data(bot_cookie)
+                elapsed = default_timer() - start
+                request = self._play_turn(bot, turn_data)
+                start = default_timer()
+                result = controller.evaluate_turn(request, bot_cookie)
+                self.turn_times.append(elapsed + default_timer() - start)
+                if result == -1:
+                    return controller
+            controller.current_round += 1
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[int(round(fraction * (len(values) - 1)))]
+
+
+def play_case(map_size, units_per_player, seeds):
+    """Play every match with each of the <seeds>.
+    @return: <dict> with the parameters and the measures of the case
+    """
+    turn_times = []
+    games = 0
+    with temporary_map(battle_map(map_size)) as map_name:
+        start = default_timer()
+        for seed in seeds:
+            for first, second in MATCHES:
+                game = TimedGame([BOTS[first](seed), BOTS[second](seed + 1)], seed=seed, map_name=map_name,
+                                 units_per_player=units_per_player)
+                game.run()
+                turn_times.extend(game.turn_times)
+                games += 1
+        elapsed = default_timer() - start
+    return {
+        'map_size': map_size,
+        'units_per_player': units_per_player,
+        'games': games,
+        'games_per_sec': games / elapsed,
+        'turns_per_sec': len(turn_times) / elapsed,
+        'p50_turn_ms': percentile(turn_times, 0.5) * 1000,
+        'p99_turn_ms': percentile(turn_times, 0.99) * 1000,
+        # kilobytes, on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0,
+    }
+
+
+def run(map_sizes, units_per_player, seeds, report):
+    """Play every case in a new process, calling <report>(result) as each
+    one finishes. @return: <list> of results, as play_case returns them"""
+    results = []
+    for map_size in map_sizes:
+        for units in units_per_player:
+            pool = multiprocessing.Pool(1)
+            try:
+                result = pool.apply(play_case, (map_size, units, seeds))
+            finally:
+                pool.close()
+                pool.join()
+            results.append(result)
+            report(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='games.json', help="JSON file to write the results to")
+    parser.add_argument('--baseline', help="JSON file with results to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="fraction a measure can get worse before it is a regression")
+    parser.add_argument('--quick', action='store_true', help="only the smaller maps and armies, with one seed")
+    args = parser.parse_args(argv)
+
+    def report(result):
+        print '%8d %8d %8d %12.2f %12.1f %12.3f %12.3f %12.1f' % (
+            result['map_size'], result['units_per_player'], result['games'], result['games_per_sec'],
+            result['turns_per_sec'], result['p50_turn_ms'], result['p99_turn_ms'], result['peak_rss_mb'])
+        sys.stdout.flush()
+
+    print '%8s %8s %8s %12s %12s %12s %12s %12s' % (
+        'map', 'units', 'games', 'games/sec', 'turns/sec', 'p50 (ms)', 'p99 (ms)', 'peak (MB)')
+    if args.quick:
+        results = run(QUICK_MAP_SIZES, QUICK_UNITS_PER_PLAYER, QUICK_SEEDS, report)
+    else:
+        results = run(MAP_SIZES, UNITS_PER_PLAYER, SEEDS, report)
+    write_results(args.output, 'games', results)
+    if args.baseline:
+        regressions = compare_results(results, args.baseline, MEASURES, args.tolerance)
+        for case, measure, old, new in regressions:
+            print 'REGRESSION map %(map_size)s units %(units_per_player)s:' % case,
+            print '%s %.3f -> %.3f' % (measure, old, new)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
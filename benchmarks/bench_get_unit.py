@@ -0,0 +1,59 @@
+"""Compare the unit index lookup in ArenaGrid.get_unit against the old full
+matrix scan, for move-heavy turns on maps of growing size.
+
+    python -m benchmarks.bench_get_unit
+"""
+import random
+from timeit import default_timer
+
+from onagame2015.arena import ArenaGrid
+from onagame2015.lib import Coordinate
+from onagame2015.maploader import GameMap
+from onagame2015.status import GameStatus
+from onagame2015.units import AttackUnit
+
+MAP_SIZES = (30, 100, 300)
+MOVES_PER_TURN = (10, 100, 1000)
+
+
+def scan_for_unit(arena, content):
+    """The lookup ArenaGrid.get_unit used to do."""
+    for row in arena._matrix:
+        for tile in row:
+            for item in tile.items:
+                if str(item.id) == str(content):
+                    return item
+
+
+def build_arena(size, n_units):
+    arena = ArenaGrid(GameMap.create_empty_map(width=size, height=size), GameStatus())
+    unit_ids = []
+    for _ in range(n_units):
+        coordinate = Coordinate(random.randrange(arena.width), random.randrange(arena.height))
+        unit = AttackUnit(coordinate, 1, arena)
+        arena.set_content_on_tile(coordinate, unit)
+        unit_ids.append(str(unit.id))
+    return arena, unit_ids
+
+
+def time_turn(lookup, arena, unit_ids):
+    start = default_timer()
+    for unit_id in unit_ids:
+        lookup(arena, unit_id)
+    return default_timer() - start
+
+
+def main():
+    random.seed(2015)
+    print '%8s %8s %14s %14s' % ('map', 'moves', 'scan (ms)', 'index (ms)')
+    for size in MAP_SIZES:
+        for n_moves in MOVES_PER_TURN:
+            arena, unit_ids = build_arena(size, n_moves)
+            scan = time_turn(scan_for_unit, arena, unit_ids)
+            index = time_turn(ArenaGrid.get_unit, arena, unit_ids)
+            print '%8s %8d %14.3f %14.3f' % (
+                '%dx%d' % (size, size), n_moves, scan * 1000, index * 1000)
+
+
+if __name__ == '__main__':
+    main()
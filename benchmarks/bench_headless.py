@@ -0,0 +1,41 @@
+"""Games per second of the headless runner against the sandboxed games of
+turnboxed, with the example bots.
+
+    python -m benchmarks.bench_headless
+
+Needs turnboxed (and its basebot), as the controller does.
+"""
+import os
+from timeit import default_timer
+
+from onagame2015.bot import BotPlayer
+from onagame2015.engine import Onagame2015GameController
+from onagame2015.headless import HeadlessGame, load_bot
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, 'example_data', 'bots', 'botjoac', 'script.py')
+GAMES = 5
+
+
+def sandboxed_game(seed):
+    bots = [BotPlayer('bot1', SCRIPT, 1), BotPlayer('bot2', SCRIPT, 2)]
+    controller = Onagame2015GameController(bots, seed=seed)
+    for bot in bots:
+        controller.add_player(bot.username, bot.script)
+    controller.run()
+
+
+def headless_game(seed):
+    HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=seed).run()
+
+
+def main():
+    print '%10s %12s' % ('runner', 'games/sec')
+    for play in (sandboxed_game, headless_game):
+        start = default_timer()
+        for seed in range(GAMES):
+            play(seed)
+        print '%10s %12.2f' % (play.__name__.split('_')[0], GAMES / (default_timer() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Latency of jumping to a random turn of a replay, rebuilding the board
+from the closest keyframe, for different intervals between keyframes.
+
+    python -m benchmarks.bench_keyframes
+"""
+import json
+import random
+from timeit import default_timer
+
+from benchmarks.common import make_map
+from onagame2015.keyframes import board_at_turn
+from onagame2015.lib import GameStages
+from onagame2015.testing import record_game
+
+MAP_SIZE = 100
+UNITS_PER_PLAYER = 200
+TURNS = 200
+KEYFRAME_INTERVALS = (None, 50, 20, 10, 5, 1)
+SEEKS = 50
+
+
+def main():
+    random.seed(2015)
+    game_data = record_game(make_map(MAP_SIZE), TURNS, keyframe_interval=1, extra_units=UNITS_PER_PLAYER)
+    keyframes = game_data[GameStages.KEYFRAMES]
+    seeks = [random.randint(0, TURNS) for _ in range(SEEKS)]
+    print '%10s %12s %16s %16s' % ('interval', 'keyframes', 'trace (KB)', 'seek (ms)')
+    for interval in KEYFRAME_INTERVALS:
+        game = dict(game_data)
+        game[GameStages.KEYFRAMES] = [keyframe for keyframe in keyframes
+                                      if interval and keyframe['turn_number'] % interval == 0]
+        start = default_timer()
+        for turn_number in seeks:
+            board_at_turn(game, turn_number)
+        elapsed = (default_timer() - start) / SEEKS * 1000
+        print '%10s %12d %16.1f %16.2f' % (interval or '-', len(game[GameStages.KEYFRAMES]),
+                                           len(json.dumps(game)) / 1024.0, elapsed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Bot side cost of a turn with the lazy Map: parsing and finding the own
+units, against building every tile of the map as parse used to.
+
+    python -m benchmarks.bench_lazy_map
+
+Needs the basebot module of the sandbox, which onagame2015.gamebot imports.
+"""
+import json
+import random
+from timeit import default_timer
+
+from benchmarks.common import deploy, make_map
+from onagame2015.arena import ArenaGrid
+from onagame2015.gamebot import GameBot
+
+MAP_SIZES = (30, 100, 300)
+UNITS_PER_PLAYER = 50
+REPEAT = 10
+
+
+def every_tile(game_map):
+    return [unit for tile in game_map.values() for unit in tile.units]
+
+
+def own_units(game_map):
+    return list(game_map.iter_own_units())
+
+
+def main():
+    print '%10s %18s %18s' % ('map', 'all tiles (ms)', 'own units (ms)')
+    for size in MAP_SIZES:
+        random.seed(2015)
+        arena, bots = deploy(ArenaGrid, make_map(size), UNITS_PER_PLAYER)
+        feedback = json.loads(json.dumps({
+            'player_num': bots[0].p_num,
+            'map': arena.get_map_for_player(bots[0]),
+        }))
+        timings = []
+        for use_map in (every_tile, own_units):
+            start = default_timer()
+            for _ in range(REPEAT):
+                _, game_map = GameBot().parse(feedback)
+                use_map(game_map)
+            timings.append((default_timer() - start) / REPEAT * 1000)
+        print '%10s %18.2f %18.2f' % ('%dx%d' % (size, size), timings[0], timings[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Cost of loading a map at game start: parsing the Tiled JSON, reading the
+compiled map, and getting it from the cache of the process.
+
+    python -m benchmarks.bench_load_map
+"""
+import json
+import os
+import random
+import shutil
+import tempfile
+from timeit import default_timer
+
+from onagame2015 import maploader
+from onagame2015.maploader import clear_map_cache, load_map, parse_map
+
+MAP_SIZES = (30, 100, 300)
+REPEAT = 10
+
+
+def tiled_map(size):
+    """Tiled JSON for a map of <size> x <size> with some blocked tiles."""
+    def layer(name, density):
+        return {
+            'name': name,
+            'width': size,
+            'height': size,
+            'data': [int(random.random() < density) for _ in xrange(size * size)],
+        }
+    return {
+        'width': size,
+        'height': size,
+        'layers': [layer('Water Layer', 0.1), layer('Blocking Layer', 0.1), layer('HQ Layer', 0.01)],
+    }
+
+
+def timed(function):
+    start = default_timer()
+    for _ in range(REPEAT):
+        function()
+    return (default_timer() - start) / REPEAT * 1000
+
+
+def main():
+    random.seed(2015)
+    directory = tempfile.mkdtemp()
+    os.mkdir(os.path.join(directory, 'maps'))
+    maploader.CURRENT_DIR = directory
+    print '%10s %14s %14s %14s' % ('map', 'JSON (ms)', 'compiled (ms)', 'cached (ms)')
+    try:
+        for size in MAP_SIZES:
+            name = 'map_%d.json' % size
+            path = os.path.join(directory, 'maps', name)
+            with open(path, 'w') as fh:
+                json.dump(tiled_map(size), fh)
+
+            def from_json():
+                with open(path) as fh:
+                    parse_map(json.load(fh))
+
+            def from_compiled():
+                clear_map_cache()
+                load_map(name)
+
+            load_map(name)  # compile it
+            timings = timed(from_json), timed(from_compiled), timed(lambda: load_map(name))
+            print '%10s %14.2f %14.2f %14.4f' % (('%dx%d' % (size, size),) + timings)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""Cost of recording a metric in each sink, against the time a turn takes
+(a few hundred microseconds to milliseconds, see benchmarks.bench_games).
+
+    python -m benchmarks.bench_metrics
+"""
+import os
+import random
+import shutil
+import tempfile
+from timeit import default_timer
+
+from onagame2015.metrics import NULL_SINK, MemorySink, PrometheusFileSink, StatsdSink
+
+RECORDS = 100000
+
+
+def per_call(sink, values):
+    start = default_timer()
+    for value in values:
+        sink.increment('turns_total')
+        sink.observe('bot_response_seconds', value)
+    sink.flush()
+    return (default_timer() - start) / (2 * len(values)) * 1e6
+
+
+def main():
+    random.seed(2015)
+    values = [random.expovariate(20) for _ in xrange(RECORDS)]
+    directory = tempfile.mkdtemp()
+    try:
+        sinks = (
+            ('null', NULL_SINK),
+            ('memory', MemorySink()),
+            ('prometheus', PrometheusFileSink(os.path.join(directory, 'onagame2015.prom'))),
+            # nobody listening, the packets are sent anyway
+            ('statsd', StatsdSink(port=9)),
+        )
+        print '%-12s %14s' % ('sink', 'record (us)')
+        for name, sink in sinks:
+            print '%-12s %14.3f' % (name, per_call(sink, values))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
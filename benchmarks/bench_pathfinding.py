@@ -0,0 +1,44 @@
+"""Cost of a turn where every unit asks for its next step towards one of a
+few targets: a BFS per unit, as the example bots do with their A*, against
+the distance fields cached and shared by Pathfinder.
+
+    python -m benchmarks.bench_pathfinding
+"""
+import random
+from timeit import default_timer
+
+from onagame2015.pathfinding import DistanceField, Pathfinder
+
+MAP_SIZES = (30, 100, 200)
+UNITS = 50
+TARGETS = 5
+TURNS = 5
+
+
+def main():
+    random.seed(2015)
+    print '%10s %18s %18s' % ('map', 'per unit (ms)', 'cached (ms)')
+    for size in MAP_SIZES:
+        blocked = set((random.randrange(size), random.randrange(size)) for _ in range(size * size // 5))
+        targets = [(random.randrange(size), random.randrange(size)) for _ in range(TARGETS)]
+        units = [((random.randrange(size), random.randrange(size)), random.choice(targets))
+                 for _ in range(UNITS)]
+        pathfinder = Pathfinder(size, size, blocked)
+
+        start = default_timer()
+        for _ in range(TURNS):
+            for position, target in units:
+                DistanceField(size, size, blocked, target).next_step(position)
+        per_unit = (default_timer() - start) / TURNS
+
+        start = default_timer()
+        for _ in range(TURNS):
+            for position, target in units:
+                pathfinder.next_step(position, target)
+        cached = (default_timer() - start) / TURNS
+
+        print '%10s %18.2f %18.2f' % ('%dx%d' % (size, size), per_unit * 1000, cached * 1000)
+
+
+if __name__ == '__main__':
+    main()
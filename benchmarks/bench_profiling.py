@@ -0,0 +1,39 @@
+"""Overhead of profiling the turns of the controller: the time it takes per
+turn with profiling off (NULL_PROFILER), and on.
+
+    python -m benchmarks.bench_profiling
+
+Needs turnboxed (and its basebot), as the controller does.
+"""
+from benchmarks.bench_games import TimedGame, battle_map, percentile
+from benchmarks.bots import BOTS
+from benchmarks.common import temporary_map
+
+MAP_SIZE = 30
+UNITS_PER_PLAYER = (5, 50)
+SEEDS = range(5)
+
+
+def controller_times(map_name, units_per_player, profile):
+    turn_times = []
+    for seed in SEEDS:
+        game = TimedGame([BOTS['greedy'](seed), BOTS['walker'](seed)], seed=seed, map_name=map_name,
+                         units_per_player=units_per_player, profile=profile)
+        game.run()
+        turn_times.extend(game.turn_times)
+    return turn_times
+
+
+def main():
+    print '%8s %10s %12s %12s %12s' % ('units', 'profile', 'turns', 'mean (ms)', 'p50 (ms)')
+    with temporary_map(battle_map(MAP_SIZE)) as map_name:
+        for units in UNITS_PER_PLAYER:
+            for profile in (False, True):
+                turn_times = controller_times(map_name, units, profile)
+                print '%8d %10s %12d %12.3f %12.3f' % (
+                    units, profile, len(turn_times), sum(turn_times) / len(turn_times) * 1000,
+                    percentile(turn_times, 0.5) * 1000)
+
+
+if __name__ == '__main__':
+    main()
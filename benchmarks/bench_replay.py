@@ -0,0 +1,48 @@
+"""Size of a replay and cost of reading one turn of it: the JSON of
+GameStatus against the binary replay format.
+
+    python -m benchmarks.bench_replay
+"""
+import json
+import random
+from StringIO import StringIO
+from timeit import default_timer
+
+from benchmarks.common import make_map
+from onagame2015.lib import GameStages
+from onagame2015.replay import ReplayReader, write_replay
+from onagame2015.testing import record_game
+
+GAMES = ((30, 20, 200), (100, 200, 200))  # map size, units per player, turns
+REPEAT = 20
+
+
+def main():
+    print '%10s %7s %12s %12s %7s %16s %16s' % (
+        'map', 'units', 'JSON (KB)', 'replay (KB)', 'ratio', 'JSON turn (ms)', 'replay turn (ms)')
+    for size, units, turns in GAMES:
+        random.seed(2015)
+        game_data = record_game(make_map(size), turns, extra_units=units)
+        document = json.dumps(game_data)
+        stream = StringIO()
+        write_replay(game_data, stream)
+        replay = stream.getvalue()
+
+        turn_numbers = [random.randint(1, turns) for _ in range(REPEAT)]
+        start = default_timer()
+        for turn_number in turn_numbers:
+            [action for action in json.loads(document)[GameStages.TURNS]
+             if action['turn_number'] == turn_number]
+        json_time = (default_timer() - start) / REPEAT * 1000
+        start = default_timer()
+        for turn_number in turn_numbers:
+            ReplayReader(StringIO(replay)).read_turn(turn_number)
+        replay_time = (default_timer() - start) / REPEAT * 1000
+
+        print '%10s %7d %12.1f %12.1f %7.1f %16.2f %16.3f' % (
+            '%dx%d' % (size, size), units, len(document) / 1024.0, len(replay) / 1024.0,
+            len(document) / float(len(replay)), json_time, replay_time)
+
+
+if __name__ == '__main__':
+    main()
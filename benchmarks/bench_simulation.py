@@ -0,0 +1,50 @@
+"""Simulating whole engagements for many scenarios: a Python loop calling
+AttackAction._launch_attack until one side is left without units, against
+the NumPy simulator.
+
+    python -m benchmarks.bench_simulation
+"""
+import random
+from timeit import default_timer
+
+import numpy
+
+from onagame2015.actions import AttackAction
+from onagame2015.simulation import simulate_engagements
+
+SCENARIOS = (100, 1000, 10000)
+SAMPLES = 10
+MAX_UNITS = 30
+
+
+def scalar_engagements(attacker_units, defender_units, samples, rng):
+    action = AttackAction(None, rng=rng)
+    results = []
+    for attackers, defenders in zip(attacker_units, defender_units):
+        for _ in range(samples):
+            left = [attackers, defenders]
+            while left[0] and left[1]:
+                result = action._launch_attack(*left)
+                left[0] -= result['attacker_loses']
+                left[1] -= result['defender_loses']
+            results.append(left)
+    return results
+
+
+def main():
+    rng = numpy.random.RandomState(2015)
+    print '%10s %9s %14s %14s %9s' % ('scenarios', 'samples', 'scalar (ms)', 'numpy (ms)', 'speedup')
+    for scenarios in SCENARIOS:
+        attacker_units = rng.randint(1, MAX_UNITS, scenarios)
+        defender_units = rng.randint(1, MAX_UNITS, scenarios)
+        start = default_timer()
+        scalar_engagements(attacker_units.tolist(), defender_units.tolist(), SAMPLES, random.Random(2015))
+        scalar = (default_timer() - start) * 1000
+        start = default_timer()
+        simulate_engagements(attacker_units, defender_units, samples=SAMPLES, rng=rng)
+        vectorized = (default_timer() - start) * 1000
+        print '%10d %9d %14.1f %14.1f %9.1f' % (scenarios, SAMPLES, scalar, vectorized, scalar / vectorized)
+
+
+if __name__ == '__main__':
+    main()
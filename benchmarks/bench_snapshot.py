@@ -0,0 +1,53 @@
+"""Cost of saving and going back to the state of a game, for lookahead or to
+reset it: snapshot/restore of the arena and the bots against deep copying
+them.
+
+    python -m benchmarks.bench_snapshot
+"""
+import copy
+import random
+from timeit import default_timer
+
+from benchmarks.common import deploy, make_map, random_turn
+from onagame2015.arena import get_arena_class
+
+MAP_SIZE = 30
+UNITS_PER_PLAYER = (5, 50, 200)
+REPEAT = 200
+
+
+def per_call(function, repeat=REPEAT):
+    """@return: microseconds per call of <function>"""
+    start = default_timer()
+    for _ in range(repeat):
+        function()
+    return (default_timer() - start) / repeat * 1e6
+
+
+def main():
+    random.seed(2015)
+    print '%-8s %8s %16s %16s %16s' % ('backend', 'units', 'deepcopy (us)', 'snapshot (us)', 'restore (us)')
+    for backend in ('list', 'numpy'):
+        for units in UNITS_PER_PLAYER:
+            arena, bots = deploy(get_arena_class(backend), make_map(MAP_SIZE), units)
+            for _ in range(5):
+                random_turn(arena, *bots)
+                random_turn(arena, *bots[::-1])
+
+            def snapshot():
+                return arena.snapshot(), [bot.snapshot() for bot in bots]
+
+            saved = snapshot()
+
+            def restore():
+                arena.restore(saved[0])
+                for bot, bot_snapshot in zip(bots, saved[1]):
+                    bot.restore(bot_snapshot)
+
+            # the arena uses the random module, which can't be copied
+            deep_copy = per_call(lambda: copy.deepcopy((arena, bots), {id(random): random}), repeat=5)
+            print '%-8s %8d %16.1f %16.1f %16.1f' % (backend, units, deep_copy, per_call(snapshot), per_call(restore))
+
+
+if __name__ == '__main__':
+    main()
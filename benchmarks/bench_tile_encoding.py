@@ -0,0 +1,48 @@
+"""Payload size and bot side parse time per turn, for each map encoding.
+
+    python -m benchmarks.bench_tile_encoding
+
+Needs the basebot module of the sandbox, which onagame2015.gamebot imports.
+"""
+import json
+import random
+from timeit import default_timer
+
+from benchmarks.common import deploy, make_map, random_turn
+from onagame2015.arena import ArenaGrid
+from onagame2015.gamebot import GameBot
+from onagame2015.lib import MAP_ENCODINGS
+
+MAP_SIZES = (30, 100)
+UNITS_PER_PLAYER = 50
+TURNS = 10
+
+
+def main():
+    print '%10s %10s %16s %16s' % ('map', 'encoding', 'payload (KB)', 'parse (ms)')
+    for size in MAP_SIZES:
+        random.seed(2015)
+        arena, bots = deploy(ArenaGrid, make_map(size), UNITS_PER_PLAYER)
+        payload_bytes = dict.fromkeys(MAP_ENCODINGS, 0)
+        parse_time = dict.fromkeys(MAP_ENCODINGS, 0.0)
+        for _ in range(TURNS):
+            random_turn(arena, bots[0], bots[1])
+            for encoding in MAP_ENCODINGS:
+                payload = json.dumps({
+                    'player_num': bots[0].p_num,
+                    'map_encoding': encoding,
+                    'map': arena.get_map_for_player(bots[0], encoding),
+                })
+                payload_bytes[encoding] += len(payload)
+                feedback = json.loads(payload)
+                start = default_timer()
+                GameBot().parse(feedback)
+                parse_time[encoding] += default_timer() - start
+        for encoding in MAP_ENCODINGS:
+            print '%10s %10s %16.1f %16.2f' % (
+                '%dx%d' % (size, size), encoding,
+                payload_bytes[encoding] / 1024.0 / TURNS, parse_time[encoding] * 1000 / TURNS)
+
+
+if __name__ == '__main__':
+    main()
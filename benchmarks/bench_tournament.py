@@ -0,0 +1,32 @@
+"""Throughput of a round-robin tournament with a growing amount of worker
+processes, up to one per CPU.
+
+    python -m benchmarks.bench_tournament
+
+Needs turnboxed (and its basebot), as the controller does.
+"""
+import multiprocessing
+import os
+from timeit import default_timer
+
+from onagame2015.tournament import run_tournament, schedule
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, 'example_data', 'bots', 'botjoac', 'script.py')
+BOTS = {'bot{}'.format(n): SCRIPT for n in range(1, 4)}
+SEEDS = range(4)
+
+
+def main():
+    n_games = len(schedule(BOTS, SEEDS, ['map_draft.json']))
+    print '%10s %8s %12s %9s' % ('processes', 'games', 'games/sec', 'speedup')
+    baseline = None
+    for processes in range(1, multiprocessing.cpu_count() + 1):
+        start = default_timer()
+        run_tournament(BOTS, SEEDS, processes=processes)
+        games_per_second = n_games / (default_timer() - start)
+        baseline = baseline or games_per_second
+        print '%10d %8d %12.2f %9.2f' % (processes, n_games, games_per_second, games_per_second / baseline)
+
+
+if __name__ == '__main__':
+    main()
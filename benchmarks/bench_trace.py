@@ -0,0 +1,84 @@
+"""Memory and time of recording the trace of a long game, kept in memory and
+dumped at the end, against streamed to a file as newline-delimited JSON.
+
+    python -m benchmarks.bench_trace
+"""
+import os
+import resource
+import tempfile
+from timeit import default_timer
+
+from benchmarks.common import current_rss
+from onagame2015.lib import GameStages
+from onagame2015.status import GameStatus
+
+ACTIONS = (10000, 100000, 500000)
+
+
+def action(turn):
+    return {
+        'action': 'MOVE_UNITS',
+        'player': turn % 2 + 1,
+        'from': {'tile': {'x': turn % 30, 'y': turn % 29}},
+        'to': {'tile': {'x': turn % 31, 'y': turn % 28}, 'units': 3},
+        'turn_number': turn,
+    }
+
+
+def record(game_status, n_actions):
+    game_status.add_game_stage(GameStages.INITIAL, {'map_source': 'map_draft.json', 'players': []})
+    for turn in xrange(n_actions):
+        game_status.update_turns(action(turn))
+    game_status.add_game_stage(GameStages.FINAL, {'action': 'GAMEOVER', 'rounds': n_actions})
+
+
+def in_memory(n_actions, path):
+    game_status = GameStatus()
+    record(game_status, n_actions)
+    with open(path, 'w') as fh:
+        fh.write(game_status.json)
+
+
+def streamed(n_actions, path):
+    with open(path, 'w') as fh:
+        record(GameStatus(stream=fh), n_actions)
+
+
+def measure(mode, n_actions, path):
+    """Run <mode> in a child process, so the memory freed by the previous
+    runs doesn't hide what it takes.
+    @return: time (ms), peak memory (MB)
+    """
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if not pid:
+        os.close(read_end)
+        rss = current_rss()
+        start = default_timer()
+        mode(n_actions, path)
+        elapsed = (default_timer() - start) * 1000
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 - rss
+        os.write(write_end, '%f %f' % (elapsed, peak / 1024.0 ** 2))
+        os._exit(0)
+    os.close(write_end)
+    result = os.read(read_end, 100)
+    os.close(read_end)
+    os.waitpid(pid, 0)
+    return map(float, result.split())
+
+
+def main():
+    print '%10s %10s %12s %14s' % ('actions', 'mode', 'time (ms)', 'memory (MB)')
+    handle, path = tempfile.mkstemp()
+    os.close(handle)
+    try:
+        for n_actions in ACTIONS:
+            for mode in (in_memory, streamed):
+                elapsed, memory = measure(mode, n_actions, path)
+                print '%10d %10s %12.1f %14.1f' % (n_actions, mode.__name__, elapsed, memory)
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
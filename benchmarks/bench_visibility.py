@@ -0,0 +1,37 @@
+"""Time to build the map of a player each turn, with the visible tiles
+tracked as units move against calculating them from scratch.
+
+    python -m benchmarks.bench_visibility
+"""
+import random
+from timeit import default_timer
+
+from benchmarks.common import deploy, make_map, random_turn
+from onagame2015.arena import ArenaGrid
+
+MAP_SIZE = 100
+ARMY_SIZES = (5, 50, 500)
+TURNS = 10
+
+
+def main():
+    print '%8s %16s %16s' % ('units', 'reference (ms)', 'tracked (ms)')
+    for army_size in ARMY_SIZES:
+        random.seed(2015)
+        arena, bots = deploy(ArenaGrid, make_map(MAP_SIZE), army_size)
+        timings = {arena.reference_map_for_player: 0.0, arena.get_map_for_player: 0.0}
+        for _ in range(TURNS):
+            for bot, opponent in (bots, bots[::-1]):
+                random_turn(arena, bot, opponent)
+                for get_map in timings:
+                    start = default_timer()
+                    get_map(bot)
+                    timings[get_map] += default_timer() - start
+        print '%8d %16.2f %16.2f' % (
+            army_size,
+            timings[arena.reference_map_for_player] / TURNS / 2 * 1000,
+            timings[arena.get_map_for_player] / TURNS / 2 * 1000)
+
+
+if __name__ == '__main__':
+    main()
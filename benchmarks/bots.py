@@ -0,0 +1,119 @@
+"""Synthetic bots for the end-to-end benchmarks, written against GameBot as
+the bots of the players are. Each one plays with its own random generator,
+so the games can be repeated from their seeds:
+
+- RandomWalker moves every unit in a random direction.
+- GreedyAttacker attacks the enemies next to its units, and moves the rest
+  towards the closest enemies in sight.
+- HQRusher sends every unit to the enemy HQ (to where it should be, until it
+  is in sight), attacking what it finds on the way.
+
+Needs basebot, as GameBot does.
+"""
+import random
+
+from onagame2015.gamebot import GameBot, InvalidActionException, PointInMap
+from onagame2015.pathfinding import MOVEMENTS
+
+DIRECTIONS = [PointInMap(*movement) for movement in MOVEMENTS]
+
+
+class SyntheticBot(GameBot):
+
+    def __init__(self, seed=None):
+        super(SyntheticBot, self).__init__()
+        self.random = random.Random(seed)
+
+    def play(self, player_id, game_map):
+        for unit in game_map.iter_own_units():
+            self.play_unit(unit)
+
+    def play_unit(self, unit):
+        """Move <unit> in a random direction, unless a subclass knows
+        better."""
+        self.walk(unit)
+
+    def try_move(self, unit, direction):
+        """Move <unit> in <direction> if it is valid. @return: <bool>"""
+        try:
+            self.move(unit, direction)
+        except InvalidActionException:
+            return False
+        return True
+
+    def try_attack(self, unit, direction):
+        """Attack from the tile of <unit> in <direction> if there are enemies.
+        @return: <bool>"""
+        try:
+            self.attack(unit, direction)
+        except InvalidActionException:
+            return False
+        return True
+
+    def walk(self, unit):
+        directions = list(DIRECTIONS)
+        self.random.shuffle(directions)
+        for direction in directions:
+            if self.try_move(unit, direction):
+                return
+
+    def step_towards(self, unit, target):
+        """Move <unit> a step towards <target>, attacking instead if there
+        are enemies in the way, or wander if it can't get there."""
+        direction = self.path_step(unit, target)
+        if direction is None:
+            self.walk(unit)
+        elif not self.try_attack(unit, direction):
+            self.try_move(unit, direction)
+
+
+class RandomWalker(SyntheticBot):
+    """Plays every unit as SyntheticBot does by default: at random."""
+
+
+class GreedyAttacker(SyntheticBot):
+
+    def play(self, player_id, game_map):
+        self._enemies = [PointInMap(x, y) for x, y, _ in game_map.iter_enemy_tiles()]
+        self._attacked = set()
+        super(GreedyAttacker, self).play(player_id, game_map)
+
+    def play_unit(self, unit):
+        # one attack from each tile, and the rest of its units go on
+        if unit.as_tuple() not in self._attacked:
+            for direction in DIRECTIONS:
+                if self.try_attack(unit, direction):
+                    self._attacked.add(unit.as_tuple())
+                    return
+        if self._enemies:
+            closest = min(self._enemies, key=lambda enemy: max(abs(enemy.x - unit.x), abs(enemy.y - unit.y)))
+            self.step_towards(unit, closest)
+        else:
+            self.walk(unit)
+
+
+class HQRusher(SyntheticBot):
+
+    _target = None
+
+    def play(self, player_id, game_map):
+        for x, y, own in game_map.iter_hqs():
+            if not own:
+                self._target = PointInMap(x, y)
+            elif self._target is None:
+                # maps are usually symmetric
+                self._target = PointInMap(game_map.width - 1 - x, game_map.height - 1 - y)
+        super(HQRusher, self).play(player_id, game_map)
+
+    def play_unit(self, unit):
+        if self._target is None:
+            self.walk(unit)
+        else:
+            self.step_towards(unit, self._target)
+
+
+BOTS = {
+    'walker': RandomWalker,
+    'greedy': GreedyAttacker,
+    'rusher': HQRusher,
+}
@@ -0,0 +1,116 @@
+"""Helpers shared by the benchmarks."""
+import json
+import os
+import platform
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from onagame2015 import maploader
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import AVAILABLE_MOVEMENTS, Coordinate
+from onagame2015.maploader import GameMap
+from onagame2015.status import GameStatus
+from onagame2015.validations import coord_in_arena
+
+
+def make_map(size):
+    """An empty <size>x<size> map, with headquarters in two opposite corners."""
+    game_map = GameMap.create_empty_map(width=size + 1, height=size + 1)
+    game_map.eligible_hqs = set((Coordinate(2, 2), Coordinate(size - 3, size - 3)))
+    return game_map
+
+
+@contextmanager
+def temporary_map(tiled_map, name='map.json'):
+    """Make load_map(<name>) load <tiled_map> (a Tiled JSON document), from
+    a temporary directory, in this block."""
+    directory = tempfile.mkdtemp()
+    os.mkdir(os.path.join(directory, 'maps'))
+    current_dir, maploader.CURRENT_DIR = maploader.CURRENT_DIR, directory
+    try:
+        with open(os.path.join(directory, 'maps', name), 'w') as fh:
+            json.dump(tiled_map, fh)
+        yield name
+    finally:
+        maploader.CURRENT_DIR = current_dir
+        maploader.clear_map_cache()
+        shutil.rmtree(directory)
+
+
+def deploy(arena_class, game_map, units_per_player=0):
+    """Build an arena and deploy two bots in it, with <units_per_player>
+    additional units each.
+    @return: arena, [bot1, bot2]
+    """
+    arena = arena_class(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    for bot in bots:
+        arena.add_units_to_player(bot, units_per_player)
+    return arena, bots
+
+
+def random_turn(arena, bot, opponent):
+    """Move every unit of <bot> in a random direction, and attack at random
+    from its new position."""
+    for unit in list(bot.units):
+        direction = random.choice(AVAILABLE_MOVEMENTS)
+        if coord_in_arena(unit.coordinate + direction, arena):
+            MoveAction(bot).execute(arena, {'unit_id': str(unit.id), 'direction': direction}, opponent)
+        target = unit.coordinate + random.choice(AVAILABLE_MOVEMENTS)
+        if coord_in_arena(target, arena):
+            AttackAction(bot).execute(arena, {'from': unit.coordinate, 'to': target}, opponent)
+
+
+def write_results(path, benchmark, results):
+    """Write <results> (<list> of <dict>, each with the parameters and the
+    measures of a case) to <path> as JSON, with where they were taken."""
+    document = {
+        'benchmark': benchmark,
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+    with open(path, 'w') as fh:
+        json.dump(document, fh, indent=1, sort_keys=True)
+
+
+def compare_results(results, baseline_path, measures, tolerance):
+    """Compare <results> with the ones written to <baseline_path>, for the
+    cases with the same parameters.
+    :measures: <dict> of name -> 1 if higher is better, -1 if lower is
+    :tolerance: fraction a measure can get worse before it is a regression
+    @return: <list> of (case, measure, baseline value, value), for the
+    regressions
+    """
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)['results']
+
+    def key(result):
+        return tuple(sorted((name, value) for name, value in result.iteritems() if name not in measures))
+
+    baseline = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = baseline.get(key(result))
+        if old is None:
+            continue
+        for measure, direction in measures.iteritems():
+            if measure not in result or not old.get(measure):
+                continue
+            change = (result[measure] - old[measure]) / float(old[measure]) * direction
+            if change < -tolerance:
+                regressions.append((dict(key(result)), measure, old[measure], result[measure]))
+    return regressions
+
+
+def current_rss():
+    """Resident memory of this process, in bytes (Linux only)."""
+    import resource
+    with open('/proc/self/statm') as fh:
+        return int(fh.read().split()[1]) * resource.getpagesize()
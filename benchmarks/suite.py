@@ -0,0 +1,241 @@
+"""Timings of the hot paths of the engine, for maps from 30x30 to 500x500
+and armies from 5 to 5000 units per player, at fixed seeds, written as JSON
+to catch regressions before deploying a new version of the engine:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --output new.json --baseline bench.json
+
+(or make bench). With a baseline, the cases more than --tolerance slower
+than in it are listed, and the exit status is 1. --quick runs only the
+smaller maps and armies.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+from itertools import count
+from timeit import default_timer
+
+from benchmarks.bench_attack import stack_units
+from benchmarks.bench_load_map import tiled_map
+from benchmarks.common import (
+    compare_results,
+    deploy,
+    make_map,
+    random_turn,
+    temporary_map,
+    write_results,
+)
+from onagame2015 import maploader
+from onagame2015.actions import AttackAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.lib import AVAILABLE_MOVEMENTS, Coordinate
+from onagame2015.status import GameStatus
+from onagame2015.testing import traced_turn
+
+SEED = 2015
+MAP_SIZES = (30, 100, 250, 500)
+ARMY_SIZES = (5, 50, 500, 5000)
+QUICK_MAP_SIZES = (30, 100)
+QUICK_ARMY_SIZES = (5, 50)
+LOAD_MAPS = 3
+LOOKUPS = 2000
+MOVES = 1000
+ATTACKS = 200
+JSON_DUMPS = 3
+TRACE_TURNS = 5
+# each case is timed this many times, keeping the fastest, as timeit does
+REPEAT = 5
+
+# Each case takes the arena and the bots, does its setup and returns the
+# function to time: it runs the timed calls, and returns the seconds they
+# took and how many they were.
+
+
+def case_get_map_for_player(arena, bots):
+    """The map of a player, after one of its turns."""
+    def timed():
+        random_turn(arena, *bots)
+        start = default_timer()
+        arena.get_map_for_player(bots[0])
+        return default_timer() - start, 1
+    return timed
+
+
+def case_get_unit(arena, bots):
+    unit_ids = [str(unit.id) for unit in bots[0].units]
+    unit_ids = (unit_ids * (LOOKUPS // len(unit_ids) + 1))[:LOOKUPS]
+
+    def timed():
+        start = default_timer()
+        for unit_id in unit_ids:
+            arena.get_unit(unit_id)
+        return default_timer() - start, len(unit_ids)
+    return timed
+
+
+def case_move(arena, bots):
+    """AttackUnit.move of random units, in random directions."""
+    def timed():
+        moves = [(random.choice(bots[0].units), random.choice(AVAILABLE_MOVEMENTS)) for _ in range(MOVES)]
+        start = default_timer()
+        for unit, direction in moves:
+            unit.move(direction)
+        return default_timer() - start, MOVES
+    return timed
+
+
+def _free_tiles(arena):
+    """Two contiguous empty tiles, far from the armies."""
+    for latitude in range(arena.width - 1):
+        attacker, defender = Coordinate(latitude, arena.height - 1), Coordinate(latitude + 1, arena.height - 1)
+        if arena.is_free_tile(attacker) and arena.is_free_tile(defender):
+            return attacker, defender
+    raise RuntimeError("No room for the attack")
+
+
+def case_attack(arena, bots):
+    """AttackAction.execute between two stacks of the size of the armies."""
+    attacker, defender = bots
+    attacker_coord, defender_coord = _free_tiles(arena)
+    army_size = len(attacker.units)
+    action = {'action_type': 'ATTACK', 'from': attacker_coord, 'to': defender_coord}
+
+    def timed():
+        elapsed = 0.0
+        for _ in range(ATTACKS):
+            for bot, coordinate in ((attacker, attacker_coord), (defender, defender_coord)):
+                stack_units(arena, bot, coordinate, army_size - arena.number_of_units_in_tile(coordinate))
+            start = default_timer()
+            AttackAction(attacker).execute(arena, action, defender)
+            elapsed += default_timer() - start
+        return elapsed, ATTACKS
+    return timed
+
+
+def case_end_turn_status(arena, bots):
+    """GameTurn.end_turn_status of a turn where every unit moves and attacks."""
+    turn_numbers = iter(count())
+
+    def timed():
+        game_turn = traced_turn(arena, bots[0], bots[1], next(turn_numbers))
+        start = default_timer()
+        game_turn.end_turn_status()
+        return default_timer() - start, 1
+    return timed
+
+
+def case_game_status_json(arena, bots):
+    """GameStatus.json with the trace of TRACE_TURNS rounds."""
+    game_status = GameStatus()
+    for turn_number in range(TRACE_TURNS):
+        for bot, opponent in (bots, bots[::-1]):
+            for new_status in traced_turn(arena, bot, opponent, turn_number).end_turn_status():
+                game_status.update_turns(new_status)
+
+    def timed():
+        start = default_timer()
+        for _ in range(JSON_DUMPS):
+            game_status.json
+        return default_timer() - start, JSON_DUMPS
+    return timed
+
+
+ARENA_CASES = (
+    ('get_map_for_player', case_get_map_for_player),
+    ('get_unit', case_get_unit),
+    ('AttackUnit.move', case_move),
+    ('AttackAction.execute', case_attack),
+    ('GameTurn.end_turn_status', case_end_turn_status),
+    ('GameStatus.json', case_game_status_json),
+)
+
+
+def time_load_map():
+    """load_map at game start: from the compiled map, not cached yet."""
+    elapsed = 0.0
+    for _ in range(LOAD_MAPS):
+        maploader.clear_map_cache()
+        start = default_timer()
+        maploader.load_map('map.json')
+        elapsed += default_timer() - start
+    return elapsed, LOAD_MAPS
+
+
+def time_parse_map():
+    """The same map parsed from its Tiled JSON, as without a compiled map."""
+    path = os.path.join(maploader.CURRENT_DIR, 'maps', 'map.json')
+    elapsed = 0.0
+    for _ in range(LOAD_MAPS):
+        start = default_timer()
+        with open(path) as fh:
+            maploader.parse_map(json.load(fh))
+        elapsed += default_timer() - start
+    return elapsed, LOAD_MAPS
+
+
+def run(map_sizes, army_sizes, report):
+    """Time every case, calling <report>(result) as each one finishes.
+    @return: <list> of results, as <dict> with the case, map size, army
+    size, seconds per call (the best of REPEAT runs) and amount of calls
+    timed in each run
+    """
+    results = []
+
+    def add(case, map_size, army_size, timed):
+        timings = []
+        for _ in range(REPEAT):
+            elapsed, calls = timed()
+            timings.append(elapsed / calls)
+        result = {'case': case, 'map_size': map_size, 'army_size': army_size,
+                  'seconds': min(timings), 'calls': calls}
+        results.append(result)
+        report(result)
+
+    for map_size in map_sizes:
+        with temporary_map(tiled_map(map_size)):
+            maploader.load_map('map.json')  # compile it
+            add('load_map', map_size, None, time_load_map)
+            add('load_map_json', map_size, None, time_parse_map)
+        for army_size in army_sizes:
+            random.seed(SEED)
+            arena, bots = deploy(ArenaGrid, make_map(map_size), army_size)
+            random_turn(arena, *bots)
+            for case, setup in ARENA_CASES:
+                random.seed(SEED)
+                add(case, map_size, army_size, setup(arena, bots))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--output', default='bench.json', help="JSON file to write the results to")
+    parser.add_argument('--baseline', help="JSON file with results to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="fraction a case can get slower before it is a regression")
+    parser.add_argument('--quick', action='store_true', help="only the smaller maps and armies")
+    args = parser.parse_args(argv)
+
+    def report(result):
+        print '%-26s %8d %8s %14.2f' % (result['case'], result['map_size'], result['army_size'] or '-',
+                                         result['seconds'] * 1e6)
+        sys.stdout.flush()
+
+    print '%-26s %8s %8s %14s' % ('case', 'map', 'units', 'per call (us)')
+    if args.quick:
+        results = run(QUICK_MAP_SIZES, QUICK_ARMY_SIZES, report)
+    else:
+        results = run(MAP_SIZES, ARMY_SIZES, report)
+    write_results(args.output, 'suite', results)
+    if args.baseline:
+        regressions = compare_results(results, args.baseline, {'seconds': -1}, args.tolerance)
+        for case, _, old, new in regressions:
+            print 'REGRESSION %(case)s map %(map_size)s units %(army_size)s:' % case,
+            print '%.2f us -> %.2f us' % (old * 1e6, new * 1e6)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
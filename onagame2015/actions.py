@@ -1,24 +1,19 @@
 import random
+from onagame2015.dice import dice_for_units, outcome_table
 from onagame2015.validations import (
     coord_in_arena,
     arg_is_valid_tuple,
 )
-from onagame2015.lib import (
-    Coordinate,
-    MAX_AMOUNT_OF_DICES_PER_PLAYER,
-)
-
-
-def toss_dice(number_of_dice):
-    for _ in range(number_of_dice):
-        yield random.randint(1, 6)
+from onagame2015.lib import Coordinate
 
 
 class BaseBotAction(object):
     ACTION_NAME = ''
 
-    def __init__(self, bot):
+    def __init__(self, bot, rng=random):
         self.calling_bot = bot
+        # random.Random of the game, so it can be reproduced from its seed
+        self.rng = rng
         self.result = ''
 
     def action_result(self):
@@ -122,23 +117,15 @@ class AttackAction(BaseBotAction):
             'defender_dice': [y0, y1,....],
         }
         """
-        attacker_n_dice = min(MAX_AMOUNT_OF_DICES_PER_PLAYER, attacker_units_amount)
-        defender_n_dice = min(MAX_AMOUNT_OF_DICES_PER_PLAYER, defender_units_amount)
-        play = lambda n_dice: sorted(toss_dice(n_dice), reverse=True)
-        attacker_dice = play(attacker_n_dice)
-        defender_dice = play(defender_n_dice)
-        partial_result = {
-            'attacker_loses': 0,
-            'defender_loses': 0,
+        attacker_dice, defender_dice, attacker_loses, defender_loses = outcome_table(
+            dice_for_units(attacker_units_amount), dice_for_units(defender_units_amount),
+        ).sample(self.rng)
+        return {
+            'attacker_loses': attacker_loses,
+            'defender_loses': defender_loses,
             'attacker_dice': attacker_dice,
             'defender_dice': defender_dice,
         }
-        for attacker, defender in zip(attacker_dice, defender_dice):
-            if attacker <= defender:
-                partial_result['attacker_loses'] += 1
-            else:
-                partial_result['defender_loses'] += 1
-        return partial_result
 
     def _run_attack_validations(self, arena, tile_from, tile_to):
         """Run a series of validations to assess if is possible to perform an
@@ -148,6 +135,7 @@ class AttackAction(BaseBotAction):
             arena=arena)
         self._contiguous_tiles(source_coord=tile_from, target_coord=tile_to)
         self._oposite_bands(arena=arena, attacker_coord=tile_from, defender_coord=tile_to)
+        self._own_tile(arena=arena, attacker_coord=tile_from)
 
     def _tiles_in_arena(self, tiles, arena):
         if not all(coord_in_arena(t, arena) for t in tiles):
@@ -163,16 +151,18 @@ class AttackAction(BaseBotAction):
 
     def _oposite_bands(self, arena, attacker_coord, defender_coord):
         """Validate that both tiles have units of different teams."""
-        attacker_tile = arena.get_tile_content(attacker_coord)
-        defender_tile = arena.get_tile_content(defender_coord)
-        try:
-            team_1 = next(unit.player_id for unit in attacker_tile.items)
-            team_2 = next(unit.player_id for unit in defender_tile.items)
-            assert team_1 != team_2, "Friendly fire!"
-        except AssertionError as e:
-            raise RuntimeError(str(e))
-        except StopIteration:
+        team_1 = arena.whos_in_tile(attacker_coord)
+        team_2 = arena.whos_in_tile(defender_coord)
+        if team_1 is None or team_2 is None:
             raise RuntimeError("One of the tiles is empty")
+        if team_1 == team_2:
+            raise RuntimeError("Friendly fire!")
+
+    def _own_tile(self, arena, attacker_coord):
+        """Validate that the attack is from a tile of the calling bot, whose
+        units are the ones to lose."""
+        if arena.whos_in_tile(attacker_coord) != self.calling_bot.p_num:
+            raise RuntimeError("Not an own tile")
 
 
 class MoveAction(BaseBotAction):
@@ -194,5 +184,9 @@ class MoveAction(BaseBotAction):
         if unit:
             action_result.update(unit.move(action['direction']))
             action_result['remain_in_source'] = arena.number_of_units_in_tile(action_result['from'])
-            action_result['player'] = arena.whos_in_tile(action_result['to'])
+            if coord_in_arena(action_result['to'], arena):
+                action_result['player'] = arena.whos_in_tile(action_result['to'])
+            else:
+                # the move failed, the unit tried to leave the arena
+                action_result['player'] = unit.player_id
             return action_result
@@ -1,13 +1,14 @@
+import copy
 import pprint
 import random
 import itertools
 
+from onagame2015.fog import VisibilityTracker
 from onagame2015.units import AttackUnit, HeadQuarter
 from onagame2015.validations import coord_in_arena
 from onagame2015.lib import (
     GameBaseObject,
     Coordinate,
-    FOG_CONSTANT,
     STARTS_WITH_N_UNITS,
     VISIBILITY_DISTANCE,
     farthest_from_point,
@@ -15,6 +16,11 @@ from onagame2015.lib import (
     UNIT_TYPE_ATTACK,
     UNIT_TYPE_HQ,
     AVAILABLE_MOVEMENTS,
+    FOG_VALUES,
+    TILE_ENEMY_HQ,
+    TILE_OWN_HQ,
+    TILE_REACHABLE,
+    TILE_VISIBLE,
 )
 
 
@@ -33,18 +39,69 @@ def get_unit_visibility(unit):
     return tiles_in_view
 
 
+ARENA_BACKENDS = ('list', 'numpy')
+
+
+def copy_tile(tile):
+    """Copy of a rendered <tile>: the compact encoding makes lists of the
+    occupied ones."""
+    return tile[:] if isinstance(tile, list) else tile
+
+
+def copy_map(arena_map):
+    """Copy of <arena_map> that can be modified without changing the maps
+    the arena keeps."""
+    return [[copy_tile(tile) for tile in row] for row in arena_map]
+
+
+def get_arena_class(backend):
+    """Return the ArenaGrid implementation for the <backend> name.
+    The numpy one is imported on demand, so numpy stays optional.
+    """
+    if backend == 'list':
+        return ArenaGrid
+    elif backend == 'numpy':
+        from onagame2015.arena_numpy import NumpyArenaGrid
+        return NumpyArenaGrid
+    raise ValueError("Unknown arena backend {!r}, use one of {}".format(backend, ARENA_BACKENDS))
+
+
 class TileContainer(GameBaseObject):
 
     def __init__(self, arena, reachable):
         self.arena = arena
         self.reachable = reachable
         self._items = []
+        # Counters kept in sync with self._items, so the queries done on
+        # every MOVE and ATTACK don't have to walk the items list.
+        self._attack_units = 0
+        self._hq_owner = None
+        self._items_per_player = {}
 
     def add_item(self, item):
         self._items.append(item)
+        self._count_item(item, 1)
 
     def remove_item(self, item):
-        self._items = [i for i in self._items if i.id != item.id]
+        try:
+            self._items.remove(item)
+        except ValueError:
+            return
+        self._count_item(item, -1)
+
+    def _count_item(self, item, delta):
+        if item.type == UNIT_TYPE_ATTACK:
+            self._attack_units += delta
+        elif item.type == UNIT_TYPE_HQ:
+            self._hq_owner = item.player_id if delta > 0 else None
+        self._items_per_player[item.player_id] = self._items_per_player.get(item.player_id, 0) + delta
+
+    def clear(self):
+        """Remove every item from this tile."""
+        self._items = []
+        self._attack_units = 0
+        self._hq_owner = None
+        self._items_per_player = {}
 
     def pop_one_unit(self):
         """Remove one unit from this tile.
@@ -53,32 +110,57 @@ class TileContainer(GameBaseObject):
            condition: remove one unit
            post-condition: len(self._items) == n - 1
         """
-        if not self._items:
+        if not self._attack_units:
             return
-        random_unit = self._get_random_unit()
-        if not random_unit:
-            return
-        self._items.remove(random_unit)
+        index = self._get_random_unit_index()
+        random_unit = self._items.pop(index)
+        self._count_item(random_unit, -1)
         return random_unit
 
-    def _get_random_unit(self):
+    def _get_random_unit_index(self):
         """
-        Get the first unit from the items list that belongs to the Attack Type
-        :return: AttackUnit
+        Get the position of the first unit from the items list that belongs
+        to the Attack Type
+        :return: int
         """
-        for unit in self._items:
+        for index, unit in enumerate(self._items):
             if unit.type == UNIT_TYPE_ATTACK:
-                return unit
-        return None
+                return index
 
     @property
     def items(self):
         return self._items
 
+    @property
+    def attack_units(self):
+        """Amount of attack units in the tile"""
+        return self._attack_units
+
+    @property
+    def owner(self):
+        """player_id of the first item in the tile, or None if it is empty"""
+        return self._items[0].player_id if self._items else None
+
+    @property
+    def units_owner(self):
+        """player_id of the attack units in the tile, or None if it has none"""
+        for unit in self._items:
+            if unit.type == UNIT_TYPE_ATTACK:
+                return unit.player_id
+
+    @property
+    def hq_owner(self):
+        """player_id of the HeadQuarter in the tile, or None"""
+        return self._hq_owner
+
+    def items_of(self, player_id):
+        """Amount of items in the tile that belong to <player_id>"""
+        return self._items_per_player.get(player_id, 0)
+
     @property
     def empty(self):
         """Returns true if not units present"""
-        return all(item.type != UNIT_TYPE_ATTACK for item in self.items)
+        return not self._attack_units
 
     def __repr__(self):
         if not self.reachable:
@@ -86,20 +168,46 @@ class TileContainer(GameBaseObject):
         return ','.join([str(i) for i in self._items])
 
     def hq_for(self, player_id):
-        return any(
-            (i.type == UNIT_TYPE_HQ and i.player_id == player_id for i in self.items)
-        )
+        return self._hq_owner is not None and self._hq_owner == player_id
+
+    def compact(self, player_id):
+        """The tile as seen by <player_id>, in the 'compact' map encoding."""
+        if not self.reachable:
+            return TILE_VISIBLE
+        flags = TILE_VISIBLE | TILE_REACHABLE
+        if self._hq_owner is not None:
+            flags |= TILE_OWN_HQ if self._hq_owner == player_id else TILE_ENEMY_HQ
+        if not self._attack_units:
+            return flags
+        owner = self.units_owner
+        own_units = []
+        if owner == player_id:
+            own_units = [unit.id for unit in self._items if unit.type == UNIT_TYPE_ATTACK]
+        return [flags, owner, self._attack_units, own_units]
 
 
 class ArenaGrid(GameBaseObject):
     """
     The grid that represents the arena over which the players are playing.
     """
-    def __init__(self, game_map, game_status):
+    def __init__(self, game_map, game_status, rng=random):
         self._game_status = game_status
+        # random.Random of the game, so it can be reproduced from its seed
+        self.rng = rng
         self.width = game_map.width
         self.height = game_map.height
         self.eligible_hqs = game_map.eligible_hqs
+        # unit id (as str, the way bots send it) -> (unit, tile it is on)
+        self._units_index = {}
+        self._unit_ids = itertools.count(1)
+        self._visibility = VisibilityTracker(self.width, self.height)
+        # (player_id, encoding) -> version of the map last sent, and the map
+        # as last sent by get_map_update_for_player
+        self._map_versions = {}
+        self._sent_maps = {}
+        # (player_id, encoding) -> (longitude, latitude) of the tiles rendered
+        # again since the last map update, that may differ from the map sent
+        self._unsent = {}
         self._matrix = [
             [TileContainer(self, reachable) for reachable in row] for row in game_map.iterrows()
         ]
@@ -125,16 +233,74 @@ class ArenaGrid(GameBaseObject):
 
         return visible_tiles
 
-    def get_map_for_player(self, bot):
+    def get_map_for_player(self, bot, encoding='string'):
+        """Map of the arena as seen by <bot>: the tiles in sight of its HQ or
+        units rendered in <encoding>, the rest covered with fog.
+        It is a copy, for the caller to keep or modify.
+        """
+        return copy_map(self._refresh_view(bot, encoding))
+
+    def _refresh_view(self, bot, encoding):
+        """Bring the map <bot> sees in <encoding> up to date, remembering
+        the tiles rendered again for the next map update.
+        @return: the view of the VisibilityTracker
+        """
+        changed = self._visibility.refresh(bot.p_num, self._tile_renderer(bot, encoding), encoding)
+        unsent = self._unsent.get((bot.p_num, encoding))
+        if unsent is not None:
+            unsent.update(changed)
+        return self._visibility.view(bot.p_num, encoding)
+
+    def get_map_update_for_player(self, bot, encoding='string'):
+        """Like get_map_for_player, but after the first call only return
+        the tiles that changed since the last update sent to <bot>.
+        @return: <dict>, the first time
+        {'map': <arena_map>, 'map_version': 1}
+        and then
+        {'map_delta': [[x, y, <tile>], ...], 'map_version': <n>}
+        """
+        key = bot.p_num, encoding
+        version = self._map_versions[key] = self._map_versions.get(key, 0) + 1
+        view = self._refresh_view(bot, encoding)
+        sent = self._sent_maps.get(key)
+        if sent is None:
+            self._sent_maps[key] = [row[:] for row in view]
+            self._unsent[key] = set()
+            return {'map': copy_map(view), 'map_version': version}
+        delta = []
+        for longitude, latitude in sorted(self._unsent[key]):
+            tile = view[longitude][latitude]
+            if sent[longitude][latitude] != tile:
+                sent[longitude][latitude] = tile
+                delta.append([latitude, longitude, copy_tile(tile)])
+        self._unsent[key].clear()
+        return {'map_delta': delta, 'map_version': version}
+
+    def _tile_renderer(self, bot, encoding):
+        """@return: a function that renders the tile in a coordinate, as
+        <bot> has to see it in <encoding>."""
+        if encoding == 'compact':
+            return lambda coordinate: self.get_tile_content(coordinate).compact(bot.p_num)
+        return lambda coordinate: str(self.get_tile_content(coordinate))
+
+    def reference_map_for_player(self, bot, encoding='string'):
+        """Same as get_map_for_player, calculating the visible tiles from
+        scratch instead of using the ones tracked as units move."""
         visible_tiles = self.calculate_visible_tiles_for_player(bot)
+        render = self._tile_renderer(bot, encoding)
 
-        map_copy = [[FOG_CONSTANT for __ in range(self.width)] for _ in range(self.height)]
+        fog = FOG_VALUES[encoding]
+        map_copy = [[fog for __ in range(self.width)] for _ in range(self.height)]
 
         for coordinate in visible_tiles:
-            map_copy[coordinate.longitude][coordinate.latitude] = str(self.get_tile_content(coordinate))
+            map_copy[coordinate.longitude][coordinate.latitude] = render(coordinate)
 
         return map_copy
 
+    def new_unit_id(self):
+        """A small int, unique in this arena, to identify a new unit."""
+        return next(self._unit_ids)
+
     def add_units_to_player(self, bot, amount_of_units=STARTS_WITH_N_UNITS):
         """Sets the units for the player, one inside de base and the others arround"""
 
@@ -177,8 +343,9 @@ class ArenaGrid(GameBaseObject):
             except IndexError:
                 continue
 
-    def deploy_players(self, bot_list):
-        """Receive a list of bots, and deploy them in the arena.
+    def deploy_players(self, bot_list, units_per_player=STARTS_WITH_N_UNITS):
+        """Receive a list of bots, and deploy them in the arena, with
+        <units_per_player> units each.
         Pick a headquarter location for the first bot, from the eligible
         options. Then, the second bot, will be placed as far as possible from
         the first one.
@@ -189,7 +356,7 @@ class ArenaGrid(GameBaseObject):
           {'name': <bot_name>,
            'color': <color_for_player>,
            'position': {'x': <bot.latitude>, 'y': <bot.longitude>,
-           'units': <n> :int> STARTS_WITH_N_UNITS,
+           'units': <n> :int> units_per_player,
            },
            ...
          ]
@@ -197,12 +364,12 @@ class ArenaGrid(GameBaseObject):
         """
         first_bot, second_bot = bot_list
         eligible_hqs = list(self.eligible_hqs)
-        random.shuffle(eligible_hqs)
+        self.rng.shuffle(eligible_hqs)
         first_bot_location = eligible_hqs.pop()
         second_bot_location = farthest_from_point(first_bot_location, eligible_hqs)
         players = []
         for idx, (bot, location) in enumerate(zip((first_bot, second_bot), (first_bot_location, second_bot_location))):
-            headquarter = HeadQuarter(location, bot.p_num, STARTS_WITH_N_UNITS, arena=self)
+            headquarter = HeadQuarter(location, bot.p_num, units_per_player, arena=self)
             self.set_content_on_tile(location, headquarter)
             bot.hq = headquarter
             players.append({
@@ -210,9 +377,9 @@ class ArenaGrid(GameBaseObject):
                 'id': bot.p_num,
                 'color': BOT_COLORS[idx],
                 'position': {'x': location.latitude, 'y': location.longitude},
-                'units': STARTS_WITH_N_UNITS,
+                'units': units_per_player,
             })
-            self.add_units_to_player(bot)
+            self.add_units_to_player(bot, units_per_player)
 
         return {'players': players}
 
@@ -224,13 +391,36 @@ class ArenaGrid(GameBaseObject):
         return self[coordinate]
 
     def set_content_on_tile(self, coordinate, content):
-        self[coordinate].add_item(content)
+        tile = self[coordinate]
+        tile.add_item(content)
+        self._units_index[str(content.id)] = (content, tile)
+        self._visibility.tile_changed(coordinate)
+        if content.player_id is not None:
+            self._visibility.add_viewer(content.player_id, coordinate)
 
     def number_of_units_in_tile(self, coordinate):
-        return sum(1 if unit.type == UNIT_TYPE_ATTACK else 0 for unit in self.get_tile_content(coordinate).items)
+        return self[coordinate].attack_units
 
     def remove_content_from_tile(self, coordinate, content):
-        self[coordinate].remove_item(content)
+        tile = self[coordinate]
+        tile.remove_item(content)
+        if self._unregister_unit(content, tile):
+            self._unit_left_tile(coordinate, content)
+
+    def _unregister_unit(self, unit, tile):
+        """Drop <unit> from the index, only if it is still indexed on <tile>.
+        @return: <bool> indicating if it was.
+        """
+        key = str(unit.id)
+        if self._units_index.get(key, (None, None))[1] is tile:
+            del self._units_index[key]
+            return True
+        return False
+
+    def _unit_left_tile(self, coordinate, unit):
+        self._visibility.tile_changed(coordinate)
+        if unit.player_id is not None:
+            self._visibility.remove_viewer(unit.player_id, coordinate)
 
     def is_free_tile(self, coordinate):
         return not self[coordinate].items
@@ -238,10 +428,7 @@ class ArenaGrid(GameBaseObject):
     def whos_in_tile(self, coordinate):
         """Return the player_id for the user that is in the given
         coordinate."""
-        try:
-            return next(unit.player_id for unit in self[coordinate].items)
-        except StopIteration:
-            return None
+        return self[coordinate].owner
 
     def synchronize_attack_results(self, attack_result):
         """Receive a :dict: in <attack_result> and update the units in the
@@ -256,18 +443,75 @@ class ArenaGrid(GameBaseObject):
         return units_removed
 
     def _remove_n_units_in_coord(self, coordinate, amount_to_remove):
+        tile = self[coordinate]
         units_popped = []
         for _ in range(amount_to_remove):
-            units_popped.append(self[coordinate].pop_one_unit())
+            unit = tile.pop_one_unit()
+            if unit is not None and self._unregister_unit(unit, tile):
+                self._unit_left_tile(coordinate, unit)
+            units_popped.append(unit)
         return units_popped
 
+    def locate_unit(self, unit_id):
+        """Return the (unit, tile) pair for the given <unit_id>, or
+        (None, None) if there is no such unit in the arena."""
+        return self._units_index.get(str(unit_id), (None, None))
+
     def get_unit(self, content):
-        for row in self._matrix:
-            for tile in row:
-                for item in tile.items:
-                    if str(item.id) == str(content):
-                        return item
+        return self.locate_unit(content)[0]
 
     def enemy_hq_taken(self, player, opponent):
         hq_tile_content = self.get_tile_content(opponent.hq.coordinate)
-        return any(item.player_id == player.p_num for item in hq_tile_content.items)
+        return hq_tile_content.items_of(player.p_num) > 0
+
+    def board_snapshot(self):
+        """Owner and amount of units of every occupied tile, and where the
+        headquarters are, as stored in the keyframes of the trace (see
+        onagame2015.keyframes).
+        @return: {'tiles': [[x, y, player, units], ...], 'hqs': [[x, y, player], ...]}
+        """
+        tiles = {}
+        hqs = []
+        for unit, _ in self._units_index.itervalues():
+            x, y = unit.coordinate.latitude, unit.coordinate.longitude
+            if unit.type == UNIT_TYPE_HQ:
+                hqs.append([x, y, unit.player_id])
+            elif unit.type == UNIT_TYPE_ATTACK:
+                tiles.setdefault((x, y), [x, y, unit.player_id, 0])[3] += 1
+        return {'tiles': sorted(tiles.itervalues()), 'hqs': sorted(hqs)}
+
+    def _occupied_tiles(self):
+        """@return: <tuple> of (coordinate, <tuple> of items) for every tile
+        with something on it"""
+        tiles = {}
+        for unit, tile in self._units_index.itervalues():
+            tiles[unit.coordinate] = tile
+        return tuple((coordinate, tuple(tile.items)) for coordinate, tile in tiles.iteritems())
+
+    def snapshot(self):
+        """The state of the board, to go back to it with restore, as many
+        times as needed (for lookahead, or to reset a game). It keeps the
+        units themselves, since where they are is all that changes of them,
+        and the counters of the visibility, not copies of the tiles.
+        @return: <tuple>, not to be modified
+        """
+        return self._occupied_tiles(), copy.copy(self._unit_ids), self._visibility.snapshot()
+
+    def restore(self, snapshot):
+        """Put the board back as it was when <snapshot> was taken. The next
+        map update sent to each player is the whole map."""
+        tiles, unit_ids, visibility = snapshot
+        for _, tile in self._units_index.itervalues():
+            tile.clear()
+        self._units_index = {}
+        for coordinate, items in tiles:
+            tile = self[coordinate]
+            for item in items:
+                item.coordinate = coordinate
+                tile.add_item(item)
+                self._units_index[str(item.id)] = (item, tile)
+        self._unit_ids = copy.copy(unit_ids)
+        self._visibility.restore(visibility)
+        self._map_versions = {}
+        self._sent_maps = {}
+        self._unsent = {}
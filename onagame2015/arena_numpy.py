@@ -0,0 +1,229 @@
+"""Arena backend that keeps the state of the board in dense NumPy arrays.
+
+Only the tiles that have something on them get a TileContainer (they still
+hold the units, to render them and resolve attacks); reachability, owner,
+amount of attack units and HQ presence for every tile live in arrays, so the
+whole-map operations don't walk W*H Python objects. The visible tiles are
+computed with array operations on every render, instead of being tracked
+as units move.
+"""
+import copy
+import itertools
+import random
+
+import numpy
+
+from onagame2015.arena import ArenaGrid, TileContainer, copy_map, copy_tile
+from onagame2015.lib import (
+    Coordinate,
+    FOG_CONSTANT,
+    FOG_COMPACT,
+    TILE_ENEMY_HQ,
+    TILE_OWN_HQ,
+    TILE_REACHABLE,
+    TILE_VISIBLE,
+    VISIBILITY_DISTANCE,
+)
+
+NO_PLAYER = 0
+
+
+class EmptyTile(TileContainer):
+    """A tile with nothing on it. NumpyArenaGrid doesn't store these, so
+    adding to one would be lost: use set_content_on_tile instead."""
+
+    def add_item(self, item):
+        raise RuntimeError("Can't add to an empty tile, use set_content_on_tile")
+
+
+class NumpyArenaGrid(ArenaGrid):
+    """Same interface as ArenaGrid, backed by arrays of shape (height, width)
+    indexed by [longitude, latitude].
+    """
+    def __init__(self, game_map, game_status, rng=random):
+        self._game_status = game_status
+        self.rng = rng
+        self.width = game_map.width
+        self.height = game_map.height
+        self.eligible_hqs = game_map.eligible_hqs
+        self._units_index = {}
+        self._unit_ids = itertools.count(1)
+        self.reachable = numpy.array([list(row) for row in game_map.iterrows()], dtype=bool)
+        self.reachable.shape = (self.height, self.width)
+        self.owner = numpy.zeros((self.height, self.width), dtype=numpy.int8)
+        self.attack_units = numpy.zeros((self.height, self.width), dtype=numpy.int32)
+        self.hq = numpy.zeros((self.height, self.width), dtype=numpy.int8)
+        # player_id <-> small int codes stored in self.owner and self.hq
+        self._player_codes = {}
+        self._players = [None]
+        # (longitude, latitude) -> TileContainer, only for occupied tiles
+        self._tiles = {}
+        # (player_id, encoding) -> the map as last sent by get_map_update_for_player,
+        # and its version
+        self._sent_maps = {}
+        self._map_versions = {}
+
+    def _key(self, coordinate):
+        """Translate <coordinate> into an index of the arrays, with the same
+        semantics as indexing the list of lists of ArenaGrid."""
+        longitude, latitude = coordinate.longitude, coordinate.latitude
+        if not (-self.height <= longitude < self.height and -self.width <= latitude < self.width):
+            raise IndexError('Coordinate {} out of the arena'.format(coordinate))
+        return longitude % self.height, latitude % self.width
+
+    def _player_code(self, player_id):
+        if player_id is None:
+            return NO_PLAYER
+        try:
+            return self._player_codes[player_id]
+        except KeyError:
+            self._players.append(player_id)
+            code = self._player_codes[player_id] = len(self._players) - 1
+            return code
+
+    def _sync(self, key):
+        """Update the arrays for the tile in <key> from its container, and
+        forget the container if the tile is left empty."""
+        tile = self._tiles.get(key)
+        if tile is None or not tile.items:
+            self._tiles.pop(key, None)
+            self.owner[key] = self.attack_units[key] = self.hq[key] = NO_PLAYER
+            return
+        self.owner[key] = self._player_code(tile.owner)
+        self.attack_units[key] = tile.attack_units
+        self.hq[key] = self._player_code(tile.hq_owner)
+
+    def __getitem__(self, coordinate):
+        key = self._key(coordinate)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = EmptyTile(self, bool(self.reachable[key]))
+        return tile
+
+    def pprint(self):
+        print self.reachable
+        print self.owner
+        print self.attack_units
+        print self.hq
+
+    def visible_tiles_mask(self, bot):
+        """@return: <array> of bool, True for the tiles <bot> is able to see."""
+        visible = numpy.zeros((self.height, self.width), dtype=bool)
+        for unit in [bot.hq] + bot.units:
+            latitude, longitude = unit.coordinate
+            visible[max(longitude - VISIBILITY_DISTANCE, 0):longitude + VISIBILITY_DISTANCE + 1,
+                    max(latitude - VISIBILITY_DISTANCE, 0):latitude + VISIBILITY_DISTANCE + 1] = True
+        return visible
+
+    def get_map_for_player(self, bot, encoding='string'):
+        return self._render_map(bot, encoding).tolist()
+
+    def get_map_update_for_player(self, bot, encoding='string'):
+        key = bot.p_num, encoding
+        version = self._map_versions[key] = self._map_versions.get(key, 0) + 1
+        last_map = self._sent_maps.get(key)
+        map_copy = self._sent_maps[key] = self._render_map(bot, encoding)
+        if last_map is None:
+            return {'map': copy_map(map_copy.tolist()), 'map_version': version}
+        return {
+            'map_delta': [[int(latitude), int(longitude), copy_tile(map_copy[longitude, latitude])]
+                          for longitude, latitude in zip(*numpy.nonzero(map_copy != last_map))],
+            'map_version': version,
+        }
+
+    def _render_map(self, bot, encoding):
+        """@return: <array> of the tiles <bot> sees in <encoding>"""
+        visible = self.visible_tiles_mask(bot)
+        if encoding == 'compact':
+            map_copy = self._render_compact(bot, visible)
+        else:
+            map_copy = self._render_strings(visible)
+        return map_copy
+
+    def _render_strings(self, visible):
+        map_copy = numpy.empty((self.height, self.width), dtype=object)
+        map_copy.fill(FOG_CONSTANT)
+        map_copy[visible & ~self.reachable] = 'B'
+        visible = visible & self.reachable
+        map_copy[visible] = ''
+        for longitude, latitude in zip(*numpy.nonzero(visible & (self.owner != NO_PLAYER))):
+            key = int(longitude), int(latitude)
+            map_copy[key] = str(self._tiles[key])
+        return map_copy
+
+    def _render_compact(self, bot, visible):
+        own_code = self._player_code(bot.p_num)
+        flags = numpy.where(visible, TILE_VISIBLE, FOG_COMPACT)
+        flags[visible & self.reachable] |= TILE_REACHABLE
+        flags[visible & (self.hq == own_code)] |= TILE_OWN_HQ
+        flags[visible & (self.hq != NO_PLAYER) & (self.hq != own_code)] |= TILE_ENEMY_HQ
+        map_copy = flags.astype(object)
+        for longitude, latitude in zip(*numpy.nonzero(visible & (self.attack_units > 0))):
+            key = int(longitude), int(latitude)
+            map_copy[key] = self._tiles[key].compact(bot.p_num)
+        return map_copy
+
+    def set_content_on_tile(self, coordinate, content):
+        key = self._key(coordinate)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = TileContainer(self, bool(self.reachable[key]))
+        tile.add_item(content)
+        self._units_index[str(content.id)] = (content, tile)
+        self._sync(key)
+
+    def remove_content_from_tile(self, coordinate, content):
+        key = self._key(coordinate)
+        tile = self._tiles.get(key)
+        if tile is None:
+            return
+        tile.remove_item(content)
+        self._unregister_unit(content, tile)
+        self._sync(key)
+
+    def _remove_n_units_in_coord(self, coordinate, amount_to_remove):
+        key = self._key(coordinate)
+        tile = self._tiles.get(key)
+        units_popped = []
+        for _ in range(amount_to_remove):
+            unit = tile.pop_one_unit() if tile is not None else None
+            if unit is not None:
+                self._unregister_unit(unit, tile)
+            units_popped.append(unit)
+        self._sync(key)
+        return units_popped
+
+    def number_of_units_in_tile(self, coordinate):
+        return int(self.attack_units[self._key(coordinate)])
+
+    def is_free_tile(self, coordinate):
+        return self.owner[self._key(coordinate)] == NO_PLAYER
+
+    def whos_in_tile(self, coordinate):
+        return self._players[self.owner[self._key(coordinate)]]
+
+    def _occupied_tiles(self):
+        return tuple((Coordinate(latitude, longitude), tuple(tile.items))
+                     for (longitude, latitude), tile in self._tiles.iteritems())
+
+    def snapshot(self):
+        return (self._occupied_tiles(), copy.copy(self._unit_ids),
+                (self.owner.copy(), self.attack_units.copy(), self.hq.copy()))
+
+    def restore(self, snapshot):
+        tiles, unit_ids, (owner, attack_units, hq) = snapshot
+        self._tiles = {}
+        self._units_index = {}
+        for coordinate, items in tiles:
+            key = coordinate.longitude, coordinate.latitude
+            tile = self._tiles[key] = TileContainer(self, bool(self.reachable[key]))
+            for item in items:
+                item.coordinate = coordinate
+                tile.add_item(item)
+                self._units_index[str(item.id)] = (item, tile)
+        self._unit_ids = copy.copy(unit_ids)
+        numpy.copyto(self.owner, owner)
+        numpy.copyto(self.attack_units, attack_units)
+        numpy.copyto(self.hq, hq)
+        self._sent_maps = {}
+        self._map_versions = {}
@@ -0,0 +1,288 @@
+"""Many independent games stepped in lockstep with NumPy, to train bots.
+
+BatchEngine keeps B games on the same map as arrays of shape (B, height,
+width), indexed by [game, y, x] (y is the longitude, x the latitude, as in
+the trace): the player owning the units of each tile, the amount of units,
+and the player whose HQ is there. Units are not tracked one by one, only by
+tile.
+
+Each step applies one action to every game, as arrays of shape (B,):
+
+    kind        MOVE or ATTACK (NO_ACTION to skip the game)
+    x, y        tile the action starts from
+    to_x, to_y  tile it goes to
+    count       units to move (ignored for attacks)
+
+with the rules of AttackUnit.move (each unit moved is a MOVE_UNITS of the
+scalar engine) and AttackAction. The dice of the attacks come from the same
+alias tables as AttackAction, so the same uniform draws give the same
+outcomes in both engines. A game is over once a player has no units left,
+or has units in the HQ of the other one, and its actions are ignored since.
+"""
+import random
+
+import numpy
+
+from onagame2015.dice import outcome_table
+from onagame2015.lib import (
+    AVAILABLE_MOVEMENTS,
+    MAX_AMOUNT_OF_DICES_PER_PLAYER,
+    STARTS_WITH_N_UNITS,
+    VISIBILITY_DISTANCE,
+    farthest_from_point,
+)
+
+NO_PLAYER = 0
+PLAYERS = (1, 2)
+
+NO_ACTION, MOVE, ATTACK = 0, 1, 2
+
+# Results of each action
+OK = 0
+INVALID = 1  # breaks the rules, nothing changed
+GAME_OVER = 2  # the game had already finished
+
+# Channels of the observations
+OBSERVATION_CHANNELS = ('visible', 'reachable', 'own_units', 'enemy_units', 'own_hq', 'enemy_hq')
+
+
+def _alias_arrays():
+    """The alias tables of onagame2015.dice for every pair of amounts of
+    dice, as arrays indexed by [attacker_n_dice, defender_n_dice, bucket]."""
+    n_dice = MAX_AMOUNT_OF_DICES_PER_PLAYER + 1
+    tables = [[outcome_table(attacker, defender).alias_table for defender in range(n_dice)]
+              for attacker in range(n_dice)]
+    size = max(len(table.values) for row in tables for table in row)
+    buckets = numpy.zeros((n_dice, n_dice), dtype=numpy.int64)
+    totals = numpy.zeros((n_dice, n_dice), dtype=numpy.int64)
+    thresholds = numpy.zeros((n_dice, n_dice, size), dtype=numpy.int64)
+    aliases = numpy.zeros((n_dice, n_dice, size), dtype=numpy.int64)
+    attacker_loses = numpy.zeros((n_dice, n_dice, size), dtype=numpy.int16)
+    defender_loses = numpy.zeros((n_dice, n_dice, size), dtype=numpy.int16)
+    for attacker, row in enumerate(tables):
+        for defender, table in enumerate(row):
+            n = len(table.values)
+            buckets[attacker, defender] = n
+            totals[attacker, defender] = table.total
+            thresholds[attacker, defender, :n] = table.thresholds
+            aliases[attacker, defender, :n] = table.aliases
+            attacker_loses[attacker, defender, :n] = [value[2] for value in table.values]
+            defender_loses[attacker, defender, :n] = [value[3] for value in table.values]
+    return buckets, totals, thresholds, aliases, attacker_loses, defender_loses
+
+
+_BUCKETS, _TOTALS, _THRESHOLDS, _ALIASES, _ATTACKER_LOSES, _DEFENDER_LOSES = _alias_arrays()
+_MOVEMENTS = set(tuple(movement) for movement in AVAILABLE_MOVEMENTS)
+
+
+class BatchEngine(object):
+    """<batch_size> games on <game_map>, all of them empty until the boards
+    are loaded (see new_games and from_boards)."""
+
+    def __init__(self, game_map, batch_size, rng=None):
+        self.reachable = numpy.array([list(row) for row in game_map.iterrows()], dtype=bool)
+        self.reachable.shape = (game_map.height, game_map.width)
+        self.height, self.width = self.reachable.shape
+        self.eligible_hqs = game_map.eligible_hqs
+        self.batch_size = batch_size
+        shape = (batch_size, self.height, self.width)
+        self.owner = numpy.zeros(shape, dtype=numpy.int8)
+        self.units = numpy.zeros(shape, dtype=numpy.int16)
+        self.hq = numpy.zeros(shape, dtype=numpy.int8)
+        self.done = numpy.zeros(batch_size, dtype=bool)
+        self.winner = numpy.zeros(batch_size, dtype=numpy.int8)
+        # amount of units, and where the HQ is, of each player in each game,
+        # indexed by [game, player], so checking the end of the games doesn't
+        # have to go through the boards
+        self.units_left = numpy.zeros((batch_size, len(PLAYERS) + 1), dtype=numpy.int16)
+        self.hq_x = numpy.zeros((batch_size, len(PLAYERS) + 1), dtype=numpy.int64)
+        self.hq_y = numpy.zeros((batch_size, len(PLAYERS) + 1), dtype=numpy.int64)
+        if not isinstance(rng, numpy.random.RandomState):
+            rng = numpy.random.RandomState(rng)
+        self.rng = rng
+        self._games = numpy.arange(batch_size)
+
+    @classmethod
+    def from_boards(cls, game_map, boards, rng=None):
+        """Games starting from <boards>, as ArenaGrid.board_snapshot returns
+        them."""
+        engine = cls(game_map, len(boards), rng)
+        for game, board in enumerate(boards):
+            for x, y, player, units in board['tiles']:
+                engine.owner[game, y, x] = player
+                engine.units[game, y, x] = units
+            for x, y, player in board['hqs']:
+                engine.hq[game, y, x] = player
+        engine._boards_loaded()
+        return engine
+
+    @classmethod
+    def new_games(cls, game_map, seeds, units_per_player=STARTS_WITH_N_UNITS, rng=None):
+        """One game for each of <seeds>, deployed as ArenaGrid.deploy_players
+        does with random.Random(seed)."""
+        engine = cls(game_map, len(seeds), rng)
+        boards = {}
+        for game, seed in enumerate(seeds):
+            eligible_hqs = list(engine.eligible_hqs)
+            random.Random(seed).shuffle(eligible_hqs)
+            first_hq = eligible_hqs.pop()
+            key = first_hq, farthest_from_point(first_hq, eligible_hqs)
+            if key not in boards:
+                boards[key] = engine._deployment(key, units_per_player)
+            for x, y, player, units in boards[key]:
+                engine.owner[game, y, x] = player
+                engine.units[game, y, x] = units
+            for player, hq in zip(PLAYERS, key):
+                engine.hq[game, hq.longitude, hq.latitude] = player
+        engine._boards_loaded()
+        return engine
+
+    def _boards_loaded(self):
+        for player in PLAYERS:
+            self.units_left[:, player] = self.units_of(player)
+            hq = (self.hq == player).reshape(self.batch_size, -1).argmax(axis=1)
+            self.hq_y[:, player], self.hq_x[:, player] = numpy.unravel_index(hq, (self.height, self.width))
+
+    def _deployment(self, hqs, units_per_player):
+        """Units of each player around its HQ, as
+        ArenaGrid.add_units_to_player places them.
+        @return: <list> of [x, y, player, units]
+        """
+        tiles = {}
+        for player, hq in zip(PLAYERS, hqs):
+            around = [hq + movement for movement in AVAILABLE_MOVEMENTS]
+            around = [tile for tile in around if self._in_arena(tile.latitude, tile.longitude) and
+                      self.reachable[tile.longitude, tile.latitude]]
+            for index in range(units_per_player):
+                tile = hq if index == 0 else around[index % len(around)]
+                tiles.setdefault(tile, [tile.latitude, tile.longitude, player, 0])[3] += 1
+        return tiles.values()
+
+    def _in_arena(self, x, y):
+        return (0 <= x) & (x < self.width) & (0 <= y) & (y < self.height)
+
+    def _tile_owner(self, x, y):
+        """Player of the first item of each tile, as ArenaGrid.whos_in_tile
+        (the HQ is always the first item of its tile)."""
+        hq = self.hq[self._games, y, x]
+        return numpy.where(hq != NO_PLAYER, hq, self.owner[self._games, y, x])
+
+    def step(self, player, kind, x, y, to_x, to_y, count=1, draws=None):
+        """Apply an action of <player> (a scalar, or an array with one per
+        game) to every game. <draws> are the uniform numbers in [0, 1) for the
+        attacks, taken from self.rng by default.
+        @return: <array> with OK, INVALID or GAME_OVER for each game
+        """
+        games = self._games
+        player, kind, x, y, to_x, to_y, count = [
+            numpy.broadcast_to(numpy.asarray(value, dtype=numpy.int64), (self.batch_size,))
+            for value in (player, kind, x, y, to_x, to_y, count)]
+        if draws is None:
+            draws = self.rng.random_sample(self.batch_size)
+
+        # coordinates clipped to index the arrays, only used where valid
+        inside = self._in_arena(x, y) & self._in_arena(to_x, to_y)
+        x, to_x = numpy.clip(x, 0, self.width - 1), numpy.clip(to_x, 0, self.width - 1)
+        y, to_y = numpy.clip(y, 0, self.height - 1), numpy.clip(to_y, 0, self.height - 1)
+        source_units = self.units[games, y, x]
+        target_units = self.units[games, to_y, to_x]
+        owns_source = inside & (self.owner[games, y, x] == player) & (source_units > 0)
+
+        delta_x, delta_y = to_x - x, to_y - y
+        is_movement = numpy.zeros(self.batch_size, dtype=bool)
+        for movement_x, movement_y in _MOVEMENTS:
+            is_movement |= (delta_x == movement_x) & (delta_y == movement_y)
+        target_hq = self.hq[games, to_y, to_x]
+        # AttackUnit.move: reachable, only one unit in the own HQ, and no
+        # enemy units in the destination (an enemy HQ alone can be invaded)
+        move = (~self.done & (kind == MOVE) & owns_source & is_movement & (count > 0) &
+                self.reachable[to_y, to_x] &
+                ~((target_hq == player) & (target_units > 0)) &
+                ((target_units == 0) | (self.owner[games, to_y, to_x] == player)))
+        moved = numpy.minimum(count, source_units)
+        moved = numpy.where(target_hq == player, numpy.minimum(moved, 1), moved)
+        self._move_units(games[move], y[move], x[move], to_y[move], to_x[move], player[move], moved[move])
+
+        # AttackAction: contiguous tiles, of different players
+        distance = numpy.abs(delta_x) + numpy.abs(delta_y)
+        attacker, defender = self._tile_owner(x, y), self._tile_owner(to_x, to_y)
+        attack = (~self.done & (kind == ATTACK) & inside & (distance >= 1) & (distance <= 2) &
+                  (attacker == player) & (defender != NO_PLAYER) & (attacker != defender))
+        self._attack(games[attack], y[attack], x[attack], to_y[attack], to_x[attack], draws[attack])
+
+        result = numpy.where(move | attack | (kind == NO_ACTION), OK, INVALID)
+        result[self.done] = GAME_OVER
+        self._check_game_over(player)
+        return result
+
+    def _move_units(self, games, y, x, to_y, to_x, player, moved):
+        self.units[games, y, x] -= moved
+        self.owner[games, y, x] = numpy.where(self.units[games, y, x] > 0, player, NO_PLAYER)
+        self.units[games, to_y, to_x] += moved
+        self.owner[games, to_y, to_x] = player
+
+    def _attack(self, games, y, x, to_y, to_x, draws):
+        attacker_n_dice = numpy.minimum(self.units[games, y, x], MAX_AMOUNT_OF_DICES_PER_PLAYER)
+        defender_n_dice = numpy.minimum(self.units[games, to_y, to_x], MAX_AMOUNT_OF_DICES_PER_PLAYER)
+        # same as dice._AliasTable.sample, with randrange(n) = int(draw * n)
+        total = _TOTALS[attacker_n_dice, defender_n_dice]
+        index = (draws * (_BUCKETS[attacker_n_dice, defender_n_dice] * total)).astype(numpy.int64)
+        bucket, position = index // total, index % total
+        bucket = numpy.where(position >= _THRESHOLDS[attacker_n_dice, defender_n_dice, bucket],
+                             _ALIASES[attacker_n_dice, defender_n_dice, bucket], bucket)
+        for tile_y, tile_x, loses in ((y, x, _ATTACKER_LOSES), (to_y, to_x, _DEFENDER_LOSES)):
+            loses = loses[attacker_n_dice, defender_n_dice, bucket]
+            self.units[games, tile_y, tile_x] -= loses
+            self.units_left[games, self.owner[games, tile_y, tile_x]] -= loses
+            left = self.units[games, tile_y, tile_x] > 0
+            self.owner[games, tile_y, tile_x] = numpy.where(left, self.owner[games, tile_y, tile_x], NO_PLAYER)
+
+    def _check_game_over(self, player):
+        """Finish the games where a player won, as BotPlayer.has_won_game,
+        checking the player that just played first."""
+        first = numpy.broadcast_to(numpy.asarray(player, dtype=numpy.int8), (self.batch_size,))
+        second = numpy.where(first == PLAYERS[0], PLAYERS[1], PLAYERS[0]).astype(numpy.int8)
+        games = self._games
+        for current, opponent in ((first, second), (second, first)):
+            hq_y, hq_x = self.hq_y[games, opponent], self.hq_x[games, opponent]
+            hq_taken = (self.owner[games, hq_y, hq_x] == current) & (self.units[games, hq_y, hq_x] > 0)
+            won = ~self.done & (hq_taken | (self.units_left[games, opponent] == 0))
+            self.winner[won] = current[won]
+            self.done |= won
+
+    def units_of(self, player):
+        """@return: <array> with the amount of units of <player> (a scalar, or
+        an array with one per game) in each game"""
+        player = numpy.broadcast_to(numpy.asarray(player, dtype=numpy.int8), (self.batch_size,))
+        return numpy.where(self.owner == player[:, None, None], self.units, 0).sum(axis=(1, 2))
+
+    def visible(self, player):
+        """@return: <array> of bool (B, height, width), True for the tiles
+        <player> sees: those at VISIBILITY_DISTANCE or less of its units or HQ."""
+        visible = ((self.owner == player) & (self.units > 0)) | (self.hq == player)
+        # the square around each viewer, one axis at a time
+        for axis in (1, 2):
+            viewers = visible.copy()
+            for shift in range(1, VISIBILITY_DISTANCE + 1):
+                after = [slice(None)] * 3
+                before = [slice(None)] * 3
+                after[axis], before[axis] = slice(shift, None), slice(None, -shift)
+                visible[tuple(after)] |= viewers[tuple(before)]
+                visible[tuple(before)] |= viewers[tuple(after)]
+        return visible
+
+    def observe(self, player):
+        """The games as <player> sees them, with the fog of war.
+        @return: <array> of int16 (B, len(OBSERVATION_CHANNELS), height, width)
+        """
+        visible = self.visible(player)
+        own = self.owner == player
+        observation = numpy.zeros((self.batch_size, len(OBSERVATION_CHANNELS), self.height, self.width),
+                                  dtype=numpy.int16)
+        observation[:, 0] = visible
+        observation[:, 1] = visible & self.reachable
+        numpy.multiply(self.units, visible & own, out=observation[:, 2])
+        numpy.multiply(self.units, visible & ~own, out=observation[:, 3])
+        observation[:, 4] = visible & (self.hq == player)
+        observation[:, 5] = visible & (self.hq != player) & (self.hq != NO_PLAYER)
+        return observation
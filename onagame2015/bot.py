@@ -14,7 +14,10 @@ class BotPlayer(GameBaseObject):
         self.units.append(unit)
 
     def remove_unit(self, unit_to_remove):
-        self.units = [u for u in self.units if u.id != unit_to_remove.id]
+        try:
+            self.units.remove(unit_to_remove)
+        except ValueError:
+            pass
 
     def has_won_game(self, opponent, arena):
         won = False
@@ -30,3 +33,12 @@ class BotPlayer(GameBaseObject):
     def remove_units(self, units_lost):
         for unit in units_lost:
             self.remove_unit(unit)
+
+    def snapshot(self):
+        """The HQ and units of the player, for restore (see ArenaGrid.snapshot)."""
+        return self.hq, tuple(self.units)
+
+    def restore(self, snapshot):
+        hq, units = snapshot
+        self.hq = hq
+        self.units = list(units)
@@ -0,0 +1,63 @@
+"""Time the bots take to respond, against their limits.
+
+Each bot has <turn_limit> seconds to respond on each turn, and <bank>
+seconds for all its turns in the game (either can be None, for no limit).
+The controller measures from sending the data of a turn to getting the
+actions of the bot, and a bot that takes longer than it had left loses the
+game.
+"""
+from onagame2015.lib import BotTimeoutException
+
+
+class TimeBudget(object):
+
+    def __init__(self, turn_limit=None, bank=None):
+        self.turn_limit = turn_limit
+        self.bank = bank
+        self.turns = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def limited(self):
+        return self.turn_limit is not None or self.bank is not None
+
+    @property
+    def bank_left(self):
+        """Seconds left in the bank, or None if there is no bank."""
+        if self.bank is not None:
+            return max(self.bank - self.total, 0.0)
+
+    def time_left(self):
+        """Seconds the bot has for its next turn, or None if there is no
+        limit."""
+        limits = [limit for limit in (self.turn_limit, self.bank_left) if limit is not None]
+        if limits:
+            return min(limits)
+
+    def spend(self, seconds):
+        """Account a turn that took <seconds>.
+        Raise BotTimeoutException if the bot had less time left."""
+        time_left = self.time_left()
+        self.turns += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if time_left is not None and seconds > time_left:
+            raise BotTimeoutException('{:.3f}s to respond, with {:.3f}s left'.format(seconds, time_left))
+
+    def stats(self):
+        """@return: <dict> with the turns, the total, mean and max seconds
+        taken, and the seconds left in the bank"""
+        return {
+            'turns': self.turns,
+            'total': self.total,
+            'mean': self.total / self.turns if self.turns else 0.0,
+            'max': self.max,
+            'bank_left': self.bank_left,
+        }
+
+    def snapshot(self):
+        return self.turns, self.total, self.max
+
+    def restore(self, snapshot):
+        self.turns, self.total, self.max = snapshot
@@ -0,0 +1,152 @@
+"""Exact outcomes of the dice thrown in an attack.
+
+Each side throws one die per unit, up to MAX_AMOUNT_OF_DICES_PER_PLAYER, the
+dice of each side are sorted from highest to lowest and compared in pairs:
+the attacker loses a unit for each pair it doesn't win (ties go to the
+defender), and the defender for each one it loses.
+
+There are only a few combinations of amounts of dice, so the distribution of
+the outcomes of each one is calculated once, with integer weights, and an
+outcome is sampled with a single random draw, through an alias table. The
+same tables give the exact probabilities of the losses, for the bots and
+for analysis. ForwardModel resolves the attacks it simulates with them, so
+they go as in the engine.
+"""
+import random
+from fractions import Fraction
+from itertools import combinations_with_replacement
+
+from onagame2015.lib import MAX_AMOUNT_OF_DICES_PER_PLAYER
+
+DIE_FACES = range(1, 7)
+
+
+def dice_for_units(units):
+    """Amount of dice thrown by a tile with <units>."""
+    return min(MAX_AMOUNT_OF_DICES_PER_PLAYER, units)
+
+
+def _factorial(n):
+    return n * _factorial(n - 1) if n > 1 else 1
+
+
+def _sorted_throws(n_dice):
+    """Every throw of <n_dice>, sorted from highest to lowest, with the
+    amount of ways to get it.
+    @return: <list> of (dice, weight)
+    """
+    throws = []
+    for dice in combinations_with_replacement(sorted(DIE_FACES, reverse=True), n_dice):
+        weight = _factorial(n_dice)
+        for face in set(dice):
+            weight //= _factorial(dice.count(face))
+        throws.append((dice, weight))
+    return throws
+
+
+def count_losses(attacker_dice, defender_dice):
+    """@return: attacker_loses, defender_loses for the sorted dice"""
+    attacker_loses = sum(1 for attacker, defender in zip(attacker_dice, defender_dice)
+                         if attacker <= defender)
+    return attacker_loses, min(len(attacker_dice), len(defender_dice)) - attacker_loses
+
+
+class _AliasTable(object):
+    """Samples one of <values> with probability proportional to its integer
+    weight, with a single draw of randrange, exactly (Vose's alias method,
+    with integers)."""
+
+    def __init__(self, values, weights):
+        n, total = len(values), sum(weights)
+        self.values = values
+        self.total = total
+        self.thresholds = [total] * n
+        self.aliases = range(n)
+        scaled = [weight * n for weight in weights]
+        small = [index for index, weight in enumerate(scaled) if weight < total]
+        large = [index for index, weight in enumerate(scaled) if weight >= total]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.thresholds[less] = scaled[less]
+            self.aliases[less] = more
+            scaled[more] += scaled[less] - total
+            (small if scaled[more] < total else large).append(more)
+
+    def sample(self, rng=random):
+        bucket, position = divmod(rng.randrange(len(self.values) * self.total), self.total)
+        if position >= self.thresholds[bucket]:
+            bucket = self.aliases[bucket]
+        return self.values[bucket]
+
+
+class OutcomeTable(object):
+    """Distribution of the outcomes of an attack with <attacker_n_dice>
+    against <defender_n_dice>."""
+
+    def __init__(self, attacker_n_dice, defender_n_dice):
+        self.attacker_n_dice = attacker_n_dice
+        self.defender_n_dice = defender_n_dice
+        outcomes, weights = [], []
+        losses = {}
+        for attacker_dice, attacker_weight in _sorted_throws(attacker_n_dice):
+            for defender_dice, defender_weight in _sorted_throws(defender_n_dice):
+                outcome_losses = count_losses(attacker_dice, defender_dice)
+                outcomes.append((attacker_dice, defender_dice) + outcome_losses)
+                weights.append(attacker_weight * defender_weight)
+                losses[outcome_losses] = losses.get(outcome_losses, 0) + weights[-1]
+        self.total = sum(weights)
+        self._outcomes = _AliasTable(outcomes, weights)
+        self._losses = _AliasTable(sorted(losses), [losses[key] for key in sorted(losses)])
+        self._loss_weights = losses
+
+    @property
+    def alias_table(self):
+        """The table the outcomes are sampled from, with the outcomes as
+        (attacker_dice, defender_dice, attacker_loses, defender_loses), for
+        samplers that must map the same draw to the same outcome."""
+        return self._outcomes
+
+    def sample(self, rng=random):
+        """Throw the dice, with a single draw of <rng>.
+        @return: attacker_dice, defender_dice, attacker_loses, defender_loses
+        with the dice as lists sorted from highest to lowest
+        """
+        attacker_dice, defender_dice, attacker_loses, defender_loses = self._outcomes.sample(rng)
+        return list(attacker_dice), list(defender_dice), attacker_loses, defender_loses
+
+    def sample_losses(self, rng=random):
+        """Same as sample, without the dice.
+        @return: attacker_loses, defender_loses"""
+        return self._losses.sample(rng)
+
+    def probabilities(self):
+        """@return: <dict> of (attacker_loses, defender_loses) -> <Fraction>"""
+        return {losses: Fraction(weight, self.total) for losses, weight in self._loss_weights.iteritems()}
+
+    def expected_losses(self):
+        """@return: <Fraction> attacker_loses, <Fraction> defender_loses"""
+        probabilities = self.probabilities()
+        return (sum(p * attacker_loses for (attacker_loses, _), p in probabilities.iteritems()),
+                sum(p * defender_loses for (_, defender_loses), p in probabilities.iteritems()))
+
+
+_tables = {}
+
+
+def outcome_table(attacker_n_dice, defender_n_dice):
+    """The OutcomeTable for the amounts of dice, calculated the first time
+    it is needed."""
+    key = attacker_n_dice, defender_n_dice
+    try:
+        return _tables[key]
+    except KeyError:
+        table = _tables[key] = OutcomeTable(attacker_n_dice, defender_n_dice)
+        return table
+
+
+def attack_probabilities(attacker_units, defender_units):
+    """Exact probability of each outcome of an attack from a tile with
+    <attacker_units> to one with <defender_units>.
+    @return: <dict> of (attacker_loses, defender_loses) -> <Fraction>
+    """
+    return outcome_table(dice_for_units(attacker_units), dice_for_units(defender_units)).probabilities()
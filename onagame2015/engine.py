@@ -1,11 +1,18 @@
+import random
 import time
+from timeit import default_timer
 from onagame2015.actions import BaseBotAction, MoveAction
-from onagame2015.arena import ArenaGrid
+from onagame2015.arena import get_arena_class
+from onagame2015.budget import TimeBudget
 from onagame2015.lib import (
+    BotTimeoutException,
     GameStages,
+    STARTS_WITH_N_UNITS,
     VISIBILITY_DISTANCE,
 )
 from onagame2015.maploader import load_map
+from onagame2015.metrics import NULL_SINK
+from onagame2015.profiling import NULL_PROFILER, TurnProfiler
 from onagame2015.status import GameStatus
 from onagame2015.turn import GameTurn
 from turnboxed.gamecontroller import BaseGameController
@@ -13,11 +20,51 @@ from turnboxed.gamecontroller import BaseGameController
 
 class Onagame2015GameController(BaseGameController):
 
-    def __init__(self, bots):
+    def __init__(self, bots, arena_backend='list', delta_payloads=False, map_encoding='string',
+                 map_name='map_draft.json', trace_stream=None, keyframe_interval=None, seed=None,
+                 units_per_player=STARTS_WITH_N_UNITS, profile=False, profile_path=None,
+                 metrics=None, turn_time_limit=None, time_bank=None):
         BaseGameController.__init__(self)
-        self.game_status = GameStatus()
-        self.arena = ArenaGrid(load_map('map_draft.json'), self.game_status)
+        # With a trace_stream, the trace is written to it as the game goes
+        # (see GameStatus), instead of being returned by self.json
+        self.game_status = GameStatus(stream=trace_stream)
+        # Every random decision of the game comes from self.random, so the
+        # game can be played again from the seed in the initial status
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(32)
+        self.seed = seed
+        self.random = random.Random(seed)
+        arena_class = get_arena_class(arena_backend)
+        self.map_name = map_name
+        self.arena = arena_class(load_map(map_name), self.game_status, rng=self.random)
         self.bots = bots
+        self.units_per_player = units_per_player
+        # Send the whole map only on the first turn, and then the tiles that
+        # changed. GameBot.parse rebuilds the map on the bot side.
+        self.delta_payloads = delta_payloads
+        # One of lib.MAP_ENCODINGS
+        self.map_encoding = map_encoding
+        # Trace the full board every keyframe_interval rounds, so viewers
+        # can jump to any turn (see onagame2015.keyframes)
+        self.keyframe_interval = keyframe_interval
+        self._last_keyframe_round = None
+        # Time the phases of each turn (see onagame2015.profiling). With
+        # profile, the totals of each bot go in the final status, and with
+        # profile_path they are written there, with the phases of every turn
+        self.profile = profile
+        self.profile_path = profile_path
+        self.profiler = TurnProfiler() if profile or profile_path else NULL_PROFILER
+        # Sink for the counters and histograms of the game farm (see
+        # onagame2015.metrics), that can be shared by many controllers
+        self.metrics = NULL_SINK if metrics is None else metrics
+        # bot cookie -> when its last turn data was sent, to know how long
+        # its response took
+        self._turn_sent = {}
+        # Seconds each bot has to respond on each turn, and for the whole
+        # game (None for no limit). A bot that takes longer loses the game.
+        self.turn_time_limit = turn_time_limit
+        self.time_bank = time_bank
+        self.budgets = {bot.username: TimeBudget(turn_time_limit, time_bank) for bot in bots}
         self.rounds = 200
         self._actions = {cls.ACTION_NAME: cls for cls in BaseBotAction.__subclasses__()}
         self.deploy_players()
@@ -25,11 +72,14 @@ class Onagame2015GameController(BaseGameController):
 
     def deploy_players(self):
         initial_status = {
-            "map_source": "map_draft.json",
+            "map_source": self.map_name,
             "fog_range": VISIBILITY_DISTANCE,
+            "seed": self.seed,
             'players': [],
         }
-        deployed_players = self.arena.deploy_players(self.bots)
+        if self.turn_time_limit is not None or self.time_bank is not None:
+            initial_status.update(turn_time_limit=self.turn_time_limit, time_bank=self.time_bank)
+        deployed_players = self.arena.deploy_players(self.bots, self.units_per_player)
         initial_status.update(deployed_players)
         self.game_status.add_game_stage(GameStages.INITIAL, initial_status)
 
@@ -37,6 +87,31 @@ class Onagame2015GameController(BaseGameController):
     def json(self):
         return self.game_status.json
 
+    def snapshot(self):
+        """The state of the game, to go back to it with restore, e.g. to play
+        it again from the start without loading the map and deploying."""
+        return (
+            self.arena.snapshot(),
+            [bot.snapshot() for bot in self.bots],
+            self.game_status.snapshot(),
+            self.random.getstate(),
+            self.current_round,
+            self._last_keyframe_round,
+            {username: budget.snapshot() for username, budget in self.budgets.iteritems()},
+        )
+
+    def restore(self, snapshot):
+        (arena, bots, game_status, random_state, self.current_round, self._last_keyframe_round,
+         budgets) = snapshot
+        self.arena.restore(arena)
+        for bot, bot_snapshot in zip(self.bots, bots):
+            bot.restore(bot_snapshot)
+        self.game_status.restore(game_status)
+        self.random.setstate(random_state)
+        for username, budget in budgets.iteritems():
+            self.budgets[username].restore(budget)
+        self._turn_sent = {}
+
     def get_bot(self, bot_cookie):
         bot_name = self.players[bot_cookie]['player_id']
         try:
@@ -65,6 +140,10 @@ class Onagame2015GameController(BaseGameController):
     def _update_game_status(self):
         for new_status in self._game_turn.end_turn_status():
             self.game_status.update_turns(new_status)
+        if (self.keyframe_interval and self.current_round % self.keyframe_interval == 0 and
+                self._last_keyframe_round != self.current_round):
+            self._last_keyframe_round = self.current_round
+            self.game_status.add_keyframe(self.current_round, self.arena.board_snapshot())
 
     def _handle_bot_failure(self, bot, request):
         """Manage the case if one of the bots failed,
@@ -75,6 +154,7 @@ class Onagame2015GameController(BaseGameController):
             self.log_msg("Bot %s crashed: %s %s" % (bot.username,
                                                     request['EXCEPTION'],
                                                     request['TRACEBACK']))
+            self.metrics.increment('bot_crashes_total')
             self.stop()
             return -1
 
@@ -89,6 +169,15 @@ class Onagame2015GameController(BaseGameController):
             'traceback': traceback,
             'total_rounds': self.rounds,
         }
+        if self.profile:
+            final_status['profile'] = self.profiler.summary()
+        if self.profile_path:
+            self.profiler.write(self.profile_path)
+        if self.turn_time_limit is not None or self.time_bank is not None:
+            final_status['bot_times'] = {username: budget.stats() for username, budget in self.budgets.iteritems()}
+        self.metrics.increment('games_total')
+        self.metrics.observe('game_rounds', rounds)
+        self.metrics.flush()
         self.game_status.add_game_stage(GameStages.FINAL, final_status)
         return -1
 
@@ -97,11 +186,25 @@ class Onagame2015GameController(BaseGameController):
         # Game logic here.
         @return: <int>
         """
+        sent = self._turn_sent.pop(bot_cookie, None)
         bot = self.get_bot(bot_cookie)
         opponent = [b for b in self.bots if bot.username != b.username][0]
+        timeout = None
+        if sent is not None:
+            response_time = default_timer() - sent
+            self.metrics.observe('bot_response_seconds', response_time)
+            try:
+                self.budgets[bot.username].spend(response_time)
+            except BotTimeoutException as exc:
+                timeout = exc
+        self.metrics.increment('turns_total')
+        profiler = self.profiler
 
+        start = profiler.start()
         winner, reason = self.check_game_over(bot, opponent)
+        profiler.stop(bot, 'check_game_over', start)
         if winner or reason:
+            profiler.end_turn(bot, self.current_round)
             self.stop()
             return self.inform_game_result(
                 winner=winner,
@@ -111,6 +214,7 @@ class Onagame2015GameController(BaseGameController):
         self._game_turn = GameTurn(arena=self.arena, turn_number=self.current_round)
 
         if self._handle_bot_failure(bot, request) == -1:
+            profiler.end_turn(bot, self.current_round)
             return self.inform_game_result(
                 winner=opponent.username,
                 reason="Bot {} crashed!!".format(bot.username),
@@ -118,16 +222,34 @@ class Onagame2015GameController(BaseGameController):
                 rounds=self.current_round,
             )
 
+        if timeout is not None:
+            self.log_msg("Bot %s timed out: %s" % (bot.username, timeout))
+            self.metrics.increment('bot_timeouts_total')
+            self.stop()
+            profiler.end_turn(bot, self.current_round)
+            return self.inform_game_result(
+                winner=opponent.username,
+                reason="Bot {} forfeits: {} ({})".format(bot.username, BotTimeoutException.reason, timeout),
+                rounds=self.current_round,
+            )
+
         self.log_msg("GOT Action: %s" % request['MSG']['ACTIONS'])
+        start = profiler.start()
         self._validate_actions(request['MSG']['ACTIONS'])
+        profiler.stop(bot, 'validate_actions', start)
 
         for action in request['MSG']['ACTIONS']:
+            start = profiler.start()
             bot_action_type = self._actions.get(action['action_type'], BaseBotAction)
             bot = self.get_bot(bot_cookie)
-            result = bot_action_type(bot).execute(self.arena, action, opponent)
+            result = bot_action_type(bot, rng=self.random).execute(self.arena, action, opponent)
             self._game_turn.evaluate_bot_action(result)
+            profiler.stop(bot, bot_action_type.ACTION_NAME, start)
 
+        start = profiler.start()
         self._update_game_status()
+        profiler.stop(bot, 'update_game_status', start)
+        profiler.end_turn(bot, self.current_round)
         return 0
 
     def check_game_over(self, current_player, opponent):
@@ -171,10 +293,23 @@ class Onagame2015GameController(BaseGameController):
         """Feedback
         :return: the data sent to the bot on each turn
         """
+        start = self.profiler.start()
         bot = self.get_bot(bot_cookie)
-        return {
-            'map': self.arena.get_map_for_player(bot),
+        turn_data = {
             'player_num': bot.p_num,
             'timestamp': int(time.time()),
+            'map_encoding': self.map_encoding,
         }
+        budget = self.budgets[bot.username]
+        if budget.limited:
+            # seconds to respond to this turn, and for the rest of the game
+            turn_data['time_left'] = budget.time_left()
+            turn_data['time_bank_left'] = budget.bank_left
+        if self.delta_payloads:
+            turn_data.update(self.arena.get_map_update_for_player(bot, self.map_encoding))
+        else:
+            turn_data['map'] = self.arena.get_map_for_player(bot, self.map_encoding)
+        self.profiler.stop(bot, 'get_turn_data', start)
+        self._turn_sent[bot_cookie] = default_timer()
+        return turn_data
 
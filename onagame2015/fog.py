@@ -0,0 +1,124 @@
+from onagame2015.lib import (
+    Coordinate,
+    FOG_VALUES,
+    VISIBILITY_DISTANCE,
+)
+
+
+class VisibilityTracker(object):
+    """Keeps, for each player, how many of its units see every tile of the
+    arena, and the map as that player last got it, in each encoding.
+
+    The counts are updated when a unit is placed on or removed from a tile,
+    and the tiles whose visibility or content changed are remembered, so
+    rendering the map for a player only has to refresh those.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self._counts = {}  # player_id -> [[n_viewers, ...], ...]
+        self._views = {}  # (player_id, encoding) -> [[<tile>, ...], ...]
+        self._dirty = {}  # (player_id, encoding) -> set of (longitude, latitude)
+        self._player_views = {}  # player_id -> [(player_id, encoding), ...]
+
+    def _window(self, coordinate):
+        """Tiles in the arena at VISIBILITY_DISTANCE or less from <coordinate>
+        @return: <generator> of (longitude, latitude)
+        """
+        latitudes = range(max(coordinate.latitude - VISIBILITY_DISTANCE, 0),
+                          min(coordinate.latitude + VISIBILITY_DISTANCE + 1, self.width))
+        for longitude in range(max(coordinate.longitude - VISIBILITY_DISTANCE, 0),
+                               min(coordinate.longitude + VISIBILITY_DISTANCE + 1, self.height)):
+            for latitude in latitudes:
+                yield longitude, latitude
+
+    def _counts_for(self, player_id):
+        try:
+            return self._counts[player_id]
+        except KeyError:
+            self._player_views[player_id] = []
+            counts = self._counts[player_id] = [[0] * self.width for _ in range(self.height)]
+            return counts
+
+    def _mark_dirty(self, player_id, tile):
+        for key in self._player_views[player_id]:
+            self._dirty[key].add(tile)
+
+    def add_viewer(self, player_id, coordinate):
+        """A unit of <player_id> that sees around <coordinate> got there."""
+        counts = self._counts_for(player_id)
+        for longitude, latitude in self._window(coordinate):
+            counts[longitude][latitude] += 1
+            if counts[longitude][latitude] == 1:
+                self._mark_dirty(player_id, (longitude, latitude))
+
+    def remove_viewer(self, player_id, coordinate):
+        """A unit of <player_id> that saw around <coordinate> left."""
+        counts = self._counts_for(player_id)
+        for longitude, latitude in self._window(coordinate):
+            counts[longitude][latitude] -= 1
+            if not counts[longitude][latitude]:
+                self._mark_dirty(player_id, (longitude, latitude))
+
+    def tile_changed(self, coordinate):
+        """The content of the tile at <coordinate> changed, so it has to be
+        rendered again for the players that see it."""
+        for player_id, counts in self._counts.iteritems():
+            if counts[coordinate.longitude][coordinate.latitude]:
+                self._mark_dirty(player_id, (coordinate.longitude, coordinate.latitude))
+
+    def snapshot(self):
+        """@return: copy of the counts of viewers of every player"""
+        return {player_id: [row[:] for row in counts] for player_id, counts in self._counts.iteritems()}
+
+    def restore(self, snapshot):
+        """Go back to the counts of <snapshot>. The maps of the players are
+        rendered again from scratch, on their next view."""
+        self._counts = {player_id: [row[:] for row in counts] for player_id, counts in snapshot.iteritems()}
+        self._views = {}
+        self._dirty = {}
+        self._player_views = {player_id: [] for player_id in snapshot}
+
+    def is_visible(self, player_id, coordinate):
+        counts = self._counts.get(player_id)
+        return bool(counts and counts[coordinate.longitude][coordinate.latitude])
+
+    def refresh(self, player_id, render, encoding='string'):
+        """Bring the map of <player_id> in <encoding> up to date, rendering
+        the tiles that changed with <render>(<coordinate>).
+        @return: <list> of (longitude, latitude) whose rendered value changed
+        """
+        view = self.view(player_id, encoding)
+        fog = FOG_VALUES[encoding]
+        counts = self._counts[player_id]
+        changed = []
+        dirty = self._dirty[player_id, encoding]
+        for longitude, latitude in dirty:
+            if counts[longitude][latitude]:
+                tile = render(Coordinate(latitude, longitude))
+            else:
+                tile = fog
+            if view[longitude][latitude] != tile:
+                view[longitude][latitude] = tile
+                changed.append((longitude, latitude))
+        dirty.clear()
+        return changed
+
+    def view(self, player_id, encoding='string'):
+        """The map of <player_id> in <encoding> as of the last refresh.
+        Not to be modified."""
+        key = player_id, encoding
+        try:
+            return self._views[key]
+        except KeyError:
+            fog = FOG_VALUES[encoding]
+            view = self._views[key] = [[fog] * self.width for _ in range(self.height)]
+            counts = self._counts_for(player_id)
+            self._player_views[player_id].append(key)
+            self._dirty[key] = set(
+                (longitude, latitude)
+                for longitude, row in enumerate(counts)
+                for latitude, n_viewers in enumerate(row) if n_viewers
+            )
+            return view
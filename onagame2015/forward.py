@@ -0,0 +1,220 @@
+"""What the actions of a bot would do, without sending them to the engine.
+
+ForwardModel is a small state of the board as the bot sees it (built from
+the Map of GameBot), where the MOVE and ATTACK actions of the bot can be
+applied with the same rules the engine checks: a unit moves once per turn,
+to a contiguous tile in the map that is not blocked, not to its own HQ if
+there is a unit there, and not where there are enemy units; attacks go
+between tiles at most 2 steps away, from a tile of the bot to one of the
+enemy. Tiles under the fog are taken as reachable and empty.
+
+Attacks are resolved by sampling the dice, the same way the engine does
+with the same random generator, or by their expected losses (then the
+amounts of units are fractional). Every action can be undone, and copies
+are cheap, so bots can search the actions of their turn:
+
+    model = self.forward_model()
+    for action in candidates:
+        model.apply(action)
+        score = evaluate(model)
+        model.undo()
+"""
+import math
+import random
+
+from onagame2015.dice import dice_for_units, outcome_table
+from onagame2015.pathfinding import MOVEMENTS
+
+OWN = 'own'
+ENEMY = 'enemy'
+
+SAMPLE = 'sample'
+EXPECTED = 'expected'
+
+_MISSING = object()
+
+
+class ForwardModel(object):
+    """Board of <width> x <height> tiles, with the <blocked> (x, y) ones, and
+    the HQs of the bot and its enemy, if known. The units are placed with
+    add_units."""
+
+    def __init__(self, width, height, blocked=(), own_hq=None, enemy_hq=None, attacks=SAMPLE, rng=random):
+        self.width = width
+        self.height = height
+        self.blocked = frozenset(blocked)
+        self.own_hq = own_hq
+        self.enemy_hq = enemy_hq
+        # how attacks are resolved, SAMPLE or EXPECTED
+        self.attacks = attacks
+        self.rng = rng
+        self.units = {}  # (x, y) -> amount of units, only for tiles with units
+        self.owner = {}  # (x, y) -> OWN or ENEMY, only for tiles with units
+        self.unit_ids = {}  # (x, y) -> (unit_id, ...) own units, in the order the engine removes them
+        self.unit_tiles = {}  # unit_id -> (x, y)
+        self.moved = {}  # unit_id -> True, for the units moved this turn
+        self._changes = []  # for each action applied, [(table, key, previous value), ...]
+
+    @classmethod
+    def from_map(cls, game_map, **options):
+        """The board of a Map parsed by GameBot."""
+        own_hq = enemy_hq = None
+        for x, y, own in game_map.iter_hqs():
+            if own:
+                own_hq = x, y
+            else:
+                enemy_hq = x, y
+        model = cls(game_map.width, game_map.height, game_map.iter_blocked(), own_hq, enemy_hq, **options)
+        for unit in game_map.iter_own_units():
+            model.add_units((unit.x, unit.y), OWN, unit_ids=[str(unit.unit_id)])
+        for x, y, enemies_count in game_map.iter_enemy_tiles():
+            model.add_units((x, y), ENEMY, enemies_count)
+        return model
+
+    def add_units(self, tile, owner, amount=None, unit_ids=()):
+        """Place <amount> units of <owner> (OWN or ENEMY) on <tile>, or the
+        own units with <unit_ids>. It can't be undone."""
+        self.units[tile] = self.units.get(tile, 0) + (len(unit_ids) if amount is None else amount)
+        self.owner[tile] = owner
+        if unit_ids:
+            self.unit_ids[tile] = self.unit_ids.get(tile, ()) + tuple(unit_ids)
+            for unit_id in unit_ids:
+                self.unit_tiles[unit_id] = tile
+
+    def copy(self):
+        """An independent model with the same board, and nothing to undo."""
+        model = self.__class__.__new__(self.__class__)
+        model.__dict__.update(self.__dict__)
+        for table in ('units', 'owner', 'unit_ids', 'unit_tiles', 'moved'):
+            setattr(model, table, dict(getattr(self, table)))
+        model._changes = []
+        return model
+
+    def end_turn(self):
+        """Let every unit move again. It can't be undone."""
+        self.moved = {}
+        self._changes = []
+
+    def tile_owner(self, tile):
+        """OWN or ENEMY for the player the engine takes as the one in <tile>
+        (the owner of the HQ, if there is one), or None if it is empty."""
+        if tile == self.own_hq:
+            return OWN
+        if tile == self.enemy_hq:
+            return ENEMY
+        return self.owner.get(tile)
+
+    def in_map(self, tile):
+        x, y = tile
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def count_units(self, owner):
+        """Amount of units of <owner> on the board."""
+        return sum(units for tile, units in self.units.iteritems() if self.owner[tile] == owner)
+
+    @property
+    def enemy_hq_taken(self):
+        return self.enemy_hq is not None and self.owner.get(self.enemy_hq) == OWN
+
+    def _set(self, table, key, value):
+        """Set <table>[<key>] (or remove it, if <value> is _MISSING),
+        remembering the previous value to undo the current action."""
+        self._changes[-1].append((table, key, table.get(key, _MISSING)))
+        if value is _MISSING:
+            table.pop(key, None)
+        else:
+            table[key] = value
+
+    def apply(self, action):
+        """Apply <action>, a dict as GameBot sends them to the engine.
+        @return: <str> with the reason it is not valid, '' if it was applied.
+        Both can be undone.
+        """
+        self._changes.append([])
+        if action['action_type'] == 'MOVE':
+            return self._move(str(action['unit_id']), tuple(action['direction']))
+        if action['action_type'] == 'ATTACK':
+            return self._attack(tuple(action['from']), tuple(action['to']))
+        return 'Unknown action {}'.format(action['action_type'])
+
+    def undo(self):
+        """Go back to the board before the last action applied."""
+        for table, key, value in reversed(self._changes.pop()):
+            if value is _MISSING:
+                table.pop(key, None)
+            else:
+                table[key] = value
+
+    def _move(self, unit_id, direction):
+        """Same checks as AttackUnit.move and Onagame2015GameController._validate_actions"""
+        origin = self.unit_tiles.get(unit_id)
+        if origin is None:
+            return 'Unknown unit {}'.format(unit_id)
+        if unit_id in self.moved:
+            return 'Unit {} moved twice'.format(unit_id)
+        if direction not in MOVEMENTS:
+            return 'Direction {} is invalid'.format(direction)
+        target = origin[0] + direction[0], origin[1] + direction[1]
+        if not self.in_map(target):
+            return 'Invalid position {}'.format(target)
+        if target in self.blocked:
+            return 'Blocked position {}'.format(target)
+        if target == self.own_hq and self.units.get(target):
+            return 'You can place only one unit on your base'
+        if self.owner.get(target) == ENEMY:
+            return 'All occupiers must be of the same team'
+
+        moved = min(1, self.units[origin])
+        ids = self.unit_ids[origin]
+        index = ids.index(unit_id)
+        self._set(self.unit_ids, origin, ids[:index] + ids[index + 1:] or _MISSING)
+        self._set(self.unit_ids, target, self.unit_ids.get(target, ()) + (unit_id,))
+        self._set(self.unit_tiles, unit_id, target)
+        self._set(self.moved, unit_id, True)
+        self._remove_units(origin, moved)
+        self._set(self.units, target, self.units.get(target, 0) + moved)
+        self._set(self.owner, target, OWN)
+        return ''
+
+    def _attack(self, source, target):
+        """Same checks as AttackAction._run_attack_validations."""
+        if not (self.in_map(source) and self.in_map(target)):
+            return 'Invalid coordinates'
+        if not 1 <= abs(source[0] - target[0]) + abs(source[1] - target[1]) <= 2:
+            return 'Invalid attack range'
+        if self.tile_owner(source) is None or self.tile_owner(target) is None:
+            return 'One of the tiles is empty'
+        if self.tile_owner(source) == self.tile_owner(target):
+            return 'Friendly fire!'
+        if self.tile_owner(source) != OWN:
+            return 'Not an own tile'
+
+        attacker_units, defender_units = self.units.get(source, 0), self.units.get(target, 0)
+        table = outcome_table(dice_for_units(int(math.ceil(attacker_units))),
+                              dice_for_units(int(math.ceil(defender_units))))
+        if self.attacks == EXPECTED:
+            attacker_loses, defender_loses = [float(loses) for loses in table.expected_losses()]
+        else:
+            _, _, attacker_loses, defender_loses = table.sample(self.rng)
+        self._remove_units(source, min(attacker_loses, attacker_units))
+        self._remove_units(target, min(defender_loses, defender_units))
+        return ''
+
+    def _remove_units(self, tile, amount):
+        """Remove <amount> units from <tile>, the first ones to have arrived
+        first, as the engine does."""
+        if not amount:
+            return
+        left = self.units[tile] - amount
+        if left <= 0:
+            self._set(self.units, tile, _MISSING)
+            self._set(self.owner, tile, _MISSING)
+        else:
+            self._set(self.units, tile, left)
+        ids = self.unit_ids.get(tile, ())
+        # as many ids as units are left, counting a fraction of a unit as one
+        removed = len(ids) - int(math.ceil(max(left, 0)))
+        if removed > 0:
+            for unit_id in ids[:removed]:
+                self._set(self.unit_tiles, unit_id, _MISSING)
+            self._set(self.unit_ids, tile, ids[removed:] or _MISSING)
@@ -1,5 +1,10 @@
 import re
 from basebot import BaseBot
+# The bots can use the modules of onagame2015 that don't need the engine
+# (arena, engine and what they import)
+from onagame2015.forward import ForwardModel
+from onagame2015.lib import TILE_ENEMY_HQ, TILE_OWN_HQ, TILE_REACHABLE, TILE_VISIBLE
+from onagame2015.pathfinding import Pathfinder
 
 HQ_expression = re.compile(r"HQ:(\d+)Id:(\d+)")
 UNIT_expression = re.compile(r"U:(\d+)Id:(\d+)")
@@ -10,6 +15,10 @@ class InvalidActionException(Exception):
     pass
 
 
+class MapOutOfSync(Exception):
+    """A map delta arrived that does not follow the last map received."""
+
+
 class PointInMap(object):
 
     def __init__(self, coord_x, coord_y):
@@ -55,9 +64,157 @@ class Tile(PointInMap):
 
         self.reachable = BLOCK_expression.match(content_str) is None
 
+    @classmethod
+    def from_compact(cls, player_id, content, coord_x, coord_y):
+        """Build the tile from its 'compact' encoding, where <content> is
+        either the flags of the tile, or
+        [<flags>, <units_owner>, <n_units>, [<own_unit_id>, ...]]
+        """
+        tile = cls.__new__(cls)
+        PointInMap.__init__(tile, coord_x, coord_y)
+        if isinstance(content, list):
+            flags, owner, n_units, own_units = content
+            tile.units = [PlayerUnit(unit_id=unit_id, coord_x=coord_x, coord_y=coord_y)
+                          for unit_id in own_units]
+            tile.enemies_count = 0 if str(owner) == player_id else n_units
+        else:
+            flags = content
+            tile.units = []
+            tile.enemies_count = 0
+        tile.own_hq = bool(flags & TILE_OWN_HQ)
+        tile.enemy_hq = bool(flags & TILE_ENEMY_HQ)
+        # tiles under the fog are taken as reachable, as with the strings
+        tile.reachable = bool(flags & TILE_REACHABLE or not flags & TILE_VISIBLE)
+        return tile
+
 
 class Map(dict):
-    pass
+    """The map of a turn, indexed by (x, y).
+
+    It keeps the rows of tiles as they came from the engine, and only builds
+    (and caches) the Tile objects that are looked up, so bots pay for the
+    part of the map they use. It is valid for the turn it was parsed on.
+    """
+
+    def __init__(self, rows=(), player_id=None, make_tile=Tile):
+        super(Map, self).__init__()
+        self._rows = rows
+        self._player_id = player_id
+        self._make_tile = make_tile
+        self.height = len(rows)
+        self.width = len(rows[0]) if rows else 0
+
+    def _in_map(self, key):
+        try:
+            x, y = key
+            return 0 <= x < self.width and 0 <= y < self.height
+        except (TypeError, ValueError):
+            return False
+
+    def __missing__(self, key):
+        if not self._in_map(key):
+            raise KeyError(key)
+        x, y = key
+        tile = self._make_tile(
+            player_id=self._player_id,
+            content=self._rows[y][x],
+            coord_x=x,
+            coord_y=y
+        )
+        dict.__setitem__(self, (x, y), tile)
+        return tile
+
+    def __contains__(self, key):
+        return self._in_map(key)
+
+    def has_key(self, key):
+        return self._in_map(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __len__(self):
+        return self.width * self.height
+
+    def iterkeys(self):
+        for y in xrange(self.height):
+            for x in xrange(self.width):
+                yield x, y
+
+    __iter__ = iterkeys
+
+    def itervalues(self):
+        for key in self.iterkeys():
+            yield self[key]
+
+    def iteritems(self):
+        for key in self.iterkeys():
+            yield key, self[key]
+
+    def keys(self):
+        return list(self.iterkeys())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def iter_own_units(self):
+        """Generator over the units of the player, as PlayerUnit, without
+        building the tiles."""
+        player_id = self._player_id
+        marker = 'U:{}Id:'.format(player_id)
+        for y, row in enumerate(self._rows):
+            for x, content in enumerate(row):
+                if isinstance(content, list):
+                    if str(content[1]) == player_id:
+                        for unit_id in content[3]:
+                            yield PlayerUnit(unit_id=unit_id, coord_x=x, coord_y=y)
+                elif isinstance(content, basestring) and marker in content:
+                    for item in content.split(','):
+                        if item.startswith(marker):
+                            yield PlayerUnit(unit_id=item[len(marker):], coord_x=x, coord_y=y)
+
+    def iter_blocked(self):
+        """Generator over the (x, y) of the visible blocked tiles, without
+        building the tiles."""
+        for y, row in enumerate(self._rows):
+            for x, content in enumerate(row):
+                if content == TILE_VISIBLE or (isinstance(content, basestring) and content.startswith('B')):
+                    yield x, y
+
+    def iter_hqs(self):
+        """Generator over the visible headquarters, as (x, y, <bool>
+        indicating if it is the one of the player), without building the
+        tiles."""
+        for y, row in enumerate(self._rows):
+            for x, content in enumerate(row):
+                if isinstance(content, basestring):
+                    for p_id, _ in HQ_expression.findall(content):
+                        yield x, y, p_id == self._player_id
+                else:
+                    flags = content[0] if isinstance(content, list) else content
+                    if flags & (TILE_OWN_HQ | TILE_ENEMY_HQ):
+                        yield x, y, bool(flags & TILE_OWN_HQ)
+
+    def iter_enemy_tiles(self):
+        """Generator over the tiles with enemy units, as (x, y, enemies_count),
+        without building the tiles."""
+        marker = 'U:{}Id:'.format(self._player_id)
+        for y, row in enumerate(self._rows):
+            for x, content in enumerate(row):
+                if isinstance(content, list):
+                    if str(content[1]) != self._player_id:
+                        yield x, y, content[2]
+                elif isinstance(content, basestring) and 'U:' in content:
+                    enemies_count = sum(1 for item in content.split(',')
+                                        if item.startswith('U:') and not item.startswith(marker))
+                    if enemies_count:
+                        yield x, y, enemies_count
 
 
 class GameBot(BaseBot):
@@ -73,6 +230,14 @@ class GameBot(BaseBot):
 
     DIRECTIONS = [NW, N, NE, W, SE, S, SW, W]
 
+    # Last map received, kept to apply the deltas sent by the engine
+    _raw_map = None
+    _map_version = 0
+    _pathfinder = None
+    _pathfinder_map = None
+    # Seconds to respond to the current turn, if the game has a time limit
+    time_left = None
+
     def parse(self, feedback):
         """:feedback: <dict> that has
         {
@@ -81,22 +246,66 @@ class GameBot(BaseBot):
                [<tile_str>, .... ],
            ],
         }
+        or, when the engine sends only what changed since the last turn,
+        {
+           'payer_num': <player_id>,
+           'map_delta': [[x, y, <tile_str>], ...],
+           'map_version': <n>,
+        }
+        With 'map_encoding': 'compact' the tiles come as described in
+        Tile.from_compact instead of strings.
         """
-        game_map = Map()
         player_id = str(feedback['player_num'])
-        for y, row in enumerate(feedback['map']):
-            for x, tile_str in enumerate(row):
-                game_map[x, y] = Tile(
-                    player_id=player_id,
-                    content=tile_str,
-                    coord_x=x,
-                    coord_y=y
-                )
+        if feedback.get('map_encoding') == 'compact':
+            make_tile = Tile.from_compact
+        else:
+            make_tile = Tile
+        game_map = Map(self._update_raw_map(feedback), player_id, make_tile)
         self.game_map = game_map
         return player_id, game_map
 
+    def _update_raw_map(self, feedback):
+        """Return the map of tile strings for this turn, applying the delta
+        in <feedback> over the previous one if that's what was sent."""
+        version = feedback.get('map_version', 0)
+        if 'map_delta' in feedback:
+            if self._raw_map is None or version != self._map_version + 1:
+                raise MapOutOfSync("Got map version {} after {}".format(version, self._map_version))
+            for x, y, tile_content in feedback['map_delta']:
+                self._raw_map[y][x] = tile_content
+        else:
+            self._raw_map = feedback['map']
+        self._map_version = version
+        return self._raw_map
+
+    @property
+    def pathfinder(self):
+        """Pathfinder over the tiles known to be blocked so far. The
+        distance fields it caches are kept from turn to turn, while no new
+        blocked tile shows up."""
+        if self._pathfinder is None:
+            self._pathfinder = Pathfinder(self.game_map.width, self.game_map.height)
+        if self._pathfinder_map is not self.game_map:
+            self._pathfinder.block(self.game_map.iter_blocked())
+            self._pathfinder_map = self.game_map
+        return self._pathfinder
+
+    def path_step(self, point, target):
+        """Direction to move to from <point> to get closer to <target>, both
+        PointInMap, or None if there is no way to get there. Tiles under the
+        fog are taken as reachable."""
+        step = self.pathfinder.next_step(point.as_tuple(), target.as_tuple())
+        if step is not None:
+            return PointInMap(*step)
+
+    def forward_model(self, **options):
+        """A ForwardModel of the map of this turn, to try actions on it
+        before sending them (see onagame2015.forward)."""
+        return ForwardModel.from_map(self.game_map, **options)
+
     def on_turn(self, feedback):
         self.actions = []
+        self.time_left = feedback.get('time_left')
         player_id, game_map = self.parse(feedback)
         self.play(player_id, game_map)
         return {'ACTIONS': self.actions}
@@ -0,0 +1,138 @@
+"""Play games between trusted bots in this process, without the sandbox.
+
+The sandboxed games of turnboxed run each bot in its own process; this
+runner drives the same Onagame2015GameController, calling get_turn_data and
+evaluate_turn directly with bot instances (BaseBot/GameBot, or anything with
+an on_turn method). The turns go as in the sandbox: every player, in the
+order they were added, once per round. The data goes through JSON both ways,
+as it would between processes, and a bot that raises an exception is
+reported to the controller as a crash, so the game ends the same way. With
+a time limit (turn_time_limit or time_bank of the controller), a bot that
+goes over the time it has left is interrupted (with a timer signal, so only
+in the main thread on Unix), and the controller ends the game.
+
+    game = HeadlessGame([load_bot('bots/bot1/script.py'), load_bot('bots/bot2/script.py')], seed=1)
+    game.run()
+    trace = game.controller.json
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+
+from onagame2015.bot import BotPlayer
+from onagame2015.engine import Onagame2015GameController
+from onagame2015.lib import BotTimeoutException
+
+
+# gamebot modules shipped with the bots, by directory. They are kept alive
+# here, since Python 2 clears the globals of a module once it is collected.
+_shipped_gamebots = {}
+
+
+def _prepare_gamebot(directory):
+    """Make `import gamebot` give the gamebot.py in <directory>, as in the
+    sandbox, or the one of onagame2015 if the bot doesn't ship its own."""
+    if os.path.exists(os.path.join(directory, 'gamebot.py')):
+        # imported from the directory of the script the first time
+        sys.modules.pop('gamebot', None)
+        if directory in _shipped_gamebots:
+            sys.modules['gamebot'] = _shipped_gamebots[directory]
+    else:
+        from onagame2015 import gamebot
+        sys.modules['gamebot'] = gamebot
+
+
+def load_bot_class(script):
+    """The Bot class defined in the file <script>, as the sandbox loads it:
+    with the directory of the script first in sys.path, so it imports the
+    modules it ships with (gamebot among them)."""
+    directory = os.path.dirname(os.path.abspath(script))
+    _prepare_gamebot(directory)
+    namespace = {'__name__': 'bot_script', '__file__': script}
+    with open(script) as fh:
+        code = compile(fh.read(), script, 'exec')
+    sys.path.insert(0, directory)
+    try:
+        exec code in namespace
+    finally:
+        sys.path.remove(directory)
+    if os.path.exists(os.path.join(directory, 'gamebot.py')) and 'gamebot' in sys.modules:
+        _shipped_gamebots[directory] = sys.modules['gamebot']
+    return namespace['Bot']
+
+
+def load_bot(script):
+    """Instance of the Bot class defined in the file <script>."""
+    return load_bot_class(script)()
+
+
+def _raise_timeout(signum, frame):
+    raise BotTimeoutException()
+
+
+@contextmanager
+def time_limit(seconds):
+    """Raise BotTimeoutException in the block if it takes more than
+    <seconds> (None for no limit). Where there are no timer signals, it
+    does not limit anything."""
+    if seconds is None or not hasattr(signal, 'setitimer') or \
+            threading.current_thread().name != 'MainThread':
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    # a timer of 0 would never go off
+    signal.setitimer(signal.ITIMER_REAL, max(seconds, 1e-6))
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class HeadlessGame(object):
+    """A game between the <bots> instances, named <usernames> (bot1, bot2...
+    by default). The other keyword arguments go to the controller.
+    Without <serialize>, the bots get the data of the controller as it is,
+    instead of a copy through JSON.
+    """
+
+    def __init__(self, bots, usernames=None, serialize=True, **controller_options):
+        usernames = usernames or ['bot{}'.format(p_num) for p_num in range(1, len(bots) + 1)]
+        players = [BotPlayer(username, None, p_num) for p_num, username in enumerate(usernames, 1)]
+        self.controller = Onagame2015GameController(players, **controller_options)
+        # The usernames are the cookies of the players
+        self.controller.players = {username: {'player_id': username} for username in usernames}
+        self._bots = zip(usernames, bots)
+        self.serialize = serialize
+
+    def _copy(self, data):
+        return json.loads(json.dumps(data)) if self.serialize else data
+
+    def _play_turn(self, bot, turn_data):
+        """Ask <bot> for its actions.
+        @return: <dict> with the request the controller gets from a sandbox
+        """
+        try:
+            with time_limit(turn_data.get('time_left')):
+                return {'MSG': self._copy(bot.on_turn(self._copy(turn_data)))}
+        except BotTimeoutException:
+            # the controller sees it took too long
+            return {'MSG': {'ACTIONS': []}}
+        except Exception as exc:
+            return {'EXCEPTION': repr(exc), 'TRACEBACK': traceback.format_exc()}
+
+    def run(self):
+        """Play until the controller finishes the game.
+        @return: the controller, with the trace of the game
+        """
+        controller = self.controller
+        while True:
+            for bot_cookie, bot in self._bots:
+                request = self._play_turn(bot, controller.get_turn_data(bot_cookie))
+                if controller.evaluate_turn(request, bot_cookie) == -1:
+                    return controller
+            controller.current_round += 1
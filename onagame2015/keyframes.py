@@ -0,0 +1,111 @@
+"""Rebuild the board at any turn of a game from its trace.
+
+The board is the owner and amount of units of every occupied tile, and the
+headquarters. Replaying the MOVE_UNITS and ATTACK actions from the initial
+stage gives the board at any turn; games traced with keyframes (full
+boards taken every K turns, see GameStatus.add_keyframe) only need to
+replay the actions after the closest keyframe.
+
+A keyframe is:
+
+    {
+        'turn_number': <n>,
+        'action_index': <amount of actions traced before it>,
+        'tiles': [[x, y, player, units], ...],
+        'hqs': [[x, y, player], ...],
+    }
+"""
+import bisect
+from itertools import islice
+
+from onagame2015.lib import GameStages
+
+
+class Board(object):
+    """Occupied tiles and headquarters, keyed by (x, y) as in the trace."""
+
+    def __init__(self, tiles=None, hqs=None):
+        self.tiles = tiles or {}  # (x, y) -> [player, units]
+        self.hqs = hqs or {}  # (x, y) -> player
+
+    @classmethod
+    def from_initial(cls, initial_status):
+        """Board before any action: the units of each player in its HQ."""
+        board = cls()
+        for player in initial_status.get('players', ()):
+            tile = player['position']['x'], player['position']['y']
+            board.hqs[tile] = player['id']
+            board.tiles[tile] = [player['id'], player['units']]
+        return board
+
+    @classmethod
+    def from_keyframe(cls, keyframe):
+        return cls(
+            tiles={(x, y): [player, units] for x, y, player, units in keyframe['tiles']},
+            hqs={(x, y): player for x, y, player in keyframe['hqs']},
+        )
+
+    def to_keyframe(self):
+        return {
+            'tiles': sorted([x, y, player, units] for (x, y), (player, units) in self.tiles.iteritems()),
+            'hqs': sorted([x, y, player] for (x, y), player in self.hqs.iteritems()),
+        }
+
+    def _set_units(self, tile, player, units):
+        if units > 0:
+            self.tiles[tile] = [player, units]
+        else:
+            self.tiles.pop(tile, None)
+
+    def apply(self, action):
+        """Update the board with an action of the trace."""
+        origin = action['from']['tile']['x'], action['from']['tile']['y']
+        end = action['to']['tile']['x'], action['to']['tile']['y']
+        if action['action'] == 'MOVE_UNITS':
+            moved = action['to']['units']
+            # The player of a move is the one in the tile it ends in (the
+            # owner of the HQ, if it is moving into one), so the owner of
+            # the units is taken from the origin
+            player, units = self.tiles.get(origin, (action['player'], 0))
+            self._set_units(origin, player, units - moved)
+            _, units = self.tiles.get(end, (None, 0))
+            self._set_units(end, player, units + moved)
+        elif action['action'] == 'ATTACK':
+            self._set_units(origin, action['player'], action['from']['remaining_units'])
+            self._set_units(end, action['to']['player'], action['to']['remaining_units'])
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and (self.tiles, self.hqs) == (other.tiles, other.hqs)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Board(tiles={!r}, hqs={!r})'.format(self.tiles, self.hqs)
+
+
+def closest_keyframe(keyframes, turn_number):
+    """The last of <keyframes> (sorted as traced) taken at <turn_number> or
+    before, or None."""
+    position = bisect.bisect_right([keyframe['turn_number'] for keyframe in keyframes], turn_number)
+    return keyframes[position - 1] if position else None
+
+
+def board_at_turn(game_data, turn_number):
+    """Board once every action of <turn_number> and the previous turns was
+    played, for the game traced in <game_data> (the document of
+    GameStatus.json).
+    @return: <Board>
+    """
+    keyframe = closest_keyframe(game_data.get(GameStages.KEYFRAMES) or [], turn_number)
+    if keyframe is None:
+        board = Board.from_initial(game_data[GameStages.INITIAL])
+        start = 0
+    else:
+        board = Board.from_keyframe(keyframe)
+        start = keyframe['action_index']
+    for action in islice(game_data[GameStages.TURNS], start, None):
+        if action.get('turn_number') > turn_number:
+            break
+        board.apply(action)
+    return board
@@ -43,6 +43,18 @@ UNIT_TYPE_BLOCKED = 'BLOCKED_UNIT'
 
 MAX_AMOUNT_OF_DICES_PER_PLAYER = 3
 
+# How the tiles of the map are sent to the bots:
+# 'string': the repr of the tile, like "HQ:1Id:3,U:1Id:7"
+# 'compact': the TILE_* flags of the tile, or if it has units,
+#            [<flags>, <units_owner>, <n_units>, [<own_unit_id>, ...]]
+MAP_ENCODINGS = ('string', 'compact')
+FOG_COMPACT = 0
+TILE_VISIBLE = 1
+TILE_REACHABLE = 2
+TILE_OWN_HQ = 4
+TILE_ENEMY_HQ = 8
+FOG_VALUES = {'string': FOG_CONSTANT, 'compact': FOG_COMPACT}
+
 
 class GameStages(object):
     INITIAL = 'initial'
@@ -50,6 +62,8 @@ class GameStages(object):
     FINAL = 'final'
 
     stages = (INITIAL, TURNS, FINAL)
+    # Optional, only in the traces of games with keyframes
+    KEYFRAMES = 'keyframes'
 
 
 class InvalidBotOutput(Exception):
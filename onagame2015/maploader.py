@@ -1,13 +1,33 @@
+import hashlib
 import json
 import os
+import struct
+import tempfile
+from collections import OrderedDict
 from onagame2015.lib import Coordinate
 
 CURRENT_DIR = os.path.split(__file__)[0]
 
+# Compiled maps: a header, the (x, y) of the eligible HQs, and one byte per
+# tile of the grid, row by row. They are stored next to the Tiled JSON
+# they come from, and are only used while the sha1 of the JSON matches.
+COMPILED_MAP_EXTENSION = '.bin'
+COMPILED_MAP_MAGIC = 'ONAMAP01'
+COMPILED_MAP_HEADER = struct.Struct('<8s20sIIIII')  # magic, sha1, width, height, columns, rows, HQs
+COMPILED_MAP_HQ = struct.Struct('<II')
+TILE_BLOCKED, TILE_REACHABLE, TILE_MISSING = 0, 1, 255
+
+# Maps already loaded in this process, see load_map
+MAP_CACHE_SIZE = 16
+_map_cache = OrderedDict()
+
+
 class GameMap(dict):
 
     def __init__(self):
         self.eligible_hqs = set()
+        self._width = None
+        self._height = None
 
     @classmethod
     def create_empty_map(cls, width, height):
@@ -21,19 +41,31 @@ class GameMap(dict):
             Coordinate(width, 0),
             Coordinate(width, height),
         ))
+        obj.store_size()
         return obj
 
+    def store_size(self):
+        """Keep width and height, so they are not derived from the keys each
+        time. To be called once the map is built."""
+        self._width = self._height = None
+        self._width, self._height = self.width, self.height
+
     @property
     def width(self):
+        if self._width is not None:
+            return self._width
         return max(self.keys(), key=lambda e: e[0])[0]
 
     @property
     def height(self):
+        if self._height is not None:
+            return self._height
         return max(self.keys(), key=lambda e: e[1])[1]
 
     def iterrows(self):
+        width = self.width
         for y in xrange(0, self.height):
-            yield (self[x, y] for x in xrange(0, self.width))
+            yield (self[x, y] for x in xrange(0, width))
 
 
 def iterate_over_layer(layer):
@@ -43,23 +75,126 @@ def iterate_over_layer(layer):
         yield Coordinate(x, y), value
 
 
-def load_map(map_name):
-    with open(os.path.join(CURRENT_DIR, 'maps', map_name)) as fh:
-        data = json.load(fh)
+def parse_map(data):
+    """Build the GameMap for the Tiled map in <data>."""
+    output = GameMap()
+    for layer in data.get('layers'):
+        name = layer['name'].lower()
+        if name in ('water layer', 'blocking layer'):
+            for coords, value in iterate_over_layer(layer):
+                current = output.setdefault(coords, True)
+                output[coords] = current and not bool(value)
+
+        elif name == 'hq layer':
+            for coords, value in iterate_over_layer(layer):
+                if value:
+                    output.eligible_hqs.add(coords)
+
+    output.store_size()
+    return output
+
+
+def compile_map(game_map, digest, columns, rows):
+    """@return: <str> with the compiled version of <game_map>, whose grid is
+    of <columns> x <rows>, for the JSON with sha1 <digest>."""
+    hqs = sorted(game_map.eligible_hqs)
+    grid = bytearray(TILE_MISSING for _ in xrange(columns * rows))
+    for (x, y), reachable in game_map.iteritems():
+        grid[y * columns + x] = TILE_REACHABLE if reachable else TILE_BLOCKED
+    return ''.join([
+        COMPILED_MAP_HEADER.pack(COMPILED_MAP_MAGIC, digest, game_map.width, game_map.height,
+                                 columns, rows, len(hqs)),
+        ''.join(COMPILED_MAP_HQ.pack(x, y) for x, y in hqs),
+        str(grid),
+    ])
+
+
+def load_compiled_map(path, digest):
+    """Load the compiled map in <path>, if it exists and was compiled from
+    the JSON with sha1 <digest>, otherwise return None."""
+    try:
+        with open(path, 'rb') as fh:
+            data = fh.read()
+    except (IOError, OSError):
+        return None
+    try:
+        magic, map_digest, width, height, columns, rows, n_hqs = COMPILED_MAP_HEADER.unpack_from(data)
+        if magic != COMPILED_MAP_MAGIC or map_digest != digest:
+            return None
+        offset = COMPILED_MAP_HEADER.size
         output = GameMap()
-        for layer in data.get('layers'):
-            name = layer['name'].lower()
-            if name in ('water layer', 'blocking layer'):
-                for coords, value in iterate_over_layer(layer):
-                    current = output.setdefault(coords, True)
-                    output[coords] = current and not bool(value)
-
-            elif name == 'hq layer':
-                for coords, value in iterate_over_layer(layer):
-                    if value:
-                        output.eligible_hqs.add(coords)
-
-        return output
+        for _ in xrange(n_hqs):
+            output.eligible_hqs.add(Coordinate(*COMPILED_MAP_HQ.unpack_from(data, offset)))
+            offset += COMPILED_MAP_HQ.size
+        grid = bytearray(data[offset:offset + columns * rows])
+    except struct.error:
+        return None
+    if len(grid) != columns * rows:
+        return None
+    for y in xrange(rows):
+        row_offset = y * columns
+        for x in xrange(columns):
+            value = grid[row_offset + x]
+            if value != TILE_MISSING:
+                output[Coordinate(x, y)] = value == TILE_REACHABLE
+    output._width, output._height = width, height
+    return output
+
+
+def _load_map_file(path):
+    with open(path, 'rb') as fh:
+        source = fh.read()
+    digest = hashlib.sha1(source).digest()
+    compiled_path = os.path.splitext(path)[0] + COMPILED_MAP_EXTENSION
+    game_map = load_compiled_map(compiled_path, digest)
+    if game_map is None:
+        data = json.loads(source)
+        game_map = parse_map(data)
+        _write_compiled_map(compiled_path, compile_map(game_map, digest, data['width'], data['height']))
+    return game_map
+
+
+def _write_compiled_map(path, compiled):
+    """Write <compiled> to <path> through a temporary file renamed into
+    place, so the processes loading the map at the same time never read it
+    half written."""
+    try:
+        fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=COMPILED_MAP_EXTENSION)
+    except (IOError, OSError):
+        return  # read only installation, parse the JSON every time
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(compiled)
+        # mkstemp makes it readable only by its owner
+        os.chmod(temporary_path, 0o644)
+        os.rename(temporary_path, path)
+    except (IOError, OSError):
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+
+
+def load_map(map_name):
+    """Return the GameMap for the map <map_name> in the maps directory.
+    Maps are cached in the process, and shared by every game that loads them,
+    so they are not to be modified.
+    """
+    path = os.path.join(CURRENT_DIR, 'maps', map_name)
+    stat = os.stat(path)
+    key = path, stat.st_mtime, stat.st_size
+    try:
+        game_map = _map_cache.pop(key)
+    except KeyError:
+        game_map = _load_map_file(path)
+        if len(_map_cache) >= MAP_CACHE_SIZE:
+            _map_cache.popitem(last=False)
+    _map_cache[key] = game_map
+    return game_map
+
+
+def clear_map_cache():
+    _map_cache.clear()
 
 
 if __name__ == '__main__':
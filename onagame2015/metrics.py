@@ -0,0 +1,149 @@
+"""Counters and histograms of the games, for the game farm.
+
+Onagame2015GameController records what it plays in a sink (its metrics
+option): the turns (turns_total), the response time of the bots
+(bot_response_seconds), their crashes (bot_crashes_total), the games
+(games_total) and how many rounds they lasted (game_rounds), with
+
+    sink.increment('turns_total')
+    sink.observe('bot_response_seconds', 0.12)
+
+and calls sink.flush() when each game ends. A sink can be shared by the
+controllers of a process, to add up all their games. The sinks here:
+
+- MemorySink keeps every value, for the tests.
+- PrometheusFileSink keeps the totals and writes them in the Prometheus
+  text format to a file, e.g. for the textfile collector of node_exporter.
+- StatsdSink sends them to a statsd server over UDP, in packets of several
+  metrics.
+
+Recording is a dict update or a string append, so it can be left on.
+Without a sink, the controller has NULL_SINK, which records nothing.
+"""
+import bisect
+import os
+import socket
+
+# Upper bounds of the buckets of each histogram, for PrometheusFileSink
+BUCKETS = {
+    'bot_response_seconds': (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'game_rounds': (10, 25, 50, 100, 150, 199, 200),
+}
+# the ones of the Prometheus clients
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class NullSink(object):
+    """Sink that records nothing."""
+
+    def increment(self, name, value=1):
+        """Add <value> to the counter <name>."""
+
+    def observe(self, name, value):
+        """Add <value> to the histogram <name>."""
+
+    def flush(self):
+        """Send or write what was recorded so far."""
+
+
+NULL_SINK = NullSink()
+
+
+class MemorySink(NullSink):
+
+    def __init__(self):
+        self.counters = {}  # name -> total
+        self.observations = {}  # name -> [value, ...] in the order they were recorded
+
+    def increment(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        self.observations.setdefault(name, []).append(value)
+
+
+class PrometheusFileSink(NullSink):
+    """Writes the metrics to <path> on each flush, as '<prefix><name>', with
+    the histograms in BUCKETS, updated with <buckets>."""
+
+    def __init__(self, path, prefix='onagame2015_', buckets=None):
+        self.path = path
+        self.prefix = prefix
+        self.buckets = dict(BUCKETS, **(buckets or {}))
+        self.counters = {}
+        self._histograms = {}  # name -> [bounds, [count per bucket, ..., count over the last bound], sum]
+
+    def increment(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        try:
+            histogram = self._histograms[name]
+        except KeyError:
+            bounds = self.buckets.get(name, DEFAULT_BUCKETS)
+            histogram = self._histograms[name] = [bounds, [0] * (len(bounds) + 1), 0]
+        histogram[1][bisect.bisect_left(histogram[0], value)] += 1
+        histogram[2] += value
+
+    def render(self):
+        """@return: <str> with the metrics in the Prometheus text format"""
+        lines = []
+        for name, value in sorted(self.counters.iteritems()):
+            name = self.prefix + name
+            lines.append('# TYPE {} counter'.format(name))
+            lines.append('{} {!r}'.format(name, value))
+        for name, (bounds, counts, total) in sorted(self._histograms.iteritems()):
+            name = self.prefix + name
+            lines.append('# TYPE {} histogram'.format(name))
+            cumulative = 0
+            for bound, count in zip([repr(float(bound)) for bound in bounds] + ['+Inf'], counts):
+                cumulative += count
+                lines.append('{}_bucket{{le="{}"}} {}'.format(name, bound, cumulative))
+            lines.append('{}_sum {!r}'.format(name, total))
+            lines.append('{}_count {}'.format(name, cumulative))
+        return '\n'.join(lines) + '\n'
+
+    def flush(self):
+        # readers never see a file half written
+        with open(self.path + '.tmp', 'w') as fh:
+            fh.write(self.render())
+        os.rename(self.path + '.tmp', self.path)
+
+
+class StatsdSink(NullSink):
+    """Sends the metrics to the statsd server at <host>:<port>, as
+    '<prefix><name>', with the histograms as <histogram_type> ('h', or 'ms'
+    for servers that only take timers)."""
+
+    # bytes of metrics in a packet, to fit in the MTU of most networks
+    MAX_PACKET_SIZE = 1432
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='onagame2015.', histogram_type='h'):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.histogram_type = histogram_type
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._lines = []
+        self._size = 0
+
+    def _add(self, line):
+        if self._size + len(line) >= self.MAX_PACKET_SIZE:
+            self.flush()
+        self._lines.append(line)
+        self._size += len(line) + 1
+
+    def increment(self, name, value=1):
+        self._add('{}{}:{!r}|c'.format(self.prefix, name, value))
+
+    def observe(self, name, value):
+        self._add('{}{}:{!r}|{}'.format(self.prefix, name, value, self.histogram_type))
+
+    def flush(self):
+        if not self._lines:
+            return
+        try:
+            self._socket.sendto('\n'.join(self._lines), self.address)
+        except socket.error:
+            pass  # losing metrics is better than stopping a game
+        self._lines = []
+        self._size = 0
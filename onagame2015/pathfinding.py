@@ -0,0 +1,106 @@
+"""Shortest paths for the bots, over the 8 directions a unit can move to.
+
+Terrain doesn't change during a game, so the distances to a target are
+calculated once, with a BFS from the target, and shared by every unit going
+there. Only the fields for the most recently used targets are kept.
+GameBot.pathfinder keeps one for the whole game, blocking the tiles as they
+come into sight.
+"""
+from collections import deque, OrderedDict
+
+from onagame2015.lib import AVAILABLE_MOVEMENTS
+
+# as (x, y) tuples
+MOVEMENTS = tuple(tuple(movement) for movement in AVAILABLE_MOVEMENTS)
+
+UNREACHABLE = -1
+
+
+class DistanceField(object):
+    """Distance from every tile to <target>, and the direction to move to from
+    each tile to get one step closer to it."""
+
+    def __init__(self, width, height, blocked, target):
+        self.width = width
+        self.height = height
+        self.target = target
+        self._distances = [UNREACHABLE] * (width * height)
+        self._steps = [None] * (width * height)
+        self._calculate(blocked)
+
+    def _calculate(self, blocked):
+        width, height = self.width, self.height
+        distances, steps = self._distances, self._steps
+        target_x, target_y = self.target
+        distances[target_y * width + target_x] = 0
+        pending = deque([self.target])
+        while pending:
+            x, y = pending.popleft()
+            next_distance = distances[y * width + x] + 1
+            for delta_x, delta_y in MOVEMENTS:
+                neighbour_x, neighbour_y = x + delta_x, y + delta_y
+                if not (0 <= neighbour_x < width and 0 <= neighbour_y < height):
+                    continue
+                index = neighbour_y * width + neighbour_x
+                if distances[index] != UNREACHABLE or (neighbour_x, neighbour_y) in blocked:
+                    continue
+                distances[index] = next_distance
+                # from the neighbour, go back the way the BFS came
+                steps[index] = (-delta_x, -delta_y)
+                pending.append((neighbour_x, neighbour_y))
+
+    def _index(self, point):
+        x, y = point
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError("({}, {}) is out of the map".format(x, y))
+        return y * self.width + x
+
+    def distance(self, point):
+        """Amount of moves from <point> to the target, or UNREACHABLE."""
+        return self._distances[self._index(point)]
+
+    def next_step(self, point):
+        """Direction (x, y) to move to from <point> to get closer to the
+        target, or None if it is already there or can't get there."""
+        return self._steps[self._index(point)]
+
+
+class Pathfinder(object):
+    """Keeps the blocked tiles known so far and an LRU cache of distance
+    fields, one per target."""
+
+    def __init__(self, width, height, blocked=(), cache_size=32):
+        self.width = width
+        self.height = height
+        self.cache_size = cache_size
+        self._blocked = set()
+        self._fields = OrderedDict()
+        self.block(blocked)
+
+    def block(self, tiles):
+        """Add <tiles> to the blocked ones. The cached fields are dropped if
+        there is any new one.
+        @return: <bool> indicating if there was a new blocked tile
+        """
+        new_tiles = set(tiles) - self._blocked
+        if new_tiles:
+            self._blocked |= new_tiles
+            self._fields.clear()
+        return bool(new_tiles)
+
+    def distance_field(self, target):
+        target = tuple(target)
+        try:
+            field = self._fields.pop(target)
+        except KeyError:
+            field = DistanceField(self.width, self.height, self._blocked, target)
+            if len(self._fields) >= self.cache_size:
+                self._fields.popitem(last=False)
+        self._fields[target] = field
+        return field
+
+    def distance(self, start, target):
+        return self.distance_field(target).distance(start)
+
+    def next_step(self, start, target):
+        return self.distance_field(target).next_step(start)
@@ -0,0 +1,86 @@
+"""Where the time of each turn goes, in the controller.
+
+Onagame2015GameController measures the phases of each turn with a profiler:
+rendering the map in get_turn_data, check_game_over, validating the actions
+(validate_actions), executing them (one phase per action type, MOVE and
+ATTACK) and updating the trace (update_game_status). Each phase is timed
+between start and stop:
+
+    start = profiler.start()
+    self._validate_actions(actions)
+    profiler.stop(bot, 'validate_actions', start)
+
+When profiling is off the controller has NULL_PROFILER, where these do
+nothing, so the turns pay a couple of empty calls per phase.
+"""
+import json
+from timeit import default_timer
+
+
+class NullProfiler(object):
+    """Profiler that measures nothing."""
+
+    enabled = False
+
+    def start(self):
+        return 0
+
+    def stop(self, bot, phase, start):
+        pass
+
+    def end_turn(self, bot, round_number):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class TurnProfiler(NullProfiler):
+    """Wall-clock time and calls of each phase of every turn, attributed to
+    the bot playing it."""
+
+    enabled = True
+
+    def __init__(self, clock=default_timer):
+        self.clock = clock
+        # {'round': <n>, 'player': <username>, 'phases': {<phase>: {'calls': <n>, 'seconds': <s>}}},
+        # for each turn, in the order they were played
+        self.turns = []
+        self._current = {}  # username -> the phases of the turn it is playing
+
+    def start(self):
+        return self.clock()
+
+    def stop(self, bot, phase, start):
+        elapsed = self.clock() - start
+        phases = self._current.setdefault(bot.username, {})
+        try:
+            measure = phases[phase]
+        except KeyError:
+            measure = phases[phase] = {'calls': 0, 'seconds': 0.0}
+        measure['calls'] += 1
+        measure['seconds'] += elapsed
+
+    def end_turn(self, bot, round_number):
+        """Close the turn <bot> played, with the phases measured since the
+        last one."""
+        self.turns.append({'round': round_number, 'player': bot.username,
+                           'phases': self._current.pop(bot.username, {})})
+
+    def summary(self):
+        """The totals of every phase, per bot.
+        @return: <dict> of username -> {<phase>: {'calls': <n>, 'seconds': <s>}}
+        """
+        totals = {}
+        for turn in self.turns:
+            phases = totals.setdefault(turn['player'], {})
+            for phase, measure in turn['phases'].iteritems():
+                total = phases.setdefault(phase, {'calls': 0, 'seconds': 0.0})
+                total['calls'] += measure['calls']
+                total['seconds'] += measure['seconds']
+        return totals
+
+    def write(self, path):
+        """Write the summary and the phases of every turn to <path>, as JSON."""
+        with open(path, 'w') as fh:
+            json.dump({'summary': self.summary(), 'turns': self.turns}, fh)
@@ -0,0 +1,339 @@
+"""Compact binary format for the replays of the games.
+
+The actions of the trace (GameStatus.json) are stored by turn, in blocks of
+consecutive actions with the same turn number. Each block is compressed on
+its own and keeps its actions column-wise: one array per field (kind,
+player, coordinates, units, dice, losses), instead of a dict per action.
+Actions that don't have the shape of the ones produced by GameTurn are
+kept as JSON in the block, so nothing is lost.
+
+Layout of a file:
+
+    MAGIC
+    block, block, ...                  zlib(columns + extra JSON)
+    metadata                           zlib(JSON: initial, final, keyframes, players, index)
+    footer                             offset and length of the metadata, MAGIC
+
+The index in the metadata has the offset of every block, so a turn is read
+without decoding the ones before it.
+
+To convert a JSON replay:
+
+    python -m onagame2015.replay game.json game.replay
+"""
+import json
+import struct
+import sys
+import zlib
+from array import array
+from itertools import groupby
+
+from onagame2015.lib import GameStages
+
+MAGIC = 'ONARPL01'
+FOOTER = struct.Struct('<QI8s')  # offset of the metadata, its length, MAGIC
+BLOCK_HEADER = struct.Struct('<IIIII')  # records, moves, attacks, dice, length of the extra JSON
+
+MOVE, ATTACK, EXTRA = 0, 1, 2
+
+# Columns of a block: those of every action, then those of the moves, those
+# of the attacks, and all the dice thrown, in this order
+COMMON_COLUMNS = (('kind', 'B'), ('player', 'H'), ('from_x', 'H'), ('from_y', 'H'),
+                  ('to_x', 'H'), ('to_y', 'H'))
+MOVE_COLUMNS = (('units', 'I'),)
+ATTACK_COLUMNS = (('defender', 'H'), ('attacker_remaining', 'I'), ('attacker_lost', 'I'),
+                  ('defender_remaining', 'I'), ('defender_lost', 'I'),
+                  ('attacker_n_dice', 'B'), ('defender_n_dice', 'B'))
+DICE_COLUMNS = (('dice', 'B'),)
+
+
+def _new_columns(spec):
+    return [(name, array(typecode)) for name, typecode in spec]
+
+
+def _fits(column, value):
+    """Whether <value> can be stored in the array <column> (of unsigned
+    integers) and read back as it was."""
+    return (isinstance(value, (int, long)) and not isinstance(value, bool) and
+            0 <= value < 1 << 8 * column.itemsize)
+
+
+def _pack_columns(columns):
+    output = []
+    for _, values in columns:
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        output.append(values.tostring())
+    return ''.join(output)
+
+
+def _unpack_columns(spec, data, offset, length):
+    columns = {}
+    for name, typecode in spec:
+        values = array(typecode)
+        size = values.itemsize * length
+        values.fromstring(data[offset:offset + size])
+        if sys.byteorder == 'big':
+            values.byteswap()
+        columns[name] = values
+        offset += size
+    return columns, offset
+
+
+def move_record(player, from_x, from_y, to_x, to_y, units, turn_number):
+    """Same record as GameTurn.summarize_moves"""
+    return {
+        'action': 'MOVE_UNITS',
+        'player': player,
+        'from': {
+            "tile": {"x": from_x, "y": from_y},
+        },
+        'to': {
+            "tile": {"x": to_x, "y": to_y},
+            "units": units
+        },
+        'turn_number': turn_number,
+    }
+
+
+def attack_record(player, from_x, from_y, to_x, to_y, defender, attacker_dice,
+                  attacker_remaining, attacker_lost, defender_dice, defender_remaining,
+                  defender_lost, turn_number):
+    """Same record as GameTurn.summarize_attacks"""
+    return {
+        "action": "ATTACK",
+        "player": player,
+        "from": {
+            "tile": {"x": from_x, "y": from_y},
+            "dice": attacker_dice,
+            "remaining_units": attacker_remaining,
+            "lost_units": attacker_lost
+        },
+        "to": {
+            "player": defender,
+            "tile": {"x": to_x, "y": to_y},
+            "dice": defender_dice,
+            "remaining_units": defender_remaining,
+            "lost_units": defender_lost
+        },
+        'turn_number': turn_number,
+    }
+
+
+class _BlockWriter(object):
+    """Encodes the actions of one block into columns."""
+
+    def __init__(self, players):
+        self.players = players  # player -> index in the table of players
+        self.common = _new_columns(COMMON_COLUMNS)
+        self.moves = _new_columns(MOVE_COLUMNS)
+        self.attacks = _new_columns(ATTACK_COLUMNS)
+        self.dice = _new_columns(DICE_COLUMNS)
+        self.extra = []
+        self.n_records = 0
+
+    def _player(self, player):
+        try:
+            return self.players[player]
+        except KeyError:
+            index = self.players[player] = len(self.players)
+            return index
+
+    def add(self, record, turn_number):
+        cells = self._cells(record, turn_number)
+        if cells is None:
+            self.extra.append(record)
+            cells = zip(self._columns(self.common), (EXTRA, self._player(record.get('player')), 0, 0, 0, 0))
+        for column, value in cells:
+            column.append(value)
+        self.n_records += 1
+
+    @staticmethod
+    def _columns(columns):
+        return [column for _, column in columns]
+
+    def _cells(self, record, turn_number):
+        """@return: <list> of (column, value) to store <record>, or None if it
+        doesn't have the shape of a move or an attack, or has values out of
+        the range of the columns."""
+        if record == self._as_move(record, turn_number):
+            kind, origin, end = MOVE, record['from'], record['to']
+            cells = zip(self._columns(self.moves), (end['units'],))
+        elif record == self._as_attack(record, turn_number):
+            kind, origin, end = ATTACK, record['from'], record['to']
+            cells = zip(self._columns(self.attacks), (
+                self._player(end['player']), origin['remaining_units'], origin['lost_units'],
+                end['remaining_units'], end['lost_units'], len(origin['dice']), len(end['dice'])))
+            cells.extend((self.dice[0][1], die) for die in origin['dice'] + end['dice'])
+        else:
+            return None
+        cells.extend(zip(self._columns(self.common), (
+            kind, self._player(record['player']), origin['tile']['x'], origin['tile']['y'],
+            end['tile']['x'], end['tile']['y'])))
+        if all(_fits(column, value) for column, value in cells):
+            return cells
+
+    @staticmethod
+    def _as_move(record, turn_number):
+        """The record as it is stored for a move, or None if it can't be."""
+        try:
+            return move_record(record['player'], record['from']['tile']['x'],
+                               record['from']['tile']['y'], record['to']['tile']['x'],
+                               record['to']['tile']['y'], record['to']['units'], turn_number)
+        except (KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _as_attack(record, turn_number):
+        try:
+            origin, end = record['from'], record['to']
+            return attack_record(record['player'], origin['tile']['x'], origin['tile']['y'],
+                                 end['tile']['x'], end['tile']['y'], end['player'],
+                                 origin['dice'], origin['remaining_units'],
+                                 origin['lost_units'], end['dice'], end['remaining_units'],
+                                 end['lost_units'], turn_number)
+        except (KeyError, TypeError):
+            return None
+
+    def encode(self, level):
+        extra = json.dumps(self.extra) if self.extra else ''
+        return zlib.compress(''.join([
+            BLOCK_HEADER.pack(self.n_records, len(self.moves[0][1]), len(self.attacks[0][1]),
+                              len(self.dice[0][1]), len(extra)),
+            _pack_columns(self.common + self.moves + self.attacks + self.dice),
+            extra,
+        ]), level)
+
+
+def _decode_block(data, players, turn_number):
+    data = zlib.decompress(data)
+    n_records, n_moves, n_attacks, n_dice, extra_length = BLOCK_HEADER.unpack_from(data)
+    offset = BLOCK_HEADER.size
+    common, offset = _unpack_columns(COMMON_COLUMNS, data, offset, n_records)
+    moves, offset = _unpack_columns(MOVE_COLUMNS, data, offset, n_moves)
+    attacks, offset = _unpack_columns(ATTACK_COLUMNS, data, offset, n_attacks)
+    dice, offset = _unpack_columns(DICE_COLUMNS, data, offset, n_dice)
+    extra = iter(json.loads(data[offset:offset + extra_length]) if extra_length else ())
+
+    records = []
+    move_index = attack_index = dice_index = 0
+    for index in xrange(n_records):
+        kind = common['kind'][index]
+        if kind == EXTRA:
+            records.append(next(extra))
+            continue
+        position = (players[common['player'][index]], common['from_x'][index],
+                    common['from_y'][index], common['to_x'][index], common['to_y'][index])
+        if kind == MOVE:
+            records.append(move_record(*position + (moves['units'][move_index], turn_number)))
+            move_index += 1
+            continue
+        attacker_n_dice = attacks['attacker_n_dice'][attack_index]
+        defender_n_dice = attacks['defender_n_dice'][attack_index]
+        attacker_dice = dice['dice'][dice_index:dice_index + attacker_n_dice].tolist()
+        dice_index += attacker_n_dice
+        defender_dice = dice['dice'][dice_index:dice_index + defender_n_dice].tolist()
+        dice_index += defender_n_dice
+        records.append(attack_record(*position + (
+            players[attacks['defender'][attack_index]], attacker_dice,
+            attacks['attacker_remaining'][attack_index], attacks['attacker_lost'][attack_index],
+            defender_dice, attacks['defender_remaining'][attack_index],
+            attacks['defender_lost'][attack_index], turn_number)))
+        attack_index += 1
+    return records
+
+
+def write_replay(game_data, stream, level=9):
+    """Write the game in <game_data> (the document of GameStatus.json, as a
+    dict) to the binary <stream> in the replay format."""
+    players = {}
+    index = []
+    offset = len(MAGIC)
+    stream.write(MAGIC)
+    actions = game_data.get(GameStages.TURNS) or []
+    for turn_number, records in groupby(actions, key=lambda record: record.get('turn_number')):
+        block = _BlockWriter(players)
+        for record in records:
+            block.add(record, turn_number)
+        data = block.encode(level)
+        stream.write(data)
+        index.append([turn_number, offset, len(data)])
+        offset += len(data)
+
+    metadata = zlib.compress(json.dumps({
+        GameStages.INITIAL: game_data.get(GameStages.INITIAL, {}),
+        GameStages.FINAL: game_data.get(GameStages.FINAL, {}),
+        GameStages.KEYFRAMES: game_data.get(GameStages.KEYFRAMES),
+        'players': sorted(players, key=players.get),
+        'index': index,
+    }), level)
+    stream.write(metadata)
+    stream.write(FOOTER.pack(offset, len(metadata), MAGIC))
+
+
+class ReplayReader(object):
+    """Reads a replay from the binary, seekable <stream>. Only the footer and
+    the metadata are read up front; the turns are read when asked for."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        stream.seek(-FOOTER.size, 2)
+        offset, length, magic = FOOTER.unpack(stream.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError("Not a replay")
+        stream.seek(offset)
+        metadata = json.loads(zlib.decompress(stream.read(length)))
+        self.initial = metadata[GameStages.INITIAL]
+        self.final = metadata[GameStages.FINAL]
+        self.keyframes = metadata.get(GameStages.KEYFRAMES)
+        self._players = metadata['players']
+        self._blocks = [tuple(block) for block in metadata['index']]
+        self._turn_blocks = {}  # turn_number -> [(offset, length), ...]
+        for turn_number, offset, length in self._blocks:
+            self._turn_blocks.setdefault(turn_number, []).append((offset, length))
+
+    @property
+    def turns(self):
+        """Turn numbers in the replay, in order."""
+        return sorted(self._turn_blocks)
+
+    def _read_block(self, turn_number, offset, length):
+        self._stream.seek(offset)
+        return _decode_block(self._stream.read(length), self._players, turn_number)
+
+    def read_turn(self, turn_number):
+        """@return: <list> of the actions of <turn_number>, as in the trace."""
+        records = []
+        for offset, length in self._turn_blocks.get(turn_number, ()):
+            records.extend(self._read_block(turn_number, offset, length))
+        return records
+
+    def iter_actions(self):
+        for turn_number, offset, length in self._blocks:
+            for record in self._read_block(turn_number, offset, length):
+                yield record
+
+    def game_data(self):
+        """@return: <dict> with the same document as GameStatus.json"""
+        game_data = {
+            GameStages.INITIAL: self.initial,
+            GameStages.TURNS: list(self.iter_actions()),
+            GameStages.FINAL: self.final,
+        }
+        if self.keyframes is not None:
+            game_data[GameStages.KEYFRAMES] = self.keyframes
+        return game_data
+
+
+def convert_json(json_path, replay_path):
+    """Write the JSON replay in <json_path> to <replay_path> in the binary
+    format."""
+    with open(json_path, 'rb') as fh:
+        game_data = json.load(fh)
+    with open(replay_path, 'wb') as fh:
+        write_replay(game_data, fh)
+
+
+if __name__ == '__main__':
+    convert_json(*sys.argv[1:3])
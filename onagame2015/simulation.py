@@ -0,0 +1,107 @@
+"""Monte Carlo simulation of engagements, for many scenarios at once.
+
+An engagement is a tile with some units attacking a tile with others again
+and again, as AttackAction resolves each attack (see onagame2015.dice),
+until one of them has no units left, or for a given amount of rounds. Every
+sample of every scenario is simulated at the same time, with NumPy arrays,
+drawing the losses of each attack from the exact outcome tables.
+"""
+import numpy
+
+from onagame2015.dice import outcome_table
+from onagame2015.lib import MAX_AMOUNT_OF_DICES_PER_PLAYER
+
+# Larger than any draw of random_sample, for the outcomes that don't exist
+_NEVER = 2.0
+
+
+def _loss_tables():
+    """Cumulative probability and losses of each outcome, for every pair of
+    amounts of dice, as arrays indexed by [attacker_n_dice, defender_n_dice,
+    outcome]."""
+    n_dice = MAX_AMOUNT_OF_DICES_PER_PLAYER + 1
+    shape = (n_dice, n_dice, MAX_AMOUNT_OF_DICES_PER_PLAYER + 1)
+    cumulative = numpy.empty(shape)
+    cumulative.fill(_NEVER)
+    attacker_loses = numpy.zeros(shape, dtype=numpy.int64)
+    defender_loses = numpy.zeros(shape, dtype=numpy.int64)
+    for attacker_n_dice in range(n_dice):
+        for defender_n_dice in range(n_dice):
+            key = attacker_n_dice, defender_n_dice
+            probability = 0
+            outcomes = sorted(outcome_table(*key).probabilities().iteritems())
+            for index, ((attacker_lost, defender_lost), outcome_probability) in enumerate(outcomes):
+                probability += outcome_probability
+                cumulative[key + (index,)] = float(probability)
+                attacker_loses[key + (index,)] = attacker_lost
+                defender_loses[key + (index,)] = defender_lost
+            cumulative[key + (len(outcomes) - 1,)] = 1.0
+    return cumulative, attacker_loses, defender_loses
+
+
+_CUMULATIVE, _ATTACKER_LOSES, _DEFENDER_LOSES = _loss_tables()
+
+
+class EngagementOutcomes(object):
+    """Units left on each side and rounds played, as arrays of shape
+    (scenarios, samples)."""
+
+    def __init__(self, attackers_left, defenders_left, rounds):
+        self.attackers_left = attackers_left
+        self.defenders_left = defenders_left
+        self.rounds = rounds
+
+    @property
+    def attacker_win_probability(self):
+        """@return: <array> with the fraction of the samples of each scenario
+        in which the defender lost every unit."""
+        return (self.defenders_left == 0).mean(axis=1)
+
+    @property
+    def expected_attackers_left(self):
+        return self.attackers_left.mean(axis=1)
+
+    @property
+    def expected_defenders_left(self):
+        return self.defenders_left.mean(axis=1)
+
+    def distribution(self, scenario):
+        """@return: <dict> of (attackers_left, defenders_left) -> fraction of
+        the samples of <scenario> that ended so."""
+        outcomes = numpy.stack([self.attackers_left[scenario], self.defenders_left[scenario]], axis=1)
+        values, counts = numpy.unique(outcomes, axis=0, return_counts=True)
+        samples = float(outcomes.shape[0])
+        return {(int(attackers), int(defenders)): count / samples
+                for (attackers, defenders), count in zip(values, counts)}
+
+
+def simulate_engagements(attacker_units, defender_units, samples=1000, max_rounds=None, rng=None):
+    """Simulate <samples> engagements for each pair of <attacker_units> and
+    <defender_units> (sequences of the same length, or scalars), with at
+    most <max_rounds> attacks each.
+    :rng: numpy.random.RandomState, or a seed for one
+    @return: <EngagementOutcomes>
+    """
+    if not isinstance(rng, numpy.random.RandomState):
+        rng = numpy.random.RandomState(rng)
+    attacker_units, defender_units = numpy.broadcast_arrays(
+        numpy.atleast_1d(attacker_units), numpy.atleast_1d(defender_units))
+    shape = attacker_units.shape[0], samples
+    attackers = numpy.repeat(attacker_units.astype(numpy.int64), samples)
+    defenders = numpy.repeat(defender_units.astype(numpy.int64), samples)
+    rounds = numpy.zeros(attackers.shape, dtype=numpy.int64)
+
+    fighting = numpy.flatnonzero((attackers > 0) & (defenders > 0))
+    played = 0
+    while fighting.size and (max_rounds is None or played < max_rounds):
+        attacker_n_dice = numpy.minimum(attackers[fighting], MAX_AMOUNT_OF_DICES_PER_PLAYER)
+        defender_n_dice = numpy.minimum(defenders[fighting], MAX_AMOUNT_OF_DICES_PER_PLAYER)
+        draws = rng.random_sample(fighting.size)
+        outcome = (draws[:, None] >= _CUMULATIVE[attacker_n_dice, defender_n_dice]).sum(axis=1)
+        attackers[fighting] -= _ATTACKER_LOSES[attacker_n_dice, defender_n_dice, outcome]
+        defenders[fighting] -= _DEFENDER_LOSES[attacker_n_dice, defender_n_dice, outcome]
+        rounds[fighting] += 1
+        played += 1
+        fighting = fighting[(attackers[fighting] > 0) & (defenders[fighting] > 0)]
+
+    return EngagementOutcomes(attackers.reshape(shape), defenders.reshape(shape), rounds.reshape(shape))
@@ -2,28 +2,132 @@ import json
 from onagame2015.lib import GameStages
 
 
+def _to_json(obj):
+    return obj.__json__()
+
+
 class GameStatus(object):
     """Keeps a trace on the status of the game at any given time, so at the end
     it can return the result of the run.
+
+    If a <stream> (a file-like object) is given, the trace is not kept in
+    memory, but written to it as newline-delimited JSON, one record per line:
+    {"initial": {...}} as the header, {"actions": {...}} for each action,
+    {"keyframes": {...}} for each keyframe, and {"final": {...}} as the
+    footer. The records are written in batches of <buffer_size>. read_trace
+    rebuilds the same document the json property returns.
     """
 
-    def __init__(self):
+    def __init__(self, stream=None, buffer_size=64):
         self._game_data = {stage: {} for stage in GameStages.stages}
         self._reset_actions()
+        self._stream = stream
+        self._buffer_size = buffer_size
+        self._buffer = []
+        self._header_written = False
+        self._n_actions = 0
+        self._encoder = json.JSONEncoder(default=_to_json, separators=(',', ':'))
 
     def _reset_actions(self):
         self._game_data[GameStages.TURNS] = []
 
+    @property
+    def streaming(self):
+        return self._stream is not None
+
+    def _write_record(self, stage, data):
+        self._buffer.append(self._encoder.encode({stage: data}))
+        # Actions recorded before the header (the deployment of the initial
+        # units) wait for it, so the header is always the first line
+        if self._header_written and len(self._buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Write the records buffered to the stream."""
+        if self._buffer:
+            self._stream.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+        self._stream.flush()
+
     def update_turns(self, new_status):
         """Update self.game_data with the trace of the game.
         :new_status: <dict> with the information for the new action
         """
-
+        self._n_actions += 1
+        if self.streaming:
+            self._write_record(GameStages.TURNS, new_status)
+            return
         self._game_data[GameStages.TURNS].append(new_status)
 
     def add_game_stage(self, action_key, new_status):
         self._game_data.update({action_key: new_status})
+        if self.streaming:
+            if action_key == GameStages.INITIAL and not self._header_written:
+                self._header_written = True
+                self._buffer.insert(0, self._encoder.encode({action_key: new_status}))
+            else:
+                self._write_record(action_key, new_status)
+            if action_key == GameStages.FINAL:
+                self.flush()
+
+    def get_stage(self, action_key):
+        """The status added for the stage <action_key>, also kept when the
+        trace is streamed."""
+        return self._game_data[action_key]
+
+    def add_keyframe(self, turn_number, board):
+        """Trace the full <board> (see ArenaGrid.board_snapshot) as of
+        <turn_number>, to rebuild the board at any turn without replaying the
+        whole game (see onagame2015.keyframes)."""
+        keyframe = dict(board, turn_number=turn_number, action_index=self._n_actions)
+        if self.streaming:
+            self._write_record(GameStages.KEYFRAMES, keyframe)
+            return
+        self._game_data.setdefault(GameStages.KEYFRAMES, []).append(keyframe)
+
+    def snapshot(self):
+        """The trace so far, to go back to it with restore. Only the lengths
+        of the lists of records are kept, since they only grow.
+        @return: <tuple>
+        """
+        if self.streaming:
+            raise RuntimeError("The trace is written to a stream, it can't be restored")
+        lists = {stage: len(self._game_data[stage]) for stage in (GameStages.TURNS, GameStages.KEYFRAMES)
+                 if stage in self._game_data}
+        stages = {stage: data for stage, data in self._game_data.iteritems() if stage not in lists}
+        return lists, stages, self._n_actions
+
+    def restore(self, snapshot):
+        """Drop what was traced after <snapshot> was taken."""
+        lists, stages, self._n_actions = snapshot
+        game_data = dict(stages)
+        for stage, length in lists.iteritems():
+            game_data[stage] = self._game_data[stage]
+            del game_data[stage][length:]
+        self._game_data = game_data
 
     @property
     def json(self):
-        return json.dumps(self._game_data, default=lambda obj: obj.__json__())
+        if self.streaming:
+            raise RuntimeError("The trace is written to a stream, rebuild it with read_trace")
+        return json.dumps(self._game_data, default=_to_json)
+
+
+def read_trace(stream):
+    """Rebuild the document of GameStatus.json from the newline-delimited
+    JSON trace in <stream>.
+    @return: <dict>
+    """
+    game_data = {stage: {} for stage in GameStages.stages}
+    game_data[GameStages.TURNS] = []
+    for line in stream:
+        if not line.strip():
+            continue
+        (stage, data), = json.loads(line).items()
+        if stage == GameStages.TURNS:
+            game_data[GameStages.TURNS].append(data)
+        elif stage == GameStages.KEYFRAMES:
+            game_data.setdefault(GameStages.KEYFRAMES, []).append(data)
+        else:
+            game_data[stage] = data
+    return game_data
@@ -0,0 +1,61 @@
+"""Random games traced as the controller does, shared by the tests and the
+benchmarks of the engine."""
+import json
+import random
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import AVAILABLE_MOVEMENTS, GameStages
+from onagame2015.status import GameStatus
+from onagame2015.turn import GameTurn
+from onagame2015.validations import coord_in_arena
+
+
+def traced_turn(arena, bot, opponent, turn_number):
+    """Move every unit of <bot> in a random direction, and attack at random
+    from its new position, with the results of the actions evaluated by a
+    GameTurn, as the controller does.
+    @return: <GameTurn>
+    """
+    game_turn = GameTurn(arena, turn_number)
+    for unit in list(bot.units):
+        if arena.get_unit(str(unit.id)) is None:
+            continue  # killed defending in this turn, the controller rejects its actions
+        direction = random.choice(AVAILABLE_MOVEMENTS)
+        if coord_in_arena(unit.coordinate + direction, arena):
+            game_turn.evaluate_bot_action(MoveAction(bot).execute(
+                arena, {'unit_id': str(unit.id), 'direction': direction}, opponent))
+        target = unit.coordinate + random.choice(AVAILABLE_MOVEMENTS)
+        if coord_in_arena(target, arena):
+            game_turn.evaluate_bot_action(AttackAction(bot).execute(
+                arena, {'from': unit.coordinate, 'to': target}, opponent))
+    return game_turn
+
+
+def record_game(game_map, turns, keyframe_interval=None, after_each_turn=None, arena_class=ArenaGrid,
+                extra_units=0):
+    """Play <turns> random turns on an <arena_class> with <extra_units> more
+    units for each player, tracing them as the controller does, with a
+    keyframe every <keyframe_interval> turns. <after_each_turn>(arena,
+    turn_number) is called once both players played each turn.
+    @return: <dict> with the document of GameStatus.json
+    """
+    game_status = GameStatus()
+    arena = arena_class(game_map, game_status)
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    initial = {'map_source': 'random', 'players': []}
+    initial.update(arena.deploy_players(bots))
+    for bot in bots:
+        arena.add_units_to_player(bot, extra_units)
+    game_status.add_game_stage(GameStages.INITIAL, initial)
+    for turn_number in xrange(1, turns + 1):
+        for bot, opponent in (bots, bots[::-1]):
+            for new_status in traced_turn(arena, bot, opponent, turn_number).end_turn_status():
+                game_status.update_turns(new_status)
+            if keyframe_interval and turn_number % keyframe_interval == 0 and bot is bots[0]:
+                game_status.add_keyframe(turn_number, arena.board_snapshot())
+        if after_each_turn:
+            after_each_turn(arena, turn_number)
+    game_status.add_game_stage(GameStages.FINAL, {'action': 'GAMEOVER', 'rounds': turns})
+    return json.loads(game_status.json)
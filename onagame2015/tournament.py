@@ -0,0 +1,162 @@
+"""Round-robin tournaments between bot scripts, played headless in a pool of
+processes.
+
+Every pair of bots plays once in each seat order, for every seed and map.
+Each worker loads the scripts once, and the results come back in the order
+of the schedule (so the ratings don't depend on which game finished first),
+to update the standings: wins, draws and losses of each bot, the mean length
+of its games, and an Elo rating.
+
+    python -m onagame2015.tournament --seeds 10 --processes 4 \\
+        joac=bots/botjoac/script.py bot1=bots/bot1/script.py ...
+"""
+import argparse
+import itertools
+import multiprocessing
+import traceback
+
+from onagame2015.lib import GameStages
+
+INITIAL_RATING = 1500.0
+RATING_K = 16.0
+
+# Bot classes loaded in this worker, by name (see _init_worker)
+_worker_bots = {}
+
+
+def schedule(bot_names, seeds, maps):
+    """@return: <list> of (first_bot, second_bot, seed, map_name) for every
+    game of the tournament."""
+    return [
+        (first_bot, second_bot, seed, map_name)
+        for first_bot, second_bot in itertools.permutations(bot_names, 2)
+        for seed in seeds
+        for map_name in maps
+    ]
+
+
+def _init_worker(scripts):
+    from onagame2015.headless import load_bot_class
+    for name, script in scripts.iteritems():
+        _worker_bots[name] = load_bot_class(script)
+
+
+def play_game(game):
+    """Play one game of the schedule with the bots loaded in this worker.
+    @return: <dict> with the result
+    """
+    from onagame2015.headless import HeadlessGame
+    first_bot, second_bot, seed, map_name = game
+    result = {'bots': [first_bot, second_bot], 'seed': seed, 'map': map_name}
+    try:
+        controller = HeadlessGame(
+            [_worker_bots[first_bot](), _worker_bots[second_bot]()],
+            usernames=[first_bot, second_bot],
+            seed=seed,
+            map_name=map_name,
+        ).run()
+    except Exception:
+        result['error'] = traceback.format_exc()
+        return result
+    final = controller.game_status.get_stage(GameStages.FINAL)
+    result.update(winner=final['player'] or None, rounds=final['rounds'], reason=final['reason'])
+    return result
+
+
+class Standings(object):
+    """Results of the games played so far, by bot."""
+
+    def __init__(self, bot_names):
+        self.wins = dict.fromkeys(bot_names, 0)
+        self.draws = dict.fromkeys(bot_names, 0)
+        self.losses = dict.fromkeys(bot_names, 0)
+        self.rounds = dict.fromkeys(bot_names, 0)
+        self.ratings = dict.fromkeys(bot_names, INITIAL_RATING)
+        self.errors = []
+
+    def games(self, bot):
+        return self.wins[bot] + self.draws[bot] + self.losses[bot]
+
+    def mean_game_length(self, bot):
+        games = self.games(bot)
+        return self.rounds[bot] / float(games) if games else 0.0
+
+    def add_result(self, result):
+        if 'error' in result:
+            self.errors.append(result)
+            return
+        first_bot, second_bot = result['bots']
+        winner = result['winner']
+        if winner is None:
+            self.draws[first_bot] += 1
+            self.draws[second_bot] += 1
+            score = 0.5
+        else:
+            loser = second_bot if winner == first_bot else first_bot
+            self.wins[winner] += 1
+            self.losses[loser] += 1
+            score = 1.0 if winner == first_bot else 0.0
+        for bot in result['bots']:
+            self.rounds[bot] += result['rounds']
+        self._update_ratings(first_bot, second_bot, score)
+
+    def _update_ratings(self, first_bot, second_bot, score):
+        """Elo update, with <score> of the first bot (1, 0.5 or 0)."""
+        expected = 1 / (1 + 10 ** ((self.ratings[second_bot] - self.ratings[first_bot]) / 400.0))
+        self.ratings[first_bot] += RATING_K * (score - expected)
+        self.ratings[second_bot] -= RATING_K * (score - expected)
+
+    def table(self):
+        """@return: <str> with the standings, best rated first"""
+        lines = ['%-20s %8s %5s %5s %5s %10s' % ('bot', 'rating', 'won', 'draw', 'lost', 'mean len')]
+        for bot in sorted(self.ratings, key=self.ratings.get, reverse=True):
+            lines.append('%-20s %8.1f %5d %5d %5d %10.1f' % (
+                bot, self.ratings[bot], self.wins[bot], self.draws[bot], self.losses[bot],
+                self.mean_game_length(bot)))
+        return '\n'.join(lines)
+
+
+def run_tournament(scripts, seeds, maps=('map_draft.json',), processes=None, on_result=None):
+    """Play the round-robin between the bots in <scripts> (<dict> of name
+    -> path of the script) in a pool of <processes> (one per CPU by
+    default), calling <on_result>(result, standings) for each game, in the
+    order of the schedule.
+    @return: <Standings>
+    """
+    standings = Standings(scripts)
+    games = schedule(sorted(scripts), seeds, maps)
+    pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(scripts,))
+    try:
+        for result in pool.imap(play_game, games):
+            standings.add_result(result)
+            if on_result:
+                on_result(result, standings)
+    finally:
+        pool.terminate()
+        pool.join()
+    return standings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('bots', nargs='+', metavar='NAME=SCRIPT')
+    parser.add_argument('--seeds', type=int, default=1, help="seeds 0..N-1 for each pairing")
+    parser.add_argument('--maps', nargs='+', default=['map_draft.json'])
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args(argv)
+    scripts = dict(bot.split('=', 1) for bot in args.bots)
+
+    def report(result, standings):
+        if 'error' in result:
+            print '{bots[0]} vs {bots[1]} (seed {seed}, {map}) failed:\n{error}'.format(**result)
+        else:
+            print '{bots[0]} vs {bots[1]} (seed {seed}, {map}): {0} in {rounds} rounds'.format(
+                result['winner'] or 'draw', **result)
+
+    standings = run_tournament(scripts, range(args.seeds), args.maps, args.processes, report)
+    print
+    print standings.table()
+
+
+if __name__ == '__main__':
+    main()
@@ -11,7 +11,7 @@ from onagame2015.lib import (
 class BaseUnit(GameBaseObject):
 
     def __init__(self, coordinate, player_id, arena):
-        self.id = id(self)
+        self.id = arena.new_unit_id()
         self.coordinate = coordinate
         self.arena = arena
         self.player_id = player_id
@@ -130,10 +130,11 @@ class AttackUnit(BaseUnit):
     def _all_units_are_mine(self, tile):
         """@return :bool: indicating if all the units in <tile> are from
         <self>."""
-        return all(unit.player_id == self.player_id for unit in tile.items)
+        return tile.items_of(self.player_id) == len(tile.items)
 
     def _enemy_headquarter_alone(self, tile):
         """@return :bool: indicating if the <tile> is the enemy HeadQuarter,
         and is alone."""
-        enemy_units = [u for u in tile.items if u.player_id != self.player_id]
-        return len(enemy_units) == 1 and enemy_units[0].type == UNIT_TYPE_HQ
+        enemy_units = len(tile.items) - tile.items_of(self.player_id)
+        return (enemy_units == 1 and tile.hq_owner is not None and
+                tile.hq_owner != self.player_id)
@@ -22,6 +22,9 @@ setup(
     install_requires=[
         "turnboxed",
     ],
+    extras_require={
+        'numpy': ["numpy"],
+    },
     long_description=read('README'),
     classifiers=[
         'Intended Audience :: Developers',
@@ -1,13 +1,52 @@
+import os
+import random
 from random import randint
 
 import pytest
 
-from onagame2015.arena import ArenaGrid
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ARENA_BACKENDS, ArenaGrid, get_arena_class
+from onagame2015.lib import AVAILABLE_MOVEMENTS, Coordinate
 from onagame2015.maploader import GameMap
 from onagame2015.status import GameStatus
+from onagame2015.validations import coord_in_arena
+
+BOTS_DIR = os.path.join(os.path.dirname(__file__), os.pardir, 'example_data', 'bots')
+# A bot with its own random generator, so it plays the same in every path
+SCRIPT = os.path.join(BOTS_DIR, 'botjoac', 'script.py')
 
 
 @pytest.fixture(scope='function')
 def random_arena():
     return ArenaGrid(GameMap.create_empty_map(width=randint(10, 100), height=randint(10, 100)),
                      GameStatus())
+
+
+@pytest.fixture(scope='function')
+def game_map():
+    """A 20x20 empty map, with two headquarters close enough to fight"""
+    game_map = GameMap.create_empty_map(width=21, height=21)
+    game_map.eligible_hqs = set((Coordinate(7, 7), Coordinate(11, 11)))
+    return game_map
+
+
+@pytest.fixture(params=ARENA_BACKENDS)
+def arena_class(request):
+    """Each implementation of the arena, skipping the ones whose dependencies
+    are not installed"""
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    return get_arena_class(request.param)
+
+
+def play_random_turns(arena, bots, turns, after_each_turn):
+    for _ in range(turns):
+        for bot, opponent in (bots, bots[::-1]):
+            for unit in list(bot.units):
+                direction = random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(unit.coordinate + direction, arena):
+                    MoveAction(bot).execute(arena, {'unit_id': unit.id, 'direction': direction}, opponent)
+                target = unit.coordinate + random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(target, arena):
+                    AttackAction(bot).execute(arena, {'from': unit.coordinate, 'to': target}, opponent)
+            after_each_turn()
@@ -0,0 +1,273 @@
+import random
+
+import pytest
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import (
+    AVAILABLE_MOVEMENTS,
+    MAP_ENCODINGS,
+    TILE_ENEMY_HQ,
+    TILE_OWN_HQ,
+    TILE_REACHABLE,
+    TILE_VISIBLE,
+    Coordinate,
+)
+from onagame2015.status import GameStatus
+from onagame2015.units import AttackUnit, HeadQuarter
+from onagame2015.validations import coord_in_arena
+from conftest import play_random_turns
+
+
+def test_get_unit_finds_unit_by_its_string_id(random_arena):
+    coordinate = Coordinate(1, 1)
+    unit = AttackUnit(coordinate, 1, random_arena)
+    random_arena.set_content_on_tile(coordinate, unit)
+
+    assert random_arena.get_unit(str(unit.id)) is unit
+    assert random_arena.get_unit(unit.id) is unit
+    assert random_arena.locate_unit(unit.id) == (unit, random_arena[coordinate])
+
+
+def test_get_unit_returns_none_for_unknown_ids(random_arena):
+    assert random_arena.get_unit('12345') is None
+    assert random_arena.locate_unit('12345') == (None, None)
+
+
+def test_unit_index_follows_moves(random_arena):
+    coordinate = Coordinate(2, 2)
+    unit = AttackUnit(coordinate, 1, random_arena)
+    random_arena.set_content_on_tile(coordinate, unit)
+
+    result = unit.move(Coordinate(1, 0))
+
+    assert not result['error']
+    assert random_arena.locate_unit(unit.id) == (unit, random_arena[Coordinate(3, 2)])
+    assert unit not in random_arena[coordinate].items
+
+
+def test_unit_index_forgets_removed_units(random_arena):
+    coordinate = Coordinate(2, 2)
+    units = [AttackUnit(coordinate, 1, random_arena) for _ in range(3)]
+    for unit in units:
+        random_arena.set_content_on_tile(coordinate, unit)
+
+    removed = random_arena.synchronize_attack_results({
+        'attacker_loses': 2,
+        'attacker_coord': coordinate,
+        'defender_loses': 0,
+        'defender_coord': Coordinate(3, 3),
+    })['attacker_removed_units']
+    random_arena.remove_content_from_tile(coordinate, units[2])
+
+    assert len(removed) == 2
+    for unit in units:
+        assert random_arena.get_unit(unit.id) is None
+
+
+def test_tile_counters_follow_its_items(random_arena):
+    coordinate = Coordinate(3, 3)
+    tile = random_arena[coordinate]
+    hq = HeadQuarter(coordinate, 2, 5, random_arena)
+    units = [AttackUnit(coordinate, 1, random_arena) for _ in range(3)]
+    random_arena.set_content_on_tile(coordinate, hq)
+    for unit in units:
+        random_arena.set_content_on_tile(coordinate, unit)
+
+    assert random_arena.number_of_units_in_tile(coordinate) == 3
+    assert random_arena.whos_in_tile(coordinate) == 2
+    assert tile.hq_for(2) and not tile.hq_for(1)
+    assert tile.items_of(1) == 3
+
+    tile.remove_item(units[0])
+    popped = tile.pop_one_unit()
+    tile.remove_item(units[0])
+
+    assert popped is units[1]
+    assert tile.attack_units == 1
+    assert tile.items == [hq, units[2]]
+
+    tile.pop_one_unit()
+    tile.remove_item(hq)
+
+    assert tile.empty
+    assert tile.pop_one_unit() is None
+    assert random_arena.whos_in_tile(coordinate) is None
+    assert not tile.hq_for(2)
+
+
+def test_tracked_visibility_agrees_with_the_reference(arena_class, game_map):
+    random.seed(4321)
+    arena = arena_class(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+
+    def check_maps():
+        for player in bots:
+            for encoding in MAP_ENCODINGS:
+                tracked_map = arena.get_map_for_player(player, encoding)
+                assert tracked_map == arena.reference_map_for_player(player, encoding)
+
+    play_random_turns(arena, bots, 40, check_maps)
+
+
+@pytest.mark.parametrize('encoding', MAP_ENCODINGS)
+def test_maps_for_the_player_are_copies(arena_class, game_map, encoding):
+    arena = arena_class(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    expected = arena.reference_map_for_player(bots[0], encoding)
+
+    for arena_map in (arena.get_map_update_for_player(bots[0], encoding)['map'],
+                      arena.get_map_for_player(bots[0], encoding)):
+        for row in arena_map:
+            for tile in row:
+                if isinstance(tile, list):
+                    tile.append('changed')
+            row[0] = 'changed'
+
+    assert arena.get_map_for_player(bots[0], encoding) == expected
+    assert arena.get_map_update_for_player(bots[0], encoding)['map_delta'] == []
+
+
+def test_map_versions_are_counted_by_encoding(arena_class, game_map):
+    arena = arena_class(game_map, GameStatus())
+    bot = BotPlayer('bot1', None, 1)
+    arena.deploy_players([bot, BotPlayer('bot2', None, 2)])
+
+    assert arena.get_map_update_for_player(bot, 'string')['map_version'] == 1
+    assert arena.get_map_update_for_player(bot, 'string')['map_version'] == 2
+    update = arena.get_map_update_for_player(bot, 'compact')
+    assert 'map' in update and update['map_version'] == 1
+    update = arena.get_map_update_for_player(bot, 'compact')
+    assert 'map_delta' in update and update['map_version'] == 2
+    assert arena.get_map_update_for_player(bot, 'string')['map_version'] == 3
+
+
+def check_map_updates(arena, bots, encoding, peek=False):
+    """Play a random game on <arena>, checking that applying the map deltas
+    over the first map gives the map each player sees. With <peek>, the maps
+    of the players are also rendered between the updates, as viewers do."""
+    arena.deploy_players(bots)
+    maps = {}
+    for bot in bots:
+        update = arena.get_map_update_for_player(bot, encoding)
+        assert update['map_version'] == 1
+        maps[bot.p_num] = update['map']
+
+    def apply_updates():
+        for bot in bots:
+            if peek:
+                arena.get_map_for_player(bot, encoding)
+            update = arena.get_map_update_for_player(bot, encoding)
+            for x, y, tile in update['map_delta']:
+                maps[bot.p_num][y][x] = tile
+            assert maps[bot.p_num] == arena.reference_map_for_player(bot, encoding)
+
+    play_random_turns(arena, bots, 40, apply_updates)
+
+
+@pytest.mark.parametrize('encoding', MAP_ENCODINGS)
+@pytest.mark.parametrize('peek', [False, True])
+def test_map_updates_rebuild_the_map_of_each_player(arena_class, game_map, encoding, peek):
+    random.seed(4321)
+    check_map_updates(arena_class(game_map, GameStatus()), [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)],
+                      encoding, peek)
+
+
+def test_compact_tiles(random_arena):
+    coordinate = Coordinate(3, 3)
+    tile = random_arena[coordinate]
+    random_arena.set_content_on_tile(coordinate, HeadQuarter(coordinate, 1, 5, random_arena))
+    assert tile.compact(1) == TILE_VISIBLE | TILE_REACHABLE | TILE_OWN_HQ
+    assert tile.compact(2) == TILE_VISIBLE | TILE_REACHABLE | TILE_ENEMY_HQ
+
+    units = [AttackUnit(coordinate, 1, random_arena) for _ in range(2)]
+    for unit in units:
+        random_arena.set_content_on_tile(coordinate, unit)
+    assert tile.compact(1) == [TILE_VISIBLE | TILE_REACHABLE | TILE_OWN_HQ, 1, 2, [u.id for u in units]]
+    assert tile.compact(2) == [TILE_VISIBLE | TILE_REACHABLE | TILE_ENEMY_HQ, 1, 2, []]
+
+
+def play_seeded_game(arena_class, game_map, seed, turns=20):
+    """Play with every random decision of the engine taken from a
+    random.Random(<seed>), and the ones of the bots from the global random.
+    @return: <str> with the trace of the game"""
+    rng = random.Random(seed)
+    game_status = GameStatus()
+    arena = arena_class(game_map, game_status, rng=rng)
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    game_status.add_game_stage('initial', arena.deploy_players(bots))
+    for _ in range(turns):
+        for bot, opponent in (bots, bots[::-1]):
+            for unit in list(bot.units):
+                direction = random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(unit.coordinate + direction, arena):
+                    MoveAction(bot, rng=rng).execute(arena, {'unit_id': unit.id, 'direction': direction}, opponent)
+                target = unit.coordinate + random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(target, arena):
+                    game_status.update_turns(AttackAction(bot, rng=rng).execute(
+                        arena, {'from': unit.coordinate, 'to': target}, opponent))
+    return game_status.json
+
+
+def test_games_with_the_same_seed_are_the_same(arena_class, game_map):
+    game_map.eligible_hqs = set([Coordinate(7, 7), Coordinate(11, 11), Coordinate(3, 15)])
+    random.seed(1)
+    trace = play_seeded_game(arena_class, game_map, 42)
+
+    random.seed(1)
+    assert play_seeded_game(arena_class, game_map, 42) == trace
+    random.seed(1)
+    assert play_seeded_game(arena_class, game_map, 43) != trace
+
+
+def test_deploy_players_with_more_units(arena_class, game_map):
+    arena = arena_class(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+
+    deployed = arena.deploy_players(bots, units_per_player=12)
+
+    assert [player['units'] for player in deployed['players']] == [12, 12]
+    for bot in bots:
+        assert len(bot.units) == 12
+        assert sum(arena.number_of_units_in_tile(coordinate) for coordinate in
+                   set(unit.coordinate for unit in bot.units)) == 12
+
+
+def check_snapshot_restore(arena, bots):
+    """Play on <arena>, go back to a snapshot, and check that the board, the
+    maps of the players and the units are as they were."""
+    arena.deploy_players(bots)
+    play_random_turns(arena, bots, 5, lambda: None)
+    snapshot = arena.snapshot(), [bot.snapshot() for bot in bots]
+    board = arena.board_snapshot()
+    maps = {(bot.p_num, encoding): [row[:] for row in arena.get_map_for_player(bot, encoding)]
+            for bot in bots for encoding in MAP_ENCODINGS}
+
+    def restore():
+        arena.restore(snapshot[0])
+        for bot, bot_snapshot in zip(bots, snapshot[1]):
+            bot.restore(bot_snapshot)
+
+    traces = []
+    for _ in range(2):
+        random.seed(1)
+        play_random_turns(arena, bots, 10, lambda: None)
+        traces.append(arena.board_snapshot())
+        restore()
+        assert arena.board_snapshot() == board
+        for bot in bots:
+            assert 'map' in arena.get_map_update_for_player(bot)
+            for encoding in MAP_ENCODINGS:
+                assert arena.get_map_for_player(bot, encoding) == maps[bot.p_num, encoding]
+                assert arena.reference_map_for_player(bot, encoding) == maps[bot.p_num, encoding]
+            for unit in bot.units:
+                assert arena.get_unit(unit.id) is unit
+                assert arena.whos_in_tile(unit.coordinate) == bot.p_num
+    assert traces[0] == traces[1]
+
+
+def test_arena_snapshot_restore(arena_class, game_map):
+    random.seed(4321)
+    check_snapshot_restore(arena_class(game_map, GameStatus()), [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)])
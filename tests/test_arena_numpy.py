@@ -0,0 +1,78 @@
+import random
+
+import pytest
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import AVAILABLE_MOVEMENTS, MAP_ENCODINGS, Coordinate
+from onagame2015.status import GameStatus
+from onagame2015.units import AttackUnit
+from onagame2015.validations import coord_in_arena
+
+pytest.importorskip('numpy')
+from onagame2015.arena_numpy import NumpyArenaGrid  # noqa
+
+
+def play_random_game(arena_class, game_map, turns=30):
+    """Deploy two bots and make them move and attack at random."""
+    random.seed(1234)
+    arena = arena_class(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    for _ in range(turns):
+        for bot, opponent in (bots, bots[::-1]):
+            for unit in list(bot.units):
+                direction = random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(unit.coordinate + direction, arena):
+                    MoveAction(bot).execute(arena, {
+                        'unit_id': str(unit.id),
+                        'direction': direction,
+                    }, opponent)
+                target = unit.coordinate + random.choice(AVAILABLE_MOVEMENTS)
+                if coord_in_arena(target, arena):
+                    AttackAction(bot).execute(arena, {
+                        'from': unit.coordinate,
+                        'to': target,
+                    }, opponent)
+    return arena, bots
+
+
+def test_numpy_arena_plays_like_the_list_arena(game_map):
+    arena, bots = play_random_game(ArenaGrid, game_map)
+    numpy_arena, numpy_bots = play_random_game(NumpyArenaGrid, game_map)
+
+    for bot, numpy_bot in zip(bots, numpy_bots):
+        assert len(bot.units) == len(numpy_bot.units)
+        for encoding in MAP_ENCODINGS:
+            assert arena.get_map_for_player(bot, encoding) == numpy_arena.get_map_for_player(numpy_bot, encoding)
+
+
+def test_numpy_arena_arrays_match_its_tiles(game_map):
+    arena, bots = play_random_game(NumpyArenaGrid, game_map)
+
+    for longitude in range(arena.height):
+        for latitude in range(arena.width):
+            coordinate = Coordinate(latitude, longitude)
+            tile = arena[coordinate]
+            assert arena.number_of_units_in_tile(coordinate) == tile.attack_units
+            assert arena.whos_in_tile(coordinate) == tile.owner
+            assert arena.is_free_tile(coordinate) == (not tile.items)
+    for bot in bots:
+        for encoding in MAP_ENCODINGS:
+            assert arena.get_map_for_player(bot, encoding) == arena.reference_map_for_player(bot, encoding)
+        for unit in bot.units:
+            assert arena.get_unit(unit.id) is unit
+
+
+def test_numpy_arena_empty_tiles_are_read_only(game_map):
+    arena = NumpyArenaGrid(game_map, GameStatus())
+    coordinate = Coordinate(3, 3)
+    unit = AttackUnit(coordinate, 1, arena)
+
+    with pytest.raises(RuntimeError):
+        arena[coordinate].add_item(unit)
+
+    arena.set_content_on_tile(coordinate, unit)
+    assert arena[coordinate].items == [unit]
+    assert arena.number_of_units_in_tile(coordinate) == 1
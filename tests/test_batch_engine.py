@@ -0,0 +1,155 @@
+import random
+
+import pytest
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import AVAILABLE_MOVEMENTS, TILE_ENEMY_HQ, TILE_OWN_HQ, TILE_REACHABLE, Coordinate
+from onagame2015.status import GameStatus
+from onagame2015.units import AttackUnit
+
+numpy = pytest.importorskip('numpy')
+from onagame2015.batch_engine import ATTACK, GAME_OVER, INVALID, MOVE, OK, BatchEngine  # noqa
+
+
+class DrawsRandom(object):
+    """Random for AttackAction that maps the uniform <draws> to randrange as
+    BatchEngine does."""
+
+    def __init__(self):
+        self.draws = []
+
+    def randrange(self, n):
+        return int(self.draws.pop(0) * n)
+
+
+def deploy(game_map, seed):
+    arena = ArenaGrid(game_map, GameStatus(), rng=random.Random(seed))
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    return arena, bots
+
+
+def random_action(rng, arena, player):
+    """An action from a tile of <player> (or of the opponent, now and
+    then), valid or not.
+    @return: kind, x, y, to_x, to_y, count
+    """
+    board = arena.board_snapshot()
+    if rng.random() < 0.05:
+        player = 3 - player
+    tiles = [(x, y) for x, y, owner, _ in board['tiles'] if owner == player]
+    tiles += [(x, y) for x, y, owner in board['hqs'] if owner == player]
+    x, y = rng.choice(tiles)
+    if rng.random() < 0.5:
+        delta_x, delta_y = rng.choice(AVAILABLE_MOVEMENTS + ((1, 1), (0, 2)))
+        return MOVE, x, y, x + delta_x, y + delta_y, rng.randint(0, 4)
+    return ATTACK, x, y, x + rng.randint(-2, 2), y + rng.randint(-2, 2), 0
+
+
+def apply_action(arena, bots, player, action, draw):
+    """Apply <action> to the scalar arena, as BatchEngine.step does.
+    @return: the winner, or None
+    """
+    kind, x, y, to_x, to_y, count = action
+    bot, opponent = bots[player - 1], bots[2 - player]
+    if kind == MOVE:
+        unit_ids = [unit.id for unit in arena[Coordinate(x, y)].items if unit in bot.units]
+        for unit_id in unit_ids[:count]:
+            MoveAction(bot).execute(arena, {'unit_id': str(unit_id), 'direction': (to_x - x, to_y - y)}, opponent)
+    else:
+        rng = DrawsRandom()
+        rng.draws.append(draw)
+        AttackAction(bot, rng=rng).execute(arena, {'from': (x, y), 'to': (to_x, to_y)}, opponent)
+    for current, other in ((bot, opponent), (opponent, bot)):
+        if current.has_won_game(other, arena)[0]:
+            return current.p_num
+
+
+def compact_observation(arena, bot):
+    """The map of <bot> in the 'compact' encoding, as the channels of
+    BatchEngine.observe."""
+    observation = numpy.zeros((6, arena.height, arena.width), dtype=numpy.int32)
+    for y, row in enumerate(arena.get_map_for_player(bot, 'compact')):
+        for x, tile in enumerate(row):
+            flags, owner, units = tile[:3] if isinstance(tile, list) else (tile, None, 0)
+            observation[:, y, x] = [
+                flags != 0,
+                bool(flags & TILE_REACHABLE),
+                units if owner == bot.p_num else 0,
+                units if owner not in (None, bot.p_num) else 0,
+                bool(flags & TILE_OWN_HQ),
+                bool(flags & TILE_ENEMY_HQ),
+            ]
+    return observation
+
+
+def test_new_games_are_deployed_as_in_the_arena(game_map):
+    seeds = range(6)
+    engine = BatchEngine.new_games(game_map, seeds)
+    reference = BatchEngine.from_boards(game_map, [deploy(game_map, seed)[0].board_snapshot() for seed in seeds])
+    for name in ('owner', 'units', 'hq'):
+        assert (getattr(engine, name) == getattr(reference, name)).all()
+
+
+def test_batch_engine_plays_like_the_arena(game_map):
+    seeds = range(8)
+    games = [deploy(game_map, seed) for seed in seeds]
+    engine = BatchEngine.from_boards(game_map, [arena.board_snapshot() for arena, _ in games])
+    rng = random.Random(2015)
+    winners = [None] * len(games)
+    for step in range(300):
+        player = step % 2 + 1
+        actions, draws = [], numpy.array([rng.random() for _ in games])
+        for game, (arena, bots) in enumerate(games):
+            actions.append(random_action(rng, arena, player) if winners[game] is None else (MOVE, 0, 0, 0, 0, 0))
+            if winners[game] is None:
+                winners[game] = apply_action(arena, bots, player, actions[-1], draws[game])
+        result = engine.step(player, *zip(*actions), draws=draws)
+        assert set(result) <= set((OK, INVALID, GAME_OVER))
+
+        for game, (arena, bots) in enumerate(games):
+            assert engine.done[game] == (winners[game] is not None)
+            assert engine.winner[game] == (winners[game] or 0)
+            if winners[game] is None:
+                assert BatchEngine.from_boards(game_map, [arena.board_snapshot()]).units[0].tolist() == \
+                    engine.units[game].tolist()
+        for bot in games[0][1]:
+            observations = engine.observe(bot.p_num)
+            for game, (arena, bots) in enumerate(games):
+                if winners[game] is None:
+                    assert (observations[game] == compact_observation(arena, bots[bot.p_num - 1])).all()
+    assert any(winner is not None for winner in winners)
+
+
+def test_invalid_actions_change_nothing(game_map):
+    engine = BatchEngine.new_games(game_map, [1])
+    hq_y, hq_x = numpy.argwhere(engine.hq[0] == 1)[0]
+    before = engine.units.copy()
+    # too long a move, to the own HQ while it has a unit, attack to an empty tile
+    assert engine.step(1, MOVE, hq_x, hq_y, hq_x, hq_y - 2, 1)[0] == INVALID
+    assert engine.step(1, MOVE, hq_x, hq_y - 1, hq_x, hq_y, 1)[0] == INVALID
+    assert engine.step(1, ATTACK, hq_x, hq_y, hq_x, hq_y - 2, 1)[0] == INVALID
+    assert engine.step(2, MOVE, hq_x, hq_y, hq_x, hq_y - 1, 1)[0] == INVALID
+    assert (engine.units == before).all()
+    assert engine.step(1, MOVE, hq_x, hq_y, hq_x, hq_y - 1, 1)[0] == OK
+    assert engine.units[0, hq_y, hq_x] == 0
+    assert engine.units[0, hq_y - 1, hq_x] == before[0, hq_y - 1, hq_x] + 1
+
+
+def test_attacks_from_a_tile_of_the_opponent_are_invalid(game_map):
+    arena, bots = deploy(game_map, 1)
+    for player, coordinate in ((2, Coordinate(3, 3)), (1, Coordinate(3, 4))):
+        unit = AttackUnit(coordinate, player, arena)
+        arena.set_content_on_tile(coordinate, unit)
+        bots[player - 1].add_unit(unit)
+    engine = BatchEngine.from_boards(game_map, [arena.board_snapshot()])
+    before = engine.units.copy()
+
+    result = AttackAction(bots[0]).execute(arena, {'from': (3, 3), 'to': (3, 4)}, bots[1])
+
+    assert result['error'] == 'Not an own tile'
+    assert engine.step(1, ATTACK, 3, 3, 3, 4)[0] == INVALID
+    assert (engine.units == before).all()
+    assert BatchEngine.from_boards(game_map, [arena.board_snapshot()]).units.tolist() == before.tolist()
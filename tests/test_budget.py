@@ -0,0 +1,73 @@
+import json
+import time
+
+import pytest
+
+from onagame2015.budget import TimeBudget
+from onagame2015.lib import BotTimeoutException
+from conftest import SCRIPT
+
+
+def test_time_left_is_the_lowest_limit():
+    assert TimeBudget().time_left() is None
+    assert TimeBudget(turn_limit=1).time_left() == 1
+    budget = TimeBudget(turn_limit=1, bank=2.5)
+    budget.spend(0.5)
+    budget.spend(1)
+    assert budget.time_left() == 1
+    budget.spend(0.75)
+    assert budget.time_left() == pytest.approx(0.25)
+    assert budget.bank_left == pytest.approx(0.25)
+
+
+def test_spending_more_than_the_time_left_is_a_timeout():
+    budget = TimeBudget(turn_limit=1, bank=1.5)
+    budget.spend(1)
+    with pytest.raises(BotTimeoutException):
+        budget.spend(0.6)
+    with pytest.raises(BotTimeoutException):
+        TimeBudget(turn_limit=1).spend(1.1)
+    TimeBudget().spend(100)
+
+
+def test_stats():
+    budget = TimeBudget(bank=10)
+    for seconds in (1, 2, 3):
+        budget.spend(seconds)
+    assert budget.stats() == {'turns': 3, 'total': 6, 'mean': 2, 'max': 3, 'bank_left': 4}
+    snapshot = budget.snapshot()
+    budget.spend(1)
+    budget.restore(snapshot)
+    assert budget.stats()['turns'] == 3
+
+
+def test_slow_bot_forfeits_the_game():
+    pytest.importorskip('turnboxed')
+    from onagame2015.headless import HeadlessGame, load_bot
+
+    class SlowBot(object):
+        def __init__(self):
+            self.time_left = []
+
+        def on_turn(self, data_dict):
+            self.time_left.append((data_dict['time_left'], data_dict['time_bank_left']))
+            if len(self.time_left) == 3:
+                time.sleep(2)
+            return {'ACTIONS': []}
+
+    slow_bot = SlowBot()
+    start = time.time()
+    controller = HeadlessGame([load_bot(SCRIPT), slow_bot], seed=1, turn_time_limit=0.1, time_bank=5).run()
+
+    # interrupted when it ran out of time
+    assert time.time() - start < 2
+    trace = json.loads(controller.json)
+    assert trace['initial']['turn_time_limit'] == 0.1
+    final = trace['final']
+    assert final['player'] == 'bot1' and final['rounds'] == 2
+    assert final['reason'].startswith('Bot bot2 forfeits: Timeout')
+    assert slow_bot.time_left[0] == (0.1, 5)
+    assert slow_bot.time_left[2][1] < 5
+    assert final['bot_times']['bot2']['turns'] == 3
+    assert final['bot_times']['bot2']['max'] > 0.1
+    assert final['bot_times']['bot1']['bank_left'] > 4
@@ -0,0 +1,50 @@
+import random
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+from onagame2015.dice import attack_probabilities, count_losses, outcome_table
+
+
+def brute_force_probabilities(attacker_n_dice, defender_n_dice):
+    outcomes = {}
+    throws = list(product(range(1, 7), repeat=attacker_n_dice + defender_n_dice))
+    for throw in throws:
+        attacker_dice = sorted(throw[:attacker_n_dice], reverse=True)
+        defender_dice = sorted(throw[attacker_n_dice:], reverse=True)
+        losses = count_losses(attacker_dice, defender_dice)
+        outcomes[losses] = outcomes.get(losses, 0) + 1
+    return {losses: Fraction(count, len(throws)) for losses, count in outcomes.iteritems()}
+
+
+@pytest.mark.parametrize('attacker_n_dice,defender_n_dice', product(range(0, 4), repeat=2))
+def test_probabilities_are_exact(attacker_n_dice, defender_n_dice):
+    assert outcome_table(attacker_n_dice, defender_n_dice).probabilities() == \
+        brute_force_probabilities(attacker_n_dice, defender_n_dice)
+
+
+def test_attack_probabilities_by_units():
+    probabilities = attack_probabilities(10, 1)
+
+    assert probabilities == {(1, 0): Fraction(49, 144), (0, 1): Fraction(95, 144)}
+    assert attack_probabilities(3, 2) == outcome_table(3, 2).probabilities()
+
+
+def test_samples_follow_the_distribution_with_one_draw_each():
+    table = outcome_table(3, 2)
+    rng = random.Random(2015)
+    draws = []
+    rng.randrange = lambda n, randrange=rng.randrange: draws.append(n) or randrange(n)
+    samples = 20000
+    counts = {}
+    for _ in range(samples):
+        attacker_dice, defender_dice, attacker_loses, defender_loses = table.sample(rng)
+        assert attacker_dice == sorted(attacker_dice, reverse=True) and len(attacker_dice) == 3
+        assert defender_dice == sorted(defender_dice, reverse=True) and len(defender_dice) == 2
+        assert count_losses(attacker_dice, defender_dice) == (attacker_loses, defender_loses)
+        counts[attacker_loses, defender_loses] = counts.get((attacker_loses, defender_loses), 0) + 1
+
+    assert len(draws) == samples
+    for losses, probability in table.probabilities().iteritems():
+        assert abs(counts[losses] / float(samples) - probability) < 0.02
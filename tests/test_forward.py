@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from onagame2015.actions import AttackAction, MoveAction
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.dice import outcome_table
+from onagame2015.forward import ENEMY, EXPECTED, OWN, ForwardModel
+from onagame2015.lib import Coordinate
+from onagame2015.pathfinding import MOVEMENTS
+from onagame2015.status import GameStatus
+from conftest import play_random_turns
+
+
+def state(model):
+    return model.units.copy(), model.owner.copy(), model.unit_ids.copy(), model.unit_tiles.copy(), model.moved.copy()
+
+
+def small_model(**options):
+    """Own HQ at (1, 1) with 1 unit, 3 units at (2, 1), a blocked tile at
+    (1, 2), and 2 enemies at (4, 1)."""
+    model = ForwardModel(6, 6, blocked=[(1, 2)], own_hq=(1, 1), enemy_hq=(5, 5), **options)
+    model.add_units((1, 1), OWN, unit_ids=['1'])
+    model.add_units((2, 1), OWN, unit_ids=['2', '3', '4'])
+    model.add_units((4, 1), ENEMY, 2)
+    return model
+
+
+def test_moves_follow_the_rules_of_the_engine():
+    model = small_model()
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '2', 'direction': (-1, 0)}) == \
+        'You can place only one unit on your base'
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '1', 'direction': (0, 1)}).startswith('Blocked')
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '1', 'direction': (0, 2)}).startswith('Direction')
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '1', 'direction': (-1, -1)}) == ''
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '1', 'direction': (1, 1)}).endswith('moved twice')
+    assert model.apply({'action_type': 'MOVE', 'unit_id': '2', 'direction': (-1, 0)}) == ''
+    assert model.units == {(0, 0): 1, (1, 1): 1, (2, 1): 2, (4, 1): 2}
+    assert model.unit_ids[(2, 1)] == ('3', '4')
+
+
+def test_attacks_follow_the_rules_of_the_engine():
+    model = small_model()
+    assert model.apply({'action_type': 'ATTACK', 'from': (2, 1), 'to': (5, 1)}) == 'Invalid attack range'
+    assert model.apply({'action_type': 'ATTACK', 'from': (1, 1), 'to': (2, 1)}) == 'Friendly fire!'
+    assert model.apply({'action_type': 'ATTACK', 'from': (2, 1), 'to': (3, 1)}) == 'One of the tiles is empty'
+    assert model.apply({'action_type': 'ATTACK', 'from': (4, 1), 'to': (2, 1)}) == 'Not an own tile'
+    assert model.apply({'action_type': 'ATTACK', 'from': (2, 1), 'to': (4, 1)}) == ''
+
+
+def test_expected_attacks_take_the_expected_losses():
+    model = small_model(attacks=EXPECTED)
+    attacker_loses, defender_loses = outcome_table(3, 2).expected_losses()
+    model.apply({'action_type': 'ATTACK', 'from': (2, 1), 'to': (4, 1)})
+    assert model.units[(2, 1)] == pytest.approx(3 - float(attacker_loses))
+    assert model.units[(4, 1)] == pytest.approx(2 - float(defender_loses))
+    # a fraction of a unit left counts as a unit
+    assert model.unit_ids[(2, 1)] == ('2', '3', '4')
+    model.apply({'action_type': 'ATTACK', 'from': (2, 1), 'to': (4, 1)})
+    # the first unit to have arrived is the first one lost
+    assert model.unit_ids[(2, 1)] == ('3', '4')
+
+
+def test_undo_and_copy():
+    model = small_model()
+    before = state(model)
+    rng = random.Random(1)
+    copies = []
+    for _ in range(40):
+        if rng.random() < 0.5:
+            model.apply({'action_type': 'MOVE', 'unit_id': rng.choice('1234'), 'direction': rng.choice(MOVEMENTS)})
+        else:
+            source = rng.choice([(1, 1), (2, 1), (3, 1)])
+            model.apply({'action_type': 'ATTACK', 'from': source, 'to': (4, 1)})
+        copies.append((model.copy(), state(model)))
+    for _ in range(40):
+        model.undo()
+    assert state(model) == before
+    for copy, copy_state in copies:
+        assert state(copy) == copy_state
+
+
+def test_forward_model_predicts_the_engine(game_map):
+    pytest.importorskip('basebot')
+    from onagame2015.gamebot import Map, Tile
+
+    # headquarters close enough for the units around them to fight
+    game_map.eligible_hqs = set([Coordinate(8, 8), Coordinate(11, 11)])
+    random.seed(2015)
+    arena = ArenaGrid(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    play_random_turns(arena, bots, 2, lambda: None)
+
+    def model_of(bot):
+        rows = arena.get_map_for_player(bot, 'compact')
+        model = ForwardModel.from_map(Map(rows, str(bot.p_num), Tile.from_compact))
+        return model, set((x, y) for y, row in enumerate(rows) for x, tile in enumerate(row) if tile)
+
+    for turn in range(20):
+        for bot, opponent in (bots, bots[::-1]):
+            model, visible = model_of(bot)
+            for seed in range(turn * 100, turn * 100 + 10):
+                units = [unit_id for unit_id in model.unit_tiles if unit_id not in model.moved]
+                own_tiles = [tile for tile in list(model.owner) + [model.own_hq] if model.tile_owner(tile) == OWN]
+                if units and random.random() < 0.5:
+                    action = {'action_type': 'MOVE', 'unit_id': random.choice(units),
+                              'direction': random.choice(MOVEMENTS + ((0, 2),))}
+                    result = MoveAction(bot).execute(arena, action, opponent)
+                else:
+                    # mostly against enemies in range, and sometimes anywhere
+                    fights = [((x, y), (x + delta_x, y + delta_y)) for x, y in own_tiles
+                              for delta_x in range(-2, 3) for delta_y in range(-2, 3)
+                              if abs(delta_x) + abs(delta_y) <= 2 and
+                              model.tile_owner((x + delta_x, y + delta_y)) == ENEMY]
+                    if not fights or random.random() < 0.3:
+                        x, y = random.choice(own_tiles)
+                        fights = [((x, y), (x + random.randint(-2, 2), y + random.randint(-2, 2)))]
+                    source, target = random.choice(fights)
+                    action = {'action_type': 'ATTACK', 'from': source, 'to': target}
+                    result = AttackAction(bot, rng=random.Random(seed)).execute(arena, action, opponent)
+                model.rng = random.Random(seed)
+                assert (model.apply(action) == '') == (not result.get('error'))
+
+                engine_model, still_visible = model_of(bot)
+                assert model.unit_ids == engine_model.unit_ids
+                assert model.unit_tiles == engine_model.unit_tiles
+                for tile in visible & still_visible:
+                    assert model.units.get(tile) == engine_model.units.get(tile)
+                    assert model.owner.get(tile) == engine_model.owner.get(tile)
@@ -0,0 +1,118 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import MAP_ENCODINGS
+from onagame2015.status import GameStatus
+
+pytest.importorskip('basebot')
+from onagame2015.gamebot import GameBot, PointInMap  # noqa
+from conftest import play_random_turns  # noqa
+
+
+def describe(game_map):
+    return dict(
+        (coordinates, (tile.reachable, tile.own_hq, tile.enemy_hq, tile.enemies_count,
+                       [str(unit.unit_id) for unit in tile.units]))
+        for coordinates, tile in game_map.items()
+    )
+
+
+def test_compact_and_string_maps_parse_the_same(game_map):
+    random.seed(4321)
+    arena = ArenaGrid(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+
+    def compare_parsed_maps():
+        for bot in bots:
+            _, string_map = GameBot().parse({
+                'player_num': bot.p_num,
+                'map': arena.get_map_for_player(bot),
+            })
+            _, compact_map = GameBot().parse({
+                'player_num': bot.p_num,
+                'map_encoding': 'compact',
+                'map': arena.get_map_for_player(bot, 'compact'),
+            })
+            assert describe(string_map) == describe(compact_map)
+
+    play_random_turns(arena, bots, 20, compare_parsed_maps)
+
+
+@pytest.mark.parametrize('encoding', MAP_ENCODINGS)
+def test_map_builds_only_the_tiles_looked_up(game_map, encoding):
+    random.seed(4321)
+    arena = ArenaGrid(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+    hq = bots[0].hq.coordinate
+
+    _, parsed_map = GameBot().parse({
+        'player_num': 1,
+        'map_encoding': encoding,
+        'map': arena.get_map_for_player(bots[0], encoding),
+    })
+
+    assert dict.__len__(parsed_map) == 0
+    assert parsed_map[hq].own_hq
+    assert parsed_map.get((-1, 0)) is None
+    assert (arena.width, 0) not in parsed_map
+    assert dict.__len__(parsed_map) == 1
+    assert len(parsed_map.keys()) == len(parsed_map) == arena.width * arena.height
+
+
+@pytest.mark.parametrize('encoding', MAP_ENCODINGS)
+def test_map_scans_units_and_enemies_like_the_tiles(game_map, encoding):
+    random.seed(4321)
+    arena = ArenaGrid(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    arena.deploy_players(bots)
+
+    def compare_scans():
+        _, parsed_map = GameBot().parse({
+            'player_num': 1,
+            'map_encoding': encoding,
+            'map': arena.get_map_for_player(bots[0], encoding),
+        })
+        own_units = sorted((unit.x, unit.y, str(unit.unit_id)) for unit in parsed_map.iter_own_units())
+        enemy_tiles = sorted(parsed_map.iter_enemy_tiles())
+
+        assert own_units == sorted((unit.x, unit.y, str(unit.unit_id))
+                                   for tile in parsed_map.values() for unit in tile.units)
+        assert enemy_tiles == sorted((tile.x, tile.y, tile.enemies_count)
+                                     for tile in parsed_map.values() if tile.enemies_count)
+
+    play_random_turns(arena, bots, 20, compare_scans)
+
+
+def test_path_step_goes_around_blocked_tiles():
+    bot = GameBot()
+    bot.parse({
+        'player_num': 1,
+        'map': [
+            ['', 'B', ''],
+            ['', 'B', ''],
+            ['', '', ''],
+        ],
+    })
+
+    step = bot.path_step(PointInMap(0, 0), PointInMap(2, 0))
+
+    assert step.as_tuple() == (0, 1)
+    assert bot.path_step(PointInMap(2, 0), PointInMap(2, 0)) is None
+
+
+def test_gamebot_does_not_need_the_engine():
+    code = '; '.join([
+        'import sys',
+        "sys.modules['onagame2015.engine'] = sys.modules['onagame2015.arena'] = None",
+        'import onagame2015.gamebot',
+    ])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    subprocess.check_call([sys.executable, '-c', code], env=env)
@@ -0,0 +1,59 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('turnboxed')
+from onagame2015.bot import BotPlayer  # noqa
+from onagame2015.engine import Onagame2015GameController  # noqa
+from onagame2015 import gamebot  # noqa
+from onagame2015.headless import HeadlessGame, load_bot, load_bot_class  # noqa
+from conftest import BOTS_DIR, SCRIPT  # noqa
+
+
+def test_headless_game_has_the_same_trace_as_the_sandboxed_one():
+    bots = [BotPlayer('bot1', SCRIPT, 1), BotPlayer('bot2', SCRIPT, 2)]
+    sandboxed = Onagame2015GameController(bots, seed=2015)
+    for bot in bots:
+        sandboxed.add_player(bot.username, bot.script)
+    sandboxed.run()
+
+    headless = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=2015).run()
+
+    assert json.loads(headless.json) == json.loads(sandboxed.json)
+
+
+def test_headless_game_ends_when_a_bot_crashes():
+    class CrashingBot(object):
+        def on_turn(self, data_dict):
+            raise ValueError("crashed")
+
+    controller = HeadlessGame([CrashingBot(), load_bot(SCRIPT)], seed=1).run()
+
+    final = json.loads(controller.json)['final']
+    assert final['player'] == 'bot2'
+    assert 'ValueError' in final['traceback']
+
+
+def test_restored_controller_plays_the_game_again():
+    game = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=7)
+    start = game.controller.snapshot()
+    trace = json.loads(game.run().json)
+
+    game.controller.restore(start)
+    # new bots, since they keep the state of the game they played
+    replay = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)])
+    replay.controller = game.controller
+    assert json.loads(replay.run().json) == trace
+
+
+def test_bots_import_the_gamebot_they_ship_with():
+    own_gamebot = load_bot_class(os.path.join(BOTS_DIR, 'bot1', 'script.py')).__mro__[1]
+    engine_gamebot = load_bot_class(os.path.join(BOTS_DIR, 'bot2', 'script.py')).__mro__[1]
+    again = load_bot_class(os.path.join(BOTS_DIR, 'bot1', 'script.py')).__mro__[1]
+
+    assert own_gamebot is not gamebot.GameBot
+    assert os.path.samefile(os.path.dirname(own_gamebot.parse.__func__.__globals__['__file__']),
+                            os.path.join(BOTS_DIR, 'bot1'))
+    assert engine_gamebot is gamebot.GameBot
+    assert again is own_gamebot
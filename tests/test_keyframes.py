@@ -0,0 +1,37 @@
+import random
+
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.keyframes import Board, board_at_turn
+from onagame2015.lib import GameStages
+from onagame2015.status import GameStatus
+from onagame2015.testing import record_game
+
+
+def test_board_snapshot_of_a_new_game(game_map):
+    arena = ArenaGrid(game_map, GameStatus())
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    initial = arena.deploy_players(bots)
+
+    snapshot = arena.board_snapshot()
+
+    assert sorted(snapshot['hqs']) == sorted(
+        [player['position']['x'], player['position']['y'], player['id']] for player in initial['players'])
+    assert sum(units for _, _, _, units in snapshot['tiles']) == 2 * initial['players'][0]['units']
+
+
+def test_board_at_turn_matches_the_arena_with_and_without_keyframes(game_map):
+    boards = {}
+
+    def take_board(arena, turn_number):
+        boards[turn_number] = Board.from_keyframe(arena.board_snapshot())
+
+    random.seed(1234)
+    game_data = record_game(game_map, 30, keyframe_interval=7, after_each_turn=take_board)
+    without_keyframes = dict(game_data)
+    del without_keyframes[GameStages.KEYFRAMES]
+
+    assert [keyframe['turn_number'] for keyframe in game_data[GameStages.KEYFRAMES]] == [7, 14, 21, 28]
+    for turn_number in (30, 1, 7, 8, 13, 14, 22, 29):
+        assert board_at_turn(game_data, turn_number) == boards[turn_number]
+        assert board_at_turn(without_keyframes, turn_number) == boards[turn_number]
@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from onagame2015 import maploader
+from onagame2015.maploader import clear_map_cache, load_map, parse_map
+
+MAPS_DIR = os.path.join(os.path.dirname(maploader.__file__), 'maps')
+
+
+@pytest.fixture
+def maps_dir(tmpdir, monkeypatch):
+    """A copy of the maps directory, with no compiled maps in it."""
+    tmpdir.mkdir('maps')
+    shutil.copy(os.path.join(MAPS_DIR, 'map_draft.json'), str(tmpdir.join('maps')))
+    monkeypatch.setattr(maploader, 'CURRENT_DIR', str(tmpdir))
+    clear_map_cache()
+    yield tmpdir.join('maps')
+    clear_map_cache()
+
+
+def parsed_draft():
+    with open(os.path.join(MAPS_DIR, 'map_draft.json')) as fh:
+        return parse_map(json.load(fh))
+
+
+def assert_same_map(game_map, expected):
+    assert dict(game_map) == dict(expected)
+    assert game_map.eligible_hqs == expected.eligible_hqs
+    assert (game_map.width, game_map.height) == (expected.width, expected.height)
+    assert [list(row) for row in game_map.iterrows()] == [list(row) for row in expected.iterrows()]
+
+
+def test_load_map_compiles_the_map_once(maps_dir):
+    compiled = maps_dir.join('map_draft.bin')
+
+    assert_same_map(load_map('map_draft.json'), parsed_draft())
+    assert compiled.check()
+
+    clear_map_cache()
+    compiled_map = load_map('map_draft.json')
+    assert_same_map(compiled_map, parsed_draft())
+
+
+def test_load_map_ignores_a_stale_compiled_map(maps_dir):
+    load_map('map_draft.json')
+    clear_map_cache()
+    source = maps_dir.join('map_draft.json')
+    data = json.loads(source.read())
+    blocking = next(layer for layer in data['layers'] if layer['name'].lower() == 'blocking layer')
+    blocking['data'] = [1] * len(blocking['data'])
+    source.write(json.dumps(data))
+
+    game_map = load_map('map_draft.json')
+
+    assert not any(game_map.itervalues())
+    assert_same_map(game_map, parse_map(data))
+
+
+def test_load_map_recovers_from_a_broken_compiled_map(maps_dir):
+    maps_dir.join('map_draft.bin').write('garbage')
+
+    assert_same_map(load_map('map_draft.json'), parsed_draft())
+
+
+def test_load_map_recovers_from_a_truncated_compiled_map(maps_dir):
+    load_map('map_draft.json')
+    clear_map_cache()
+    compiled = maps_dir.join('map_draft.bin')
+    data = compiled.read('rb')
+    compiled.write(data[:len(data) // 2], 'wb')
+
+    assert_same_map(load_map('map_draft.json'), parsed_draft())
+    # compiled again, in place of the truncated one
+    assert compiled.read('rb') == data
+    assert sorted(path.basename for path in maps_dir.listdir()) == ['map_draft.bin', 'map_draft.json']
+
+
+def test_load_map_shares_the_maps_loaded(maps_dir):
+    assert load_map('map_draft.json') is load_map('map_draft.json')
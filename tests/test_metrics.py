@@ -0,0 +1,80 @@
+import socket
+
+import pytest
+
+from onagame2015.metrics import MemorySink, PrometheusFileSink, StatsdSink
+from conftest import SCRIPT
+
+
+def test_prometheus_file_sink(tmpdir):
+    path = str(tmpdir.join('onagame2015.prom'))
+    sink = PrometheusFileSink(path, buckets={'game_rounds': (10, 100)})
+    sink.increment('games_total')
+    sink.increment('games_total', 2)
+    for rounds in (5, 10, 50, 199):
+        sink.observe('game_rounds', rounds)
+    sink.flush()
+
+    with open(path) as fh:
+        lines = fh.read().splitlines()
+    assert lines == [
+        '# TYPE onagame2015_games_total counter',
+        'onagame2015_games_total 3',
+        '# TYPE onagame2015_game_rounds histogram',
+        'onagame2015_game_rounds_bucket{le="10.0"} 2',
+        'onagame2015_game_rounds_bucket{le="100.0"} 3',
+        'onagame2015_game_rounds_bucket{le="+Inf"} 4',
+        'onagame2015_game_rounds_sum 264',
+        'onagame2015_game_rounds_count 4',
+    ]
+    assert tmpdir.listdir() == [tmpdir.join('onagame2015.prom')]
+
+
+def test_statsd_sink_sends_the_metrics_in_packets():
+    listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    listener.bind(('127.0.0.1', 0))
+    listener.settimeout(5)
+    try:
+        sink = StatsdSink(port=listener.getsockname()[1])
+        sink.increment('turns_total')
+        sink.observe('bot_response_seconds', 0.25)
+        sink.flush()
+        assert listener.recv(65536).splitlines() == [
+            'onagame2015.turns_total:1|c',
+            'onagame2015.bot_response_seconds:0.25|h',
+        ]
+
+        for _ in range(200):
+            sink.increment('turns_total')
+        sink.flush()
+        packets = []
+        while sum(len(packet.splitlines()) for packet in packets) < 200:
+            packets.append(listener.recv(65536))
+    finally:
+        listener.close()
+    assert len(packets) > 1
+    assert all(len(packet) <= StatsdSink.MAX_PACKET_SIZE for packet in packets)
+
+
+def test_statsd_sink_ignores_network_errors():
+    sink = StatsdSink(host='256.0.0.1')
+    sink.increment('turns_total')
+    sink.flush()
+
+
+def test_controller_records_the_metrics_of_its_games():
+    pytest.importorskip('turnboxed')
+    from onagame2015.headless import HeadlessGame, load_bot
+
+    class CrashingBot(object):
+        def on_turn(self, data_dict):
+            raise ValueError("crashed")
+
+    sink = MemorySink()
+    controller = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=1, metrics=sink).run()
+    HeadlessGame([CrashingBot(), load_bot(SCRIPT)], seed=1, metrics=sink).run()
+
+    turns = 2 * controller.current_round + 1 + 1
+    assert sink.counters == {'games_total': 2, 'turns_total': turns, 'bot_crashes_total': 1}
+    assert sink.observations['game_rounds'] == [controller.current_round, 0]
+    assert len(sink.observations['bot_response_seconds']) == turns
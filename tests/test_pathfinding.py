@@ -0,0 +1,60 @@
+from onagame2015.pathfinding import Pathfinder, UNREACHABLE
+
+
+def walk(pathfinder, start, target):
+    """Follow the next steps from <start>, @return the points visited."""
+    path = [start]
+    while path[-1] != target:
+        step = pathfinder.next_step(path[-1], target)
+        assert step is not None
+        path.append((path[-1][0] + step[0], path[-1][1] + step[1]))
+    return path
+
+
+def test_distances_in_an_empty_map_allow_diagonals():
+    pathfinder = Pathfinder(10, 8)
+
+    assert pathfinder.distance((0, 0), (5, 3)) == 5
+    assert pathfinder.distance((9, 7), (9, 0)) == 7
+    assert pathfinder.next_step((5, 3), (5, 3)) is None
+    assert len(walk(pathfinder, (0, 0), (5, 3))) == 6
+
+
+def test_paths_go_around_blocked_tiles():
+    wall = [(3, y) for y in range(0, 5)]
+    pathfinder = Pathfinder(6, 6, blocked=wall)
+
+    path = walk(pathfinder, (0, 0), (5, 0))
+
+    assert len(path) - 1 == pathfinder.distance((0, 0), (5, 0)) == 10
+    assert not set(path) & set(wall)
+
+
+def test_closed_off_tiles_are_unreachable():
+    pathfinder = Pathfinder(5, 5, blocked=[(1, 0), (1, 1), (0, 1)])
+
+    assert pathfinder.distance((0, 0), (4, 4)) == UNREACHABLE
+    assert pathfinder.next_step((0, 0), (4, 4)) is None
+
+
+def test_fields_are_cached_per_target_with_lru_eviction():
+    pathfinder = Pathfinder(5, 5, cache_size=2)
+
+    first = pathfinder.distance_field((0, 0))
+    assert pathfinder.distance_field((0, 0)) is first
+    second = pathfinder.distance_field((4, 4))
+    pathfinder.distance_field((0, 0))
+    pathfinder.distance_field((2, 2))
+
+    assert pathfinder.distance_field((0, 0)) is first
+    assert pathfinder.distance_field((4, 4)) is not second
+
+
+def test_new_blocked_tiles_drop_the_cached_fields():
+    pathfinder = Pathfinder(5, 5)
+    field = pathfinder.distance_field((4, 0))
+
+    assert not pathfinder.block([])
+    assert pathfinder.distance_field((4, 0)) is field
+    assert pathfinder.block([(3, 0), (3, 1)])
+    assert pathfinder.distance((4, 0), (2, 0)) == 4
@@ -0,0 +1,68 @@
+import json
+import os
+
+import pytest
+
+from onagame2015.bot import BotPlayer
+from onagame2015.profiling import TurnProfiler
+from conftest import SCRIPT
+
+
+class FakeClock(object):
+    """Advances a second each time it is read."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        self.now += 1
+        return self.now
+
+
+def test_profiler_measures_the_phases_of_each_turn():
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    profiler = TurnProfiler(clock=FakeClock())
+    for round_number in range(2):
+        for bot in bots:
+            profiler.stop(bot, 'get_turn_data', profiler.start())
+            for _ in range(3):
+                profiler.stop(bot, 'MOVE', profiler.start())
+            profiler.end_turn(bot, round_number)
+
+    assert [(turn['round'], turn['player']) for turn in profiler.turns] == [
+        (0, 'bot1'), (0, 'bot2'), (1, 'bot1'), (1, 'bot2')]
+    assert profiler.turns[0]['phases'] == {
+        'get_turn_data': {'calls': 1, 'seconds': 1.0},
+        'MOVE': {'calls': 3, 'seconds': 3.0},
+    }
+    assert profiler.summary()['bot2'] == {
+        'get_turn_data': {'calls': 2, 'seconds': 2.0},
+        'MOVE': {'calls': 6, 'seconds': 6.0},
+    }
+
+
+def test_controller_profiles_the_turns(tmpdir):
+    pytest.importorskip('turnboxed')
+    from onagame2015.headless import HeadlessGame, load_bot
+
+    path = str(tmpdir.join('profile.json'))
+    controller = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=1, profile=True, profile_path=path).run()
+
+    profile = json.loads(controller.json)['final']['profile']
+    assert sorted(profile) == ['bot1', 'bot2']
+    for phase in ('get_turn_data', 'check_game_over', 'validate_actions', 'MOVE', 'update_game_status'):
+        assert profile['bot1'][phase]['calls'] > 0
+    assert profile['bot1']['check_game_over']['calls'] == controller.current_round + 1
+    assert os.path.exists(path)
+    with open(path) as fh:
+        assert json.load(fh)['summary'] == profile
+
+
+def test_controller_does_not_profile_by_default():
+    pytest.importorskip('turnboxed')
+    from onagame2015.headless import HeadlessGame, load_bot
+
+    controller = HeadlessGame([load_bot(SCRIPT), load_bot(SCRIPT)], seed=1).run()
+
+    assert not controller.profiler.enabled
+    assert 'profile' not in json.loads(controller.json)['final']
@@ -0,0 +1,73 @@
+import json
+import random
+from StringIO import StringIO
+
+import pytest
+
+from onagame2015.lib import GameStages
+from onagame2015.replay import ReplayReader, write_replay
+from onagame2015.testing import record_game
+
+
+@pytest.fixture
+def game_data(game_map):
+    random.seed(2015)
+    return record_game(game_map, 30)
+
+
+def replay_of(game_data):
+    stream = StringIO()
+    write_replay(game_data, stream)
+    return stream
+
+
+def test_replay_rebuilds_the_json_document(game_data):
+    stream = replay_of(game_data)
+
+    assert ReplayReader(stream).game_data() == game_data
+    assert len(stream.getvalue()) * 10 < len(json.dumps(game_data[GameStages.TURNS]))
+
+
+def test_replay_reads_any_turn(game_data):
+    reader = ReplayReader(replay_of(game_data))
+    actions = game_data[GameStages.TURNS]
+    attacks = [action for action in actions if action['action'] == 'ATTACK']
+    assert attacks
+
+    for turn_number in (17, 3, 0, 30):
+        expected = [action for action in actions if action['turn_number'] == turn_number]
+        assert reader.read_turn(turn_number) == expected
+    assert reader.turns == sorted(set(action['turn_number'] for action in actions))
+    assert reader.read_turn(1000) == []
+
+
+def test_replay_keeps_unknown_records_as_they_are():
+    actions = [
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 1, 'y': 2}},
+         'to': {'tile': {'x': 2, 'y': 2}, 'units': 3}, 'turn_number': 4},
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 1, 'y': 2}},
+         'to': {'tile': {'x': 2, 'y': 2}, 'units': 3}, 'turn_number': 4, 'note': 'extra'},
+        {'action': 'SURRENDER', 'player': 'bot2', 'turn_number': 4},
+    ]
+    game_data = {GameStages.INITIAL: {}, GameStages.TURNS: actions, GameStages.FINAL: {}}
+
+    assert ReplayReader(replay_of(game_data)).read_turn(4) == actions
+
+
+def test_replay_keeps_records_out_of_the_range_of_the_columns_as_they_are():
+    actions = [
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 300, 'y': 70000}},
+         'to': {'tile': {'x': 301, 'y': 70000}, 'units': 3}, 'turn_number': 4},
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 1, 'y': 2}},
+         'to': {'tile': {'x': 0, 'y': 2}, 'units': -1}, 'turn_number': 4},
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 1, 'y': 2}},
+         'to': {'tile': {'x': 0, 'y': 2}, 'units': 2 ** 32}, 'turn_number': 4},
+        {'action': 'ATTACK', 'player': 1, 'turn_number': 4,
+         'from': {'tile': {'x': 1, 'y': 2}, 'dice': [6, 300], 'remaining_units': 3, 'lost_units': 0},
+         'to': {'tile': {'x': 2, 'y': 2}, 'player': 2, 'dice': [1], 'remaining_units': 0, 'lost_units': 1}},
+        {'action': 'MOVE_UNITS', 'player': 1, 'from': {'tile': {'x': 1, 'y': 2}},
+         'to': {'tile': {'x': 2, 'y': 2}, 'units': 3}, 'turn_number': 4},
+    ]
+    game_data = {GameStages.INITIAL: {}, GameStages.TURNS: actions, GameStages.FINAL: {}}
+
+    assert ReplayReader(replay_of(game_data)).read_turn(4) == actions
@@ -0,0 +1,53 @@
+from fractions import Fraction
+
+import pytest
+
+from onagame2015.dice import attack_probabilities
+
+numpy = pytest.importorskip('numpy')
+from onagame2015.simulation import simulate_engagements  # noqa
+
+
+def exact_engagement(attacker_units, defender_units):
+    """Probability of each (attackers_left, defenders_left) at the end of
+    the engagement, attacking until one side has no units."""
+    states = {(attacker_units, defender_units): Fraction(1)}
+    final = {}
+    while states:
+        next_states = {}
+        for (attackers, defenders), probability in states.iteritems():
+            if not attackers or not defenders:
+                final[attackers, defenders] = final.get((attackers, defenders), 0) + probability
+                continue
+            for (attacker_loses, defender_loses), p in attack_probabilities(attackers, defenders).iteritems():
+                state = attackers - attacker_loses, defenders - defender_loses
+                next_states[state] = next_states.get(state, 0) + probability * p
+        states = next_states
+    return final
+
+
+def test_engagements_follow_the_exact_distribution():
+    scenarios = [(5, 3), (2, 4), (10, 10)]
+    outcomes = simulate_engagements([a for a, _ in scenarios], [d for _, d in scenarios],
+                                    samples=20000, rng=2015)
+
+    for index, scenario in enumerate(scenarios):
+        exact = exact_engagement(*scenario)
+        simulated = outcomes.distribution(index)
+        assert set(simulated) <= set(exact)
+        for outcome, probability in exact.iteritems():
+            assert abs(simulated.get(outcome, 0) - probability) < 0.015
+        win_probability = sum(p for (_, defenders), p in exact.iteritems() if not defenders)
+        assert abs(outcomes.attacker_win_probability[index] - win_probability) < 0.015
+
+
+def test_engagements_are_reproducible_and_limited_in_rounds():
+    one_round = simulate_engagements(3, [2, 1, 0], samples=5000, max_rounds=1, rng=7)
+
+    assert (one_round.rounds[:2] == 1).all() and (one_round.rounds[2] == 0).all()
+    assert one_round.distribution(2) == {(3, 0): 1.0}
+    for (attackers, defenders), p in one_round.distribution(0).iteritems():
+        exact = attack_probabilities(3, 2)[3 - attackers, 2 - defenders]
+        assert abs(p - exact) < 0.02
+    again = simulate_engagements(3, [2, 1, 0], samples=5000, max_rounds=1, rng=7)
+    assert (again.attackers_left == one_round.attackers_left).all()
@@ -0,0 +1,67 @@
+import json
+import random
+from StringIO import StringIO
+
+import pytest
+
+from onagame2015.arena import ArenaGrid
+from onagame2015.bot import BotPlayer
+from onagame2015.lib import GameStages
+from onagame2015.status import GameStatus, read_trace
+
+
+def play(game_status, game_map):
+    """Deploy two bots and record some turns and the final stage, as the
+    controller does (the deployment of the units goes before the header)."""
+    arena = ArenaGrid(game_map, game_status, rng=random.Random(1))
+    bots = [BotPlayer('bot1', None, 1), BotPlayer('bot2', None, 2)]
+    initial = {'map_source': 'test', 'players': []}
+    initial.update(arena.deploy_players(bots))
+    game_status.add_game_stage(GameStages.INITIAL, initial)
+    for turn in range(1, 100):
+        game_status.update_turns({'action': 'MOVE_UNITS', 'turn_number': turn})
+    game_status.add_game_stage(GameStages.FINAL, {'action': 'GAMEOVER', 'rounds': 99})
+
+
+def test_streamed_trace_rebuilds_the_same_document(game_map):
+    stream = StringIO()
+    expected = GameStatus()
+    streamed = GameStatus(stream=stream, buffer_size=10)
+    for game_status in (expected, streamed):
+        play(game_status, game_map)
+
+    lines = stream.getvalue().splitlines()
+    assert json.loads(lines[0]).keys() == [GameStages.INITIAL]
+    assert json.loads(lines[-1]).keys() == [GameStages.FINAL]
+    assert read_trace(StringIO(stream.getvalue())) == json.loads(expected.json)
+    with pytest.raises(RuntimeError):
+        streamed.json
+
+
+def test_streamed_trace_is_written_in_batches():
+    stream = StringIO()
+    game_status = GameStatus(stream=stream, buffer_size=3)
+    game_status.add_game_stage(GameStages.INITIAL, {})
+    game_status.update_turns({'turn_number': 1})
+    assert stream.getvalue() == ''
+
+    game_status.update_turns({'turn_number': 2})
+    assert len(stream.getvalue().splitlines()) == 3
+
+
+def test_restore_drops_what_was_traced_after_the_snapshot():
+    game_status = GameStatus()
+    game_status.add_game_stage(GameStages.INITIAL, {'players': []})
+    game_status.update_turns({'turn_number': 1})
+    expected = json.loads(game_status.json)
+    snapshot = game_status.snapshot()
+
+    for _ in range(2):
+        game_status.update_turns({'turn_number': 2})
+        game_status.add_keyframe(2, {'tiles': [], 'hqs': []})
+        game_status.add_game_stage(GameStages.FINAL, {'action': 'GAMEOVER'})
+        game_status.restore(snapshot)
+        assert json.loads(game_status.json) == expected
+
+    with pytest.raises(RuntimeError):
+        GameStatus(stream=StringIO()).snapshot()
@@ -0,0 +1,57 @@
+import pytest
+
+from onagame2015 import tournament
+from onagame2015.tournament import INITIAL_RATING, Standings, _init_worker, play_game, run_tournament, schedule
+from conftest import SCRIPT
+
+
+def test_schedule_plays_every_pairing_in_both_seats():
+    games = schedule(['a', 'b', 'c'], seeds=[0, 1], maps=['map_draft.json'])
+
+    assert len(games) == 3 * 2 * 2
+    assert ('a', 'b', 1, 'map_draft.json') in games
+    assert ('b', 'a', 1, 'map_draft.json') in games
+    assert not [game for game in games if game[0] == game[1]]
+
+
+def test_standings_count_results_and_rate_the_winners():
+    standings = Standings(['a', 'b', 'c'])
+    standings.add_result({'bots': ['a', 'b'], 'winner': 'a', 'rounds': 10})
+    standings.add_result({'bots': ['c', 'a'], 'winner': 'a', 'rounds': 30})
+    standings.add_result({'bots': ['b', 'c'], 'winner': None, 'rounds': 199})
+    standings.add_result({'bots': ['b', 'a'], 'error': 'Traceback...'})
+
+    assert (standings.wins['a'], standings.draws['a'], standings.losses['a']) == (2, 0, 0)
+    assert (standings.wins['b'], standings.draws['b'], standings.losses['b']) == (0, 1, 1)
+    assert standings.mean_game_length('a') == 20
+    assert len(standings.errors) == 1
+    assert standings.ratings['a'] > INITIAL_RATING > standings.ratings['c']
+    assert sum(standings.ratings.values()) == 3 * INITIAL_RATING
+    assert standings.table().splitlines()[1].startswith('a ')
+
+
+def test_play_game_with_the_bots_of_the_worker(monkeypatch):
+    pytest.importorskip('turnboxed')
+    monkeypatch.setattr(tournament, '_worker_bots', {})
+    _init_worker({'a': SCRIPT, 'b': SCRIPT})
+
+    result = play_game(('a', 'b', 1, 'map_draft.json'))
+
+    assert 'error' not in result
+    assert result['bots'] == ['a', 'b'] and result['seed'] == 1
+    assert result['winner'] in ('a', 'b', None)
+    assert result['rounds'] > 0
+
+
+def test_run_tournament_applies_the_results_in_schedule_order():
+    pytest.importorskip('turnboxed')
+    results = []
+
+    standings = run_tournament({'a': SCRIPT, 'b': SCRIPT}, seeds=[0, 1], processes=1,
+                               on_result=lambda result, _: results.append(result))
+
+    assert [tuple(result['bots']) + (result['seed'], result['map']) for result in results] == \
+        schedule(['a', 'b'], [0, 1], ['map_draft.json'])
+    assert not standings.errors
+    assert sum(standings.games(bot) for bot in 'ab') == 2 * len(results)
+    assert sum(standings.ratings.values()) == 2 * INITIAL_RATING
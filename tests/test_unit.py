@@ -1,5 +1,7 @@
 import pytest
 
+from onagame2015.actions import MoveAction
+from onagame2015.bot import BotPlayer
 from onagame2015.lib import Coordinate
 from onagame2015.units import AttackUnit
 
@@ -66,3 +68,16 @@ def test_attack_unit_cant_move_if_occupied(random_arena):
     assert result['error']
     assert result['from'] == initial_coordinate
     assert result['to'] == initial_enemy_coordinate
+
+
+def test_move_action_out_of_arena_is_an_error(random_arena):
+    bot = BotPlayer('bot1', None, 1)
+    coordinate = Coordinate(random_arena.width - 1, 0)
+    unit = AttackUnit(coordinate, bot.p_num, random_arena)
+    random_arena.set_content_on_tile(coordinate, unit)
+    bot.add_unit(unit)
+
+    result = MoveAction(bot).execute(random_arena, {'unit_id': unit.id, 'direction': (1, 0)}, None)
+
+    assert result['error'] and result['player'] == bot.p_num
+    assert unit.coordinate == coordinate